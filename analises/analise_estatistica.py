@@ -1,8 +1,25 @@
+"""
+Análise estatística das presenças e frames.
+
+Por padrão lê apenas os agregados mantidos pelo worker de banco de dados
+(estatisticas_video e presencas_pessoa_dia). Com --completo carrega as coleções
+brutas `presencas` e `frames` e executa as análises detalhadas (distribuições).
+"""
+import argparse
+import sys
+
 import pandas as pd
 from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from comum.agregados import ESTATISTICAS_VIDEO, PRESENCAS_PESSOA_DIA
+
+parser = argparse.ArgumentParser(description="Análise estatística das presenças e frames")
+parser.add_argument("--completo", action="store_true", help="Carrega as coleções brutas (presencas e frames)")
+args = parser.parse_args()
+
 # Carrega variáveis do .env (se existir)
 load_dotenv()
 
@@ -13,6 +30,70 @@ MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "seu_banco")
 client = MongoClient(MONGO_URI)
 db = client[MONGO_DB_NAME]
 
+# -----------------------------
+# ANÁLISES SOBRE OS AGREGADOS
+# -----------------------------
+df_videos = pd.DataFrame(list(db[ESTATISTICAS_VIDEO].find({}, {"_id": 0})))
+df_pessoas_dia = pd.DataFrame(list(db[PRESENCAS_PESSOA_DIA].find({}, {"_id": 0})))
+
+if df_videos.empty:
+    print("⚠️ Nenhum agregado encontrado (execute: python -m comum.agregados --reconstruir)")
+    sys.exit(0)
+
+for coluna in ("total_frames", "frames_sem_pessoas", "total_faces_detectadas", "total_presencas",
+               "soma_tempo_processamento", "soma_tempo_fila", "soma_tempo_deteccao", "soma_tempo_reconhecimento"):
+    if coluna not in df_videos:
+        df_videos[coluna] = 0
+df_videos = df_videos.fillna(0)
+
+total_presencas = df_videos["total_presencas"].sum()
+total_frames = df_videos["total_frames"].sum()
+
+print("✅ Agregados carregados com sucesso!")
+print(f"Total de registros de presença: {int(total_presencas)}")
+print(f"Total de frames: {int(total_frames)}\n")
+
+if total_presencas:
+    print("⏱ Tempo médio de detecção e reconhecimento:")
+    print(pd.Series({
+        "tempo_deteccao": df_videos["soma_tempo_deteccao"].sum() / total_presencas,
+        "tempo_reconhecimento": df_videos["soma_tempo_reconhecimento"].sum() / total_presencas,
+    }), "\n")
+
+    print("⏱ Tempo médio de processamento (captura + detecção + reconhecimento):")
+    print(f"{df_videos['soma_tempo_processamento'].sum() / total_presencas:.4f}s\n")
+
+    print("📦 Tempo médio em fila:")
+    print(f"{df_videos['soma_tempo_fila'].sum() / total_presencas:.4f}s\n")
+
+if not df_pessoas_dia.empty:
+    print("🧍 Faces por pessoa (mín, máx, média):")
+    print(df_pessoas_dia.groupby("pessoa")["total"].sum().describe(), "\n")
+
+    print("👥 Total de pessoas distintas reconhecidas:")
+    print(df_pessoas_dia["pessoa"].nunique(), "\n")
+
+if total_frames:
+    print("📸 Percentual de frames vazios (total_faces_detectadas == 0):")
+    print(f"{df_videos['frames_sem_pessoas'].sum() / total_frames * 100:.2f}%\n")
+
+    print("🧾 Média de presenças por frame:")
+    print(f"{total_presencas / total_frames:.4f}\n")
+
+total_detectadas = df_videos["total_faces_detectadas"].sum()
+if total_detectadas:
+    print("📊 Eficiência de reconhecimento (reconhecidas / detectadas):")
+    print(f"{total_presencas / total_detectadas:.4f}\n")
+
+print("🎞 Resumo por tag_video:")
+print(df_videos.groupby("tag_video")[["total_frames", "frames_sem_pessoas", "total_presencas"]].sum(), "\n")
+
+if not args.completo:
+    sys.exit(0)
+
+# -----------------------------
+# ANÁLISES DETALHADAS (--completo)
+# -----------------------------
 # Carregar as coleções
 presencas_cursor = db.presencas.find()
 frames_cursor = db.frames.find()
@@ -0,0 +1,41 @@
+"""
+Tokens opacos para paginação por cursor (keyset).
+
+O token é o JSON da chave de ordenação do último item da página, em base64 url-safe;
+ObjectIds são serializados como {"$oid": "..."}.
+"""
+import base64
+import json
+
+from bson import ObjectId
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _serializar(valor):
+    return {"$oid": str(valor)} if isinstance(valor, ObjectId) else valor
+
+
+def _desserializar(valor):
+    if isinstance(valor, dict) and set(valor) == {"$oid"}:
+        return ObjectId(valor["$oid"])
+    return valor
+
+
+def codificar(chave: dict) -> str:
+    texto = json.dumps({k: _serializar(v) for k, v in chave.items()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar(token: str, campos: tuple) -> dict:
+    """Decodifica o token e confere que ele traz exatamente os `campos` esperados."""
+    try:
+        texto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+        chave = {k: _desserializar(v) for k, v in json.loads(texto).items()}
+    except Exception as e:
+        raise CursorInvalido(f"cursor inválido: {e}")
+    if set(chave) != set(campos):
+        raise CursorInvalido("cursor inválido: campos inesperados")
+    return chave
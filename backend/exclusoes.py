@@ -0,0 +1,191 @@
+"""
+Exclusão de pessoas em segundo plano.
+
+DELETE /pessoas/{uuid} remove apenas o documento da pessoa e agenda uma tarefa; a
+tarefa (uma por vez, em uma thread dedicada) então:
+  1. exclui (ou arquiva em `presencas_arquivadas`, com EXCLUSAO_PRESENCAS=arquivar)
+     as presenças da pessoa em lotes, tirando-as dos frames (lista_presencas e
+     total_faces_reconhecidas) e descontando-as dos agregados;
+  2. remove do MinIO tudo sob o prefixo `{uuid}/` (fotos, miniaturas e fotos das
+     presenças) com `remove_objects`, em lotes de até EXCLUSAO_LOTE_MINIO objetos.
+
+O progresso fica na coleção `tarefas` e é consultado em GET /tarefas/{id}. Cada passo
+pode ser repetido sem efeito duplicado; tarefas não concluídas cujo `atualizada_em` ficou
+parado por EXCLUSAO_RETOMAR_APOS segundos (o processo que as executava caiu) são
+retomadas por qualquer processo do backend.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from minio.deleteobjects import DeleteObject
+from pymongo import ReplaceOne
+
+from comum import metricas
+from comum.agregados import descontar_presencas, remover_pessoa
+from comum.frames import remover_presencas_dos_frames
+
+EXCLUSAO_PRESENCAS = os.getenv("EXCLUSAO_PRESENCAS", "excluir")  # "excluir" ou "arquivar"
+EXCLUSAO_LOTE_PRESENCAS = int(os.getenv("EXCLUSAO_LOTE_PRESENCAS", 1000))
+EXCLUSAO_LOTE_MINIO = int(os.getenv("EXCLUSAO_LOTE_MINIO", 1000))  # limite do DeleteObjects do S3
+EXCLUSAO_RETOMAR_APOS = float(os.getenv("EXCLUSAO_RETOMAR_APOS", 300))  # segundos sem progresso
+TAREFAS = "tarefas"
+ESTADOS_ATIVOS = ["pendente", "presencas", "imagens"]
+PRESENCAS_ARQUIVADAS = "presencas_arquivadas"
+
+# Campos usados para descontar os agregados e achar a foto de cada presença
+CAMPOS_DESCONTO = {
+    "pessoa": 1, "tag_video": 1, "data_captura_frame": 1, "tempo_captura_frame": 1, "tempo_deteccao": 1,
+    "tempo_reconhecimento": 1, "tempo_fila_real": 1, "foto_captura": 1,
+}
+
+logger = logging.getLogger("server")
+
+
+def _lotes(itens, tamanho: int):
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class ExclusaoPessoas:
+    """Agenda e executa exclusões de pessoas; o estado de cada tarefa fica no MongoDB."""
+
+    def __init__(self, db, minio_client, bucket: str):
+        self.db = db
+        self.tarefas = db[TAREFAS]
+        self.minio_client = minio_client
+        self.bucket = bucket
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exclusoes")
+        self._agendadas = set()  # tarefas na fila ou em execução neste processo
+
+        self.imagens_removidas = metricas.contador("exclusao_imagens_removidas_total", "Objetos removidos do MinIO por exclusões")
+        self.presencas_removidas = metricas.contador("exclusao_presencas_removidas_total", "Presenças excluídas/arquivadas por exclusões")
+
+    def agendar(self, pessoa: str) -> str:
+        """Registra a tarefa de exclusão de `pessoa` e a coloca na fila; retorna o id da tarefa."""
+        tarefa_id = uuid.uuid4().hex
+        agora = datetime.now().timestamp()
+        self.tarefas.insert_one({
+            "_id": tarefa_id,
+            "tipo": "exclusao_pessoa",
+            "pessoa": pessoa,
+            "estado": "pendente",
+            "presencas": EXCLUSAO_PRESENCAS,
+            "presencas_removidas": 0,
+            "imagens_removidas": 0,
+            "erros_minio": 0,
+            "erro": None,
+            "criada_em": agora,
+            "atualizada_em": agora,
+        })
+        self._submeter(tarefa_id, pessoa)
+        return tarefa_id
+
+    def estado(self, tarefa_id: str):
+        return self.tarefas.find_one({"_id": tarefa_id})
+
+    def iniciar_retomada(self):
+        """Verifica, agora e a cada EXCLUSAO_RETOMAR_APOS / 2 segundos, se há tarefas paradas para retomar."""
+        threading.Thread(target=self._verificar_periodicamente, daemon=True, name="exclusoes-retomada").start()
+
+    def _verificar_periodicamente(self):
+        while True:
+            try:
+                self.retomar()
+            except Exception as e:
+                logger.error(f"❌ Erro ao retomar exclusões: {e}")
+            time.sleep(EXCLUSAO_RETOMAR_APOS / 2)
+
+    def retomar(self) -> int:
+        """
+        Reagenda as tarefas ativas sem progresso há EXCLUSAO_RETOMAR_APOS segundos. Cada uma é
+        reivindicada com find_one_and_update (renova `atualizada_em`), então só um processo a retoma.
+        """
+        retomadas = 0
+        while True:
+            agora = datetime.now().timestamp()
+            tarefa = self.tarefas.find_one_and_update(
+                {"tipo": "exclusao_pessoa", "estado": {"$in": ESTADOS_ATIVOS},
+                 "atualizada_em": {"$lt": agora - EXCLUSAO_RETOMAR_APOS},
+                 "_id": {"$nin": list(self._agendadas)}},  # as deste processo ainda estão na fila
+                {"$set": {"atualizada_em": agora}, "$inc": {"retomadas": 1}},
+            )
+            if tarefa is None:
+                return retomadas
+            logger.warning(f"⚠️ Retomando a exclusão da pessoa {tarefa['pessoa']} (tarefa {tarefa['_id']}, "
+                           f"parada em '{tarefa['estado']}')")
+            self._submeter(tarefa["_id"], tarefa["pessoa"])
+            retomadas += 1
+
+    def _submeter(self, tarefa_id: str, pessoa: str):
+        self._agendadas.add(tarefa_id)
+        self._executor.submit(self._executar, tarefa_id, pessoa)
+
+    def _atualizar(self, tarefa_id: str, definir: dict = None, incrementar: dict = None):
+        atualizacao = {"$set": {**(definir or {}), "atualizada_em": datetime.now().timestamp()}}
+        if incrementar:
+            atualizacao["$inc"] = incrementar
+        self.tarefas.update_one({"_id": tarefa_id}, atualizacao)
+
+    def _executar(self, tarefa_id: str, pessoa: str):
+        try:
+            self._atualizar(tarefa_id, {"estado": "presencas"})
+            fotos_fora_do_prefixo = self._excluir_presencas(tarefa_id, pessoa)
+            remover_pessoa(self.db, pessoa)
+
+            self._atualizar(tarefa_id, {"estado": "imagens"})
+            prefixo = f"{pessoa}/"
+            objetos = (o.object_name for o in self.minio_client.list_objects(self.bucket, prefix=prefixo, recursive=True))
+            self._remover_objetos(tarefa_id, objetos)
+            self._remover_objetos(tarefa_id, iter(fotos_fora_do_prefixo))
+
+            self._atualizar(tarefa_id, {"estado": "concluida", "concluida_em": datetime.now().timestamp()})
+            logger.info(f"🗑️ Pessoa {pessoa} excluída (tarefa {tarefa_id})")
+        except Exception as e:
+            logger.error(f"❌ Erro na exclusão da pessoa {pessoa} (tarefa {tarefa_id}): {e}")
+            self._atualizar(tarefa_id, {"estado": "erro", "erro": str(e)})
+        finally:
+            self._agendadas.discard(tarefa_id)
+
+    def _excluir_presencas(self, tarefa_id: str, pessoa: str) -> set:
+        """Exclui/arquiva as presenças em lotes; retorna as fotos que não estão sob `{pessoa}/`."""
+        presencas = self.db["presencas"]
+        prefixo = f"{pessoa}/"
+        fotos = set()
+        campos = None if EXCLUSAO_PRESENCAS == "arquivar" else CAMPOS_DESCONTO
+        cursor = presencas.find({"pessoa": pessoa}, campos, batch_size=EXCLUSAO_LOTE_PRESENCAS)
+        for lote in _lotes(cursor, EXCLUSAO_LOTE_PRESENCAS):
+            ids = [p["_id"] for p in lote]
+            # Arquivo e frames antes da exclusão: se a tarefa for retomada, o lote é encontrado de novo
+            if EXCLUSAO_PRESENCAS == "arquivar":
+                self.db[PRESENCAS_ARQUIVADAS].bulk_write(
+                    [ReplaceOne({"_id": p["_id"]}, p, upsert=True) for p in lote], ordered=False)
+            remover_presencas_dos_frames(self.db, ids)
+            presencas.delete_many({"_id": {"$in": ids}})
+            descontar_presencas(self.db, lote)
+            fotos.update(
+                p["foto_captura"].replace("\\", "/") for p in lote
+                if p.get("foto_captura") and not p["foto_captura"].replace("\\", "/").startswith(prefixo)
+            )
+            self._atualizar(tarefa_id, incrementar={"presencas_removidas": len(lote)})
+            self.presencas_removidas.inc(len(lote))
+        return fotos
+
+    def _remover_objetos(self, tarefa_id: str, nomes):
+        for lote in _lotes(nomes, EXCLUSAO_LOTE_MINIO):
+            # remove_objects é preguiçoso: os erros só aparecem (e a exclusão só ocorre) ao iterar
+            erros = list(self.minio_client.remove_objects(self.bucket, [DeleteObject(nome) for nome in lote]))
+            for erro in erros:
+                logger.error(f"❌ Erro ao remover {erro.name} do MinIO: {erro.message}")
+            self._atualizar(tarefa_id, incrementar={"imagens_removidas": len(lote) - len(erros), "erros_minio": len(erros)})
+            self.imagens_removidas.inc(len(lote) - len(erros))
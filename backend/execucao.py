@@ -0,0 +1,21 @@
+"""
+Execução de chamadas bloqueantes (pymongo, MinIO, hashing de senha) fora do event loop.
+
+As chamadas vão para um pool de threads limitado (MONGO_THREADS); assim uma consulta
+lenta ocupa uma thread do pool, mas não trava o loop do uvicorn nem as demais rotas.
+O pool deve ser no máximo do tamanho do pool de conexões do MongoClient (MONGO_POOL_MAX).
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+MONGO_THREADS = int(os.getenv("MONGO_THREADS", 32))
+
+executor_bloqueante = ThreadPoolExecutor(max_workers=MONGO_THREADS, thread_name_prefix="bloqueante")
+
+
+async def em_thread(funcao, *args, **kwargs):
+    """Executa `funcao(*args, **kwargs)` no pool de threads e aguarda o resultado."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor_bloqueante, partial(funcao, *args, **kwargs))
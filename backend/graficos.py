@@ -0,0 +1,123 @@
+"""
+Gráficos por tag_video (detecções e reconhecimentos por frame) renderizados em
+segundo plano e guardados em disco.
+
+Cada par de PNGs é identificado por (tag_video, total de frames, total de
+reconhecimentos), ambos vindos de estatisticas_video: os reconhecimentos chegam
+depois do frame e mudam o gráfico sem mudar o total de frames. Enquanto nenhum dos
+totais muda o arquivo existente é reaproveitado; quando um deles muda, um novo par
+é agendado e, até ficar pronto, a versão anterior continua sendo servida.
+"""
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("server")
+
+
+def _nome_seguro(tag_video: str) -> str:
+    return re.sub(r"[^\w.-]", "_", tag_video or "sem_tag")
+
+
+class GeradorGraficos:
+    """Agenda e reaproveita os gráficos; a renderização nunca roda no caminho da requisição."""
+
+    def __init__(self, frames, pasta: str, url_base: str = "/static/plots"):
+        self.frames = frames
+        self.pasta = pasta
+        self.url_base = url_base
+        os.makedirs(pasta, exist_ok=True)
+        # Um único worker: a renderização é CPU-bound e não deve competir com a API
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="graficos")
+        self._agendados = set()
+        self._lock = threading.Lock()
+
+    def _arquivos(self, tag_video: str, total_frames: int, total_reconhecidos: int):
+        base = f"{_nome_seguro(tag_video)}_{total_frames}_{total_reconhecidos}"
+        return f"{base}_detectados.png", f"{base}_reconhecidos.png"
+
+    def _urls(self, arquivos):
+        return tuple(f"{self.url_base}/{nome}" for nome in arquivos)
+
+    def _totais_renderizados(self, tag_video: str) -> list:
+        """(total de frames, total de reconhecimentos) dos PNGs já gravados para a tag."""
+        padrao = re.compile(rf"^{re.escape(_nome_seguro(tag_video))}_(\d+)_(\d+)_reconhecidos\.png$")
+        totais = []
+        for nome in os.listdir(self.pasta):
+            encontrado = padrao.match(nome)
+            if encontrado:
+                totais.append((int(encontrado.group(1)), int(encontrado.group(2))))
+        return totais
+
+    def _mais_recentes(self, tag_video: str):
+        """Par já renderizado com os maiores totais para a tag (ou None)."""
+        totais = self._totais_renderizados(tag_video)
+        if not totais:
+            return None
+        return self._urls(self._arquivos(tag_video, *max(totais)))
+
+    def obter(self, tag_video: str, total_frames: int, total_reconhecidos: int):
+        """
+        Retorna (url_detectados, url_reconhecidos) do par atual; se ainda não existe,
+        agenda a renderização e devolve o par anterior (ou (None, None)).
+        """
+        arquivos = self._arquivos(tag_video, total_frames, total_reconhecidos)
+        if all(os.path.exists(os.path.join(self.pasta, nome)) for nome in arquivos):
+            return self._urls(arquivos)
+
+        chave = (tag_video, total_frames, total_reconhecidos)
+        with self._lock:
+            if chave not in self._agendados:
+                self._agendados.add(chave)
+                self._executor.submit(self._renderizar, *chave)
+        return self._mais_recentes(tag_video) or (None, None)
+
+    def _renderizar(self, tag_video: str, total_frames: int, total_reconhecidos: int):
+        try:
+            # Figure direto (sem pyplot): não depende de estado global nem de backend interativo
+            from matplotlib.figure import Figure
+
+            dados = list(self.frames.find(
+                {"tag_video": tag_video},
+                {"_id": 0, "numero_frame": 1, "total_faces_detectadas": 1, "total_faces_reconhecidas": 1}
+            ).sort("numero_frame", 1))
+            numeros = [d.get("numero_frame") for d in dados]
+            series = (
+                ([d.get("total_faces_detectadas", 0) for d in dados], "Detecções", "Pessoas Detectadas", None),
+                ([d.get("total_faces_reconhecidas", 0) for d in dados], "Reconhecimentos", "Pessoas Reconhecidas", "green"),
+            )
+
+            arquivos = self._arquivos(tag_video, total_frames, total_reconhecidos)
+            for nome, (valores, titulo, rotulo_y, cor) in zip(arquivos, series):
+                figura = Figure()
+                eixo = figura.subplots()
+                eixo.plot(numeros, valores, marker="o", color=cor)
+                eixo.set_title(f"{titulo} - {tag_video}")
+                eixo.set_xlabel("Número do Frame")
+                eixo.set_ylabel(rotulo_y)
+                eixo.grid(True)
+                # Grava em arquivo temporário e renomeia: nunca se serve um PNG pela metade
+                destino = os.path.join(self.pasta, nome)
+                figura.savefig(destino + ".tmp", format="png")
+                os.replace(destino + ".tmp", destino)
+
+            self._remover_antigos(tag_video, (total_frames, total_reconhecidos))
+            logger.info(f"Gráficos de '{tag_video}' renderizados ({total_frames} frames, {total_reconhecidos} reconhecimentos)")
+        except Exception as e:
+            logger.error(f"Erro ao renderizar gráficos de '{tag_video}': {e}")
+        finally:
+            with self._lock:
+                self._agendados.discard((tag_video, total_frames, total_reconhecidos))
+
+    def _remover_antigos(self, tag_video: str, totais_atuais: tuple):
+        # Qualquer outro par está desatualizado (os reconhecimentos também diminuem em exclusões)
+        for totais in self._totais_renderizados(tag_video):
+            if totais == totais_atuais:
+                continue
+            for nome in self._arquivos(tag_video, *totais):
+                try:
+                    os.remove(os.path.join(self.pasta, nome))
+                except OSError:
+                    pass
@@ -0,0 +1,166 @@
+"""
+Ingestão de faces já detectadas no navegador (POST /frame).
+
+As faces recortadas pelo MediaPipe do frontend vão direto para o bucket de detecções
+e para a fila `deteccoes` (a mesma saída do worker de detecção), sem nova detecção no
+servidor. Os uploads ao MinIO são concorrentes (pool de execucao.em_thread) e as
+publicações usam o `Publicador` com confirms.
+
+Contrapressão: se a fila `deteccoes` passar de FRAME_FILA_MAX mensagens prontas, ou se
+houver mais de FRAME_MAX_EM_VOO faces sendo gravadas/publicadas por este processo,
+a requisição é recusada com `FilaCheia` (HTTP 429 + Retry-After).
+"""
+import asyncio
+import base64
+import binascii
+import os
+import time
+import uuid
+from datetime import datetime
+from io import BytesIO
+
+from comum import metricas
+from execucao import em_thread
+
+FILA_DETECCOES = "deteccoes"
+FRAME_FILA_MAX = int(os.getenv("FRAME_FILA_MAX", 2000))
+FRAME_FILA_INTERVALO = float(os.getenv("FRAME_FILA_INTERVALO", 0.5))  # segundos entre consultas da profundidade
+FRAME_MAX_EM_VOO = int(os.getenv("FRAME_MAX_EM_VOO", 256))
+FRAME_MAX_FACES = int(os.getenv("FRAME_MAX_FACES", 32))  # por requisição
+FRAME_MAX_BYTES = int(os.getenv("FRAME_MAX_BYTES", 2 * 1024 * 1024))  # por face
+FRAME_RETRY_AFTER = int(os.getenv("FRAME_RETRY_AFTER", 1))
+
+# assinatura -> (extensão, content-type)
+_FORMATOS = [
+    (b"\x89PNG", ("png", "image/png")),
+    (b"\xff\xd8", ("jpg", "image/jpeg")),
+    (b"RIFF", ("webp", "image/webp")),
+]
+
+
+class FilaCheia(Exception):
+    pass
+
+
+class FacesInvalidas(ValueError):
+    pass
+
+
+def _formato(dados: bytes):
+    for assinatura, formato in _FORMATOS:
+        if dados.startswith(assinatura) and (assinatura != b"RIFF" or dados[8:12] == b"WEBP"):
+            return formato
+    raise FacesInvalidas("formato de imagem não suportado (use PNG, JPEG ou WEBP)")
+
+
+def decodificar_base64(texto: str) -> bytes:
+    """Decodifica a imagem em base64, aceitando também data URLs ("data:image/png;base64,...")."""
+    if texto.startswith("data:"):
+        texto = texto.split(",", 1)[-1]
+    try:
+        return base64.b64decode(texto, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise FacesInvalidas(f"base64 inválido: {e}")
+
+
+class IngestaoFaces:
+    """Grava faces recebidas do navegador no MinIO e as publica na fila de detecções."""
+
+    def __init__(self, minio_client, bucket: str, publicador):
+        self.minio_client = minio_client
+        self.bucket = bucket
+        self.publicador = publicador
+        self._em_voo = 0
+        self._profundidade = (0, 0.0)  # (mensagens prontas, momento da consulta)
+        self._bucket_verificado = False
+
+        self.aceitas = metricas.contador("frame_faces_aceitas_total", "Faces do navegador gravadas e publicadas")
+        self.recusadas = metricas.contador("frame_requisicoes_recusadas_total", "Requisições de /frame recusadas (429)")
+        self.fila = metricas.medidor("frame_fila_deteccoes", "Mensagens prontas na fila deteccoes (última consulta)")
+        self.latencia = metricas.histograma("frame_ingestao_segundos", "Tempo para gravar e publicar as faces de um frame")
+
+    async def _profundidade_fila(self) -> int:
+        profundidade, consultada_em = self._profundidade
+        if time.monotonic() - consultada_em < FRAME_FILA_INTERVALO:
+            return profundidade
+        try:
+            profundidade, _ = await asyncio.wrap_future(self.publicador.estado_fila(FILA_DETECCOES))
+        except Exception:
+            # fila ainda não declarada ou broker indisponível: a publicação decide
+            profundidade = 0
+        self._profundidade = (profundidade, time.monotonic())
+        self.fila.set(profundidade)
+        return profundidade
+
+    async def verificar_capacidade(self, quantidade: int):
+        """Levanta `FilaCheia` se a fila ou o número de faces em andamento estiverem no limite."""
+        if self._em_voo + quantidade > FRAME_MAX_EM_VOO or await self._profundidade_fila() >= FRAME_FILA_MAX:
+            self.recusadas.inc()
+            raise FilaCheia(f"fila '{FILA_DETECCOES}' cheia; tente novamente em {FRAME_RETRY_AFTER}s")
+
+    def _gravar(self, caminho: str, dados: bytes, content_type: str):
+        if not self._bucket_verificado:
+            if not self.minio_client.bucket_exists(self.bucket):
+                self.minio_client.make_bucket(self.bucket)
+            self._bucket_verificado = True
+        self.minio_client.put_object(self.bucket, caminho, BytesIO(dados), len(dados), content_type=content_type)
+
+    async def ingerir(self, faces: list, timestamp: int = None, tag_video: str = "navegador") -> dict:
+        """
+        Grava e publica as faces (bytes) de um mesmo frame; retorna frame_uuid e caminhos.
+        `timestamp` é o instante da captura no navegador, em milissegundos.
+        """
+        if not faces:
+            raise FacesInvalidas("nenhuma face enviada")
+        if len(faces) > FRAME_MAX_FACES:
+            raise FacesInvalidas(f"no máximo {FRAME_MAX_FACES} faces por frame")
+        formatos = []
+        for dados in faces:
+            if len(dados) > FRAME_MAX_BYTES:
+                raise FacesInvalidas(f"face maior que {FRAME_MAX_BYTES} bytes")
+            formatos.append(_formato(dados))
+
+        await self.verificar_capacidade(len(faces))
+        self._em_voo += len(faces)
+        inicio = time.perf_counter()
+        try:
+            recebido = datetime.now()
+            if timestamp is None:
+                timestamp = int(recebido.timestamp() * 1000)
+            data = recebido.strftime("%d-%m-%Y")
+            frame_uuid = str(uuid.uuid4())
+            caminhos = [f"{data}/navegador_{frame_uuid}_{i}.{ext}" for i, (ext, _) in enumerate(formatos)]
+
+            # Uploads concorrentes; a publicação só ocorre com todas as faces no MinIO
+            await asyncio.gather(*(
+                em_thread(self._gravar, caminho, dados, content_type)
+                for caminho, dados, (_, content_type) in zip(caminhos, faces, formatos)
+            ))
+
+            agora = datetime.now().timestamp()
+            confirmacoes = [
+                asyncio.wrap_future(self.publicador.publicar(FILA_DETECCOES, {
+                    "data_captura_frame": data,
+                    "minio_path": caminho,
+                    "inicio_processamento": recebido.timestamp(),
+                    "tempo_captura_frame": 0,
+                    "tempo_deteccao": 0,
+                    "tag_video": tag_video,
+                    "timestamp": str(timestamp),
+                    "frame_uuid": frame_uuid,
+                    "frame_total_faces": len(caminhos),
+                    "fps": None,
+                    "duracao": None,
+                    "numero_frame": None,
+                    "tempo_espera_captura_deteccao": agora - recebido.timestamp(),
+                    "inicio_deteccao": agora,
+                    "fim_deteccao": agora,
+                }))
+                for caminho in caminhos
+            ]
+            await asyncio.gather(*confirmacoes)
+            self.aceitas.inc(len(caminhos))
+            return {"frame_uuid": frame_uuid, "faces": caminhos}
+        finally:
+            self._em_voo -= len(faces)
+            self.latencia.observe(time.perf_counter() - inicio)
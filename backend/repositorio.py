@@ -0,0 +1,85 @@
+"""
+Acesso à coleção `pessoas` com projeções explícitas por caso de uso.
+
+Os documentos de pessoa carregam `embeddings` (podem passar de megabytes por pessoa);
+nenhuma consulta daqui traz esse campo. Contagens e recortes de `image_paths` são
+feitos no servidor com $size/$slice.
+"""
+from pymongo import ReturnDocument
+
+# uuid e tags (listagens)
+PROJECAO_LISTAGEM = {"_id": 0, "uuid": 1, "tags": 1}
+# uuid, tags e apenas o primeiro caminho de foto (cartões, presentes, tags)
+PROJECAO_RESUMO = {"_id": 0, "uuid": 1, "tags": 1, "image_paths": {"$slice": 1}}
+
+
+def _fotos(campo: str = "$image_paths") -> dict:
+    return {"$ifNull": [campo, []]}
+
+
+class RepositorioPessoas:
+    """Consultas do backend à coleção `pessoas`; nunca retornam `embeddings`."""
+
+    def __init__(self, colecao):
+        self.colecao = colecao
+
+    def listar(self, filtro: dict, skip: int, limit: int, ordem: str = "uuid") -> list:
+        return list(self.colecao.find(filtro, PROJECAO_LISTAGEM).sort(ordem, 1).skip(skip).limit(limit))
+
+    def resumo(self, uuid: str):
+        return self.colecao.find_one({"uuid": uuid}, PROJECAO_RESUMO)
+
+    def resumos(self, uuids: list) -> list:
+        return list(self.colecao.find({"uuid": {"$in": list(uuids)}}, PROJECAO_RESUMO))
+
+    def detalhes(self, uuids: list) -> list:
+        """uuid, tags, primeira foto e quantidade de fotos ($size) de cada pessoa, em uma agregação."""
+        return list(self.colecao.aggregate([
+            {"$match": {"uuid": {"$in": list(uuids)}}},
+            {"$project": {
+                "_id": 0,
+                "uuid": 1,
+                "tags": 1,
+                "primeira_foto": {"$arrayElemAt": [_fotos(), 0]},
+                "photo_count": {"$size": _fotos()},
+            }},
+        ]))
+
+    def pagina_fotos(self, uuid: str, skip: int, limit: int):
+        """{"total", "image_paths"} com apenas a página pedida de image_paths (ou None)."""
+        resultado = list(self.colecao.aggregate([
+            {"$match": {"uuid": uuid}},
+            {"$limit": 1},
+            {"$project": {
+                "_id": 0,
+                "total": {"$size": _fotos()},
+                "image_paths": {"$slice": [_fotos(), skip, limit]},
+            }},
+        ]))
+        return resultado[0] if resultado else None
+
+    def contar_fotos(self, uuid: str):
+        """Quantidade de fotos calculada no servidor ($size), ou None se a pessoa não existe."""
+        resultado = list(self.colecao.aggregate([
+            {"$match": {"uuid": uuid}},
+            {"$limit": 1},
+            {"$project": {"_id": 0, "total": {"$size": _fotos()}}},
+        ]))
+        return resultado[0]["total"] if resultado else None
+
+    def adicionar_tag(self, uuid: str, tag: str):
+        """Adiciona a tag e devolve o resumo atualizado (None se a pessoa não existe)."""
+        return self.colecao.find_one_and_update(
+            {"uuid": uuid}, {"$push": {"tags": tag}},
+            projection=PROJECAO_RESUMO, return_document=ReturnDocument.AFTER
+        )
+
+    def remover_tag(self, uuid: str, tag: str):
+        """Remove a tag e devolve o resumo atualizado (None se a pessoa não existe)."""
+        return self.colecao.find_one_and_update(
+            {"uuid": uuid}, {"$pull": {"tags": tag}},
+            projection=PROJECAO_RESUMO, return_document=ReturnDocument.AFTER
+        )
+
+    def remover(self, uuid: str):
+        return self.colecao.delete_one({"uuid": uuid})
@@ -0,0 +1,84 @@
+"""
+Séries temporais dos frames (numero_frame x faces detectadas/reconhecidas) com
+redução de pontos no servidor, para gráficos interativos no frontend.
+
+Métodos:
+  - "lttb":   Largest-Triangle-Three-Buckets (preserva a forma visual da série);
+  - "minmax": mínimo e máximo de cada bucket (preserva picos e vales).
+"""
+import numpy as np
+
+METODOS = ("lttb", "minmax")
+
+
+def ler_serie(frames, tag_video: str, batch_size: int = 10000):
+    """Lê apenas os campos necessários da tag, em ordem de numero_frame, para arrays NumPy."""
+    cursor = frames.find(
+        {"tag_video": tag_video, "numero_frame": {"$ne": None}},
+        {"_id": 0, "numero_frame": 1, "total_faces_detectadas": 1, "total_faces_reconhecidas": 1}
+    ).sort("numero_frame", 1).batch_size(batch_size)
+
+    numeros, detectados, reconhecidos = [], [], []
+    for doc in cursor:
+        numeros.append(doc["numero_frame"])
+        detectados.append(doc.get("total_faces_detectadas") or 0)
+        reconhecidos.append(doc.get("total_faces_reconhecidas") or 0)
+    return (
+        np.asarray(numeros, dtype=np.float64),
+        np.asarray(detectados, dtype=np.float64),
+        np.asarray(reconhecidos, dtype=np.float64),
+    )
+
+
+def lttb(x: np.ndarray, y: np.ndarray, pontos: int) -> np.ndarray:
+    """Índices escolhidos pelo LTTB (sempre inclui o primeiro e o último ponto)."""
+    total = len(x)
+    if pontos >= total or total <= 2:
+        return np.arange(total)
+    if pontos < 3:
+        return np.array([0, total - 1])
+
+    # Buckets internos (o primeiro e o último ponto ficam de fora)
+    limites = np.linspace(1, total - 1, pontos - 1).astype(np.int64)
+    indices = np.empty(pontos, dtype=np.int64)
+    indices[0] = 0
+    anterior = 0
+    for i in range(pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        # Média do bucket seguinte (no último bucket, o último ponto)
+        if i + 2 < len(limites):
+            proximo = slice(limites[i + 1], limites[i + 2])
+            media_x, media_y = x[proximo].mean(), y[proximo].mean()
+        else:
+            media_x, media_y = x[-1], y[-1]
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    indices[-1] = total - 1
+    return indices
+
+
+def minmax(y: np.ndarray, pontos: int) -> np.ndarray:
+    """Índices do mínimo e do máximo de cada bucket (pontos/2 buckets), em ordem."""
+    total = len(y)
+    if pontos >= total:
+        return np.arange(total)
+    buckets = max(1, pontos // 2)
+    limites = np.linspace(0, total, buckets + 1).astype(np.int64)
+    indices = []
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        if fim <= inicio:
+            continue
+        trecho = y[inicio:fim]
+        indices.append(inicio + int(np.argmin(trecho)))
+        indices.append(inicio + int(np.argmax(trecho)))
+    return np.unique(np.asarray(indices, dtype=np.int64))
+
+
+def reduzir(x: np.ndarray, y: np.ndarray, pontos: int, metodo: str = "lttb") -> dict:
+    """Reduz a série (x, y) a no máximo `pontos` pontos."""
+    indices = lttb(x, y, pontos) if metodo == "lttb" else minmax(y, pontos)
+    return {"x": x[indices].astype(int).tolist(), "y": y[indices].astype(int).tolist()}
@@ -1,30 +1,42 @@
-import datetime
+import asyncio
 from bson import ObjectId
-from fastapi import FastAPI, Body, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from deepface import DeepFace
 import uuid
 import os
-import base64
-import io
-from PIL import Image
+import time
 from pymongo import MongoClient
-import shutil
 from typing import List, Optional
 from datetime import datetime, timedelta
 from minio import Minio
 import logging
-from io import BytesIO
 from dotenv import load_dotenv
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import Optional
-from passlib.context import CryptContext
-import matplotlib.pyplot as plt
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from comum import metricas
+from comum.agregados import descontar_presenca, ler_estatisticas, ler_presentes, versao_filtro
+from comum.esquema import ORDEM_PRESENCAS, garantir_indices
+from comum.eventos import EXCHANGE_PRESENCAS
+from comum.exportacao import ExportacaoInvalida, preparar as preparar_exportacao
+from comum.frames import remover_presencas_dos_frames
+from comum.miniaturas import caminho_miniatura
+from comum.publicador import Publicador
+from cursores import CursorInvalido, codificar, decodificar
+from exclusoes import ExclusaoPessoas
+from execucao import MONGO_THREADS, em_thread
+from graficos import GeradorGraficos
+from ingestao import FILA_DETECCOES, FRAME_RETRY_AFTER, FacesInvalidas, FilaCheia, IngestaoFaces, decodificar_base64
+from repositorio import RepositorioPessoas
+from sessoes import CacheSessoes
+from transmissao import TransmissorPresencas
+from urls_assinadas import AssinadorURLs
 
 
 # ----------------------------
@@ -37,6 +49,14 @@ MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT")
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
 MINIO_BUCKET = os.getenv("MINIO_BUCKET")
+MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+PRESIGN_EXPIRACAO = int(os.getenv("PRESIGN_EXPIRACAO", 600))
+PRESIGN_MARGEM = int(os.getenv("PRESIGN_MARGEM", 60))  # renova a URL este tanto de segundos antes de expirar
+PRESIGN_CACHE_MAX = int(os.getenv("PRESIGN_CACHE_MAX", 50000))
+
+# Bucket das faces detectadas (lido pelo worker de reconhecimento)
+DETECCOES_BUCKET = os.getenv("DETECCOES_BUCKET") or os.getenv("BUCKET_DETECCOES")
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "localhost")
 
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME")
@@ -44,6 +64,10 @@ MONGO_DB_NAME = os.getenv("MONGO_DB_NAME")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+# Usuários desativados ou alterados por fora do backend (direto no MongoDB ou por outro
+# processo uvicorn) continuam aceitos por até AUTH_CACHE_TTL segundos; o backend invalida os seus
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 10))
+AUTH_CACHE_MAX = int(os.getenv("AUTH_CACHE_MAX", 10000))
 
 # ----------------------------
 # Configuração de Logs
@@ -57,12 +81,25 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 # ----------------------------
 # Conexão com MongoDB
 # ----------------------------
-client = MongoClient(MONGO_URI)
+# Pool de conexões dimensionado para o pool de threads de execucao.em_thread
+MONGO_POOL_MAX = int(os.getenv("MONGO_POOL_MAX", max(50, MONGO_THREADS)))
+MONGO_POOL_MIN = int(os.getenv("MONGO_POOL_MIN", 5))
+MONGO_POOL_ESPERA_MS = int(os.getenv("MONGO_POOL_ESPERA_MS", 5000))
+
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_POOL_MAX,
+    minPoolSize=MONGO_POOL_MIN,
+    maxIdleTimeMS=60000,
+    waitQueueTimeoutMS=MONGO_POOL_ESPERA_MS,
+    serverSelectionTimeoutMS=5000,
+)
 db = client[MONGO_DB_NAME]
 pessoas = db["pessoas"]
 presencas = db["presencas"]
 users = db["users"]
 frames = db["frames"]
+repositorio_pessoas = RepositorioPessoas(pessoas)
 
 # ----------------------------
 # Configuração do MinIO
@@ -74,12 +111,43 @@ minio_client = Minio(
     secure=False
 )
 
+# URLs pré-assinadas com cache TTL e chave de assinatura reaproveitada
+assinador = AssinadorURLs(
+    MINIO_ENDPOINT,
+    MINIO_ACCESS_KEY,
+    MINIO_SECRET_KEY,
+    MINIO_BUCKET,
+    regiao=MINIO_REGION,
+    seguro=False,
+    expiracao=PRESIGN_EXPIRACAO,
+    margem=PRESIGN_MARGEM,
+    cache_max=PRESIGN_CACHE_MAX,
+)
+
+# Exclusão de pessoas (presenças e imagens) em segundo plano
+exclusoes = ExclusaoPessoas(db, minio_client, MINIO_BUCKET)
+
+# ----------------------------
+# Ingestão de faces do navegador (/frame)
+# ----------------------------
+publicador = Publicador(f"amqp://{RABBITMQ_HOST}/", filas=[FILA_DETECCOES], nome="backend")
+ingestao = IngestaoFaces(minio_client, DETECCOES_BUCKET, publicador)
+
 # ----------------------------
 # Directorio Temporario
 # ----------------------------
 IMAGES_DIR = os.getenv("IMAGES_DIR")
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
+# Totais de /presencas em cache por filtro: valem por PRESENCAS_CACHE_TTL segundos e, depois
+# disso, enquanto os agregados do próprio filtro (tag_video/data) não mudarem
+PRESENCAS_CACHE_MAX = int(os.getenv("PRESENCAS_CACHE_MAX", 256))
+PRESENCAS_CACHE_TTL = float(os.getenv("PRESENCAS_CACHE_TTL", 5))
+# Máximo de pessoas por chamada de POST /pessoas/batch
+PESSOAS_BATCH_MAX = int(os.getenv("PESSOAS_BATCH_MAX", 100))
+# Maior `limit` aceito pelas listagens paginadas (valores fora de 1..PAGINA_MAX recebem 422)
+PAGINA_MAX = int(os.getenv("PAGINA_MAX", 500))
+
 
 # ----------------------------
 # FastAPI App and Middleware
@@ -94,9 +162,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def criar_indices():
+    """Índices criados na subida do servidor (e não na importação do módulo)."""
+    await em_thread(garantir_indices, db)
+
+@app.on_event("startup")
+async def retomar_exclusoes():
+    """Retoma, agora e periodicamente, exclusões de pessoas interrompidas (queda do processo)."""
+    exclusoes.iniciar_retomada()
+
 # Serve the images directory as static files
 app.mount("/static", StaticFiles(directory=IMAGES_DIR), name="static")
 
+# Gráficos por tag_video, renderizados em segundo plano em IMAGES_DIR/plots
+gerador_graficos = GeradorGraficos(frames, os.path.join(IMAGES_DIR, "plots"))
+
 # ----------------------------
 # Pydantic Models
 # ----------------------------
@@ -106,6 +187,10 @@ class ImagePayload(BaseModel):
 class TagPayload(BaseModel):
     tag: str
 
+class PessoasBatchPayload(BaseModel):
+    uuids: List[str]
+    miniaturas: bool = False
+
 class FaceItem(BaseModel):
     image: str  # Base64 da imagem
     timestamp: int  # Timestamp enviado pelo frontend (em milissegundos)
@@ -135,6 +220,14 @@ class UserInDB(User):
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Tokens decodificados e usuários autenticados (sem a senha), para não consultar `users` a cada requisição
+cache_sessoes = CacheSessoes(ttl=AUTH_CACHE_TTL, maximo=AUTH_CACHE_MAX)
+PROJECAO_USUARIO = {"_id": 0, "username": 1, "email": 1, "full_name": 1, "disabled": 1}
+
+def usuario_alterado(username: str):
+    """Chamada por todo caminho que grava em `users`: a próxima requisição relê o usuário do MongoDB."""
+    cache_sessoes.invalidar(username)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -147,7 +240,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # jti identifica o token (chave do cache de sessões junto com o username)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -157,68 +251,41 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    sessao = cache_sessoes.token(token)
+    if sessao is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            token_data = TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = users.find_one({"username": token_data.username})
+        sessao = (token_data.username, payload.get("jti"), payload.get("exp"))
+        cache_sessoes.guardar_token(token, *sessao)
+    username, jti, exp = sessao
+
+    user = cache_sessoes.usuario(username, jti)
     if user is None:
-        raise credentials_exception
-    return UserInDB(**user)
+        documento = await em_thread(users.find_one, {"username": username}, PROJECAO_USUARIO)
+        if documento is None:
+            raise credentials_exception
+        user = User(**documento)
+        cache_sessoes.guardar_usuario(username, jti, user, exp)
+    return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-# ----------------------------
-# Grafico de Presença
-# ----------------------------
-
-def gerar_graficos_para_tag(tag_video: str, dados: list[dict], pasta_saida="static/plots"):
-    if not os.path.exists(pasta_saida):
-        os.makedirs(pasta_saida)
-
-    numeros = [d["numero_frame"] for d in dados]
-    detectados = [d["total_faces_detectadas"] for d in dados]
-    reconhecidos = [d["total_faces_reconhecidas"] for d in dados]
-
-    # Gráfico 1 - Detecção
-    plt.figure()
-    plt.plot(numeros, detectados, marker="o")
-    plt.title(f"Detecções - {tag_video}")
-    plt.xlabel("Número do Frame")
-    plt.ylabel("Pessoas Detectadas")
-    plt.grid(True)
-    path_detectados = os.path.join(pasta_saida, f"{tag_video}_detectados.png")
-    plt.savefig(path_detectados)
-    plt.close()
-
-    # Gráfico 2 - Reconhecimento
-    plt.figure()
-    plt.plot(numeros, reconhecidos, marker="o", color="green")
-    plt.title(f"Reconhecimentos - {tag_video}")
-    plt.xlabel("Número do Frame")
-    plt.ylabel("Pessoas Reconhecidas")
-    plt.grid(True)
-    path_reconhecidos = os.path.join(pasta_saida, f"{tag_video}_reconhecidos.png")
-    plt.savefig(path_reconhecidos)
-    plt.close()
-
-    # Retorna os caminhos relativos
-    return f"/static/plots/{tag_video}_detectados.png", f"/static/plots/{tag_video}_reconhecidos.png"
-
 # ----------------------------
 # Endpoints de Autenticação
 # ----------------------------
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = users.find_one({"username": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    user = await em_thread(users.find_one, {"username": form_data.username})
+    if not user or not await em_thread(verify_password, form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
@@ -232,75 +299,170 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
 @app.post("/users/", response_model=User)
 async def create_user(user: UserInDB):
-    user.hashed_password = get_password_hash(user.hashed_password)
-    users.insert_one(user.dict())
+    user.hashed_password = await em_thread(get_password_hash, user.hashed_password)
+    await em_thread(users.insert_one, user.dict())
+    usuario_alterado(user.username)
     return user
 
 # ----------------------------
 # Função para obter a URL da imagem no MinIO
 # ----------------------------
-from datetime import timedelta
-
-import os
-from datetime import timedelta
-
-def get_presigned_url(object_name: str, expiration: int = 600) -> str:
+def normalizar_caminho(object_name: str) -> str:
+    # Normaliza o caminho para usar '/' e remove prefixos desnecessários como 'data/faces/'
+    normalized_path = object_name.replace("\\", "/")
+    if normalized_path.startswith("data/faces/"):
+        normalized_path = normalized_path[len("data/faces/"):]
+    return normalized_path
+
+def get_presigned_urls(object_names: list, miniaturas: bool = False) -> list:
     """
-    Gera uma URL assinada (presigned URL) para acessar um arquivo no MinIO.
-    A URL expira após `expiration` segundos (padrão: 10 minutos).
+    Gera (ou reaproveita do cache) URLs assinadas para vários arquivos no MinIO de uma vez.
+    Com `miniaturas=True` as URLs apontam para as miniaturas (comum.miniaturas).
+    Itens vazios resultam em None. As URLs expiram após PRESIGN_EXPIRACAO segundos.
     """
+    caminhos = [normalizar_caminho(nome) for nome in object_names if nome]
+    if miniaturas:
+        caminhos = [caminho_miniatura(caminho) for caminho in caminhos]
     try:
-        # Normaliza o caminho para usar '/'
-        normalized_path = object_name.replace("\\", "/")
-
-        # Remove prefixos desnecessários como 'data/faces/'
-        if normalized_path.startswith("data/faces/"):
-            normalized_path = normalized_path[len("data/faces/"):]
-
-        url = minio_client.presigned_get_object(
-            MINIO_BUCKET, 
-            normalized_path, 
-            expires=timedelta(seconds=expiration)  # Converte para timedelta
-        )
-        return url
+        urls = iter(assinador.urls(caminhos))
     except Exception as e:
         logger.error(f"Erro ao gerar presigned URL: {e}")
-        return None
+        return [None] * len(object_names)
+    return [next(urls) if nome else None for nome in object_names]
+
+def get_presigned_url(object_name: str, miniatura: bool = False) -> str:
+    """
+    Gera uma URL assinada (presigned URL) para acessar um arquivo no MinIO.
+    A URL expira após PRESIGN_EXPIRACAO segundos (padrão: 10 minutos).
+    """
+    return get_presigned_urls([object_name], miniaturas=miniatura)[0]
 
 # ----------------------------
 # Endpoints Protegidos
 # ----------------------------
 
+@app.post("/frame", dependencies=[Depends(get_current_active_user)])
+async def receber_frame(request: Request):
+    """
+    Recebe faces já detectadas no navegador e as envia direto para a fila de reconhecimento.
+    Formatos aceitos:
+      - multipart/form-data: campos `faces` (um arquivo por face), `timestamp` (ms) e `tag_video`;
+      - JSON: {"image", "timestamp"} (ImagePayload/FaceItem) ou {"images": [...]} (BatchImagePayload),
+        com imagens em base64; itens com o mesmo timestamp formam um frame.
+    Responde 429 (com Retry-After) quando a fila de detecções está cheia.
+    """
+    try:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            form = await request.form()
+            arquivos = form.getlist("faces")
+            if any(isinstance(arquivo, str) for arquivo in arquivos):
+                raise ValueError("O campo 'faces' deve conter apenas arquivos")
+            faces = [await arquivo.read() for arquivo in arquivos]
+            timestamp = int(form["timestamp"]) if form.get("timestamp") else None
+            frames_recebidos = [(timestamp, faces)]
+            tag_video = form.get("tag_video") or "navegador"
+        else:
+            corpo = await request.json()
+            if not isinstance(corpo, dict):
+                raise ValueError('O corpo JSON deve ser um objeto: {"image", "timestamp"} ou {"images": [...]}')
+            itens = BatchImagePayload(**corpo).images if "images" in corpo else [FaceItem(**corpo)]
+            por_timestamp = {}
+            for item in itens:
+                por_timestamp.setdefault(item.timestamp, []).append(decodificar_base64(item.image))
+            frames_recebidos = list(por_timestamp.items())
+            tag_video = request.query_params.get("tag_video", "navegador")
+
+        await ingestao.verificar_capacidade(sum(len(faces) for _, faces in frames_recebidos))
+        resultados = [
+            await ingestao.ingerir(faces, timestamp, tag_video) for timestamp, faces in frames_recebidos
+        ]
+        return JSONResponse({
+            "frames": resultados,
+            "faces_aceitas": sum(len(r["faces"]) for r in resultados)
+        }, status_code=202)
+    except FilaCheia as e:
+        return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": str(FRAME_RETRY_AFTER)})
+    except (FacesInvalidas, ValueError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Erro ao receber frame: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
 @app.get("/pessoas", dependencies=[Depends(get_current_active_user)])
-async def list_pessoas(page: int = 1, limit: int = 10):
+async def list_pessoas(page: int = Query(1, ge=1), limit: int = Query(10, ge=1, le=PAGINA_MAX),
+                       cursor: Optional[str] = None, total_exato: bool = False):
     """
-    Retorna uma lista paginada de pessoas com seus UUIDs e tags (sem fotos).
+    Retorna uma lista paginada de pessoas com seus UUIDs e tags (sem fotos), ordenada por uuid.
+    Com `cursor` (o "proximo_cursor" da página anterior) a página é buscada por keyset,
+    em tempo constante; sem ele, usa `page`. O total é estimado (metadados da coleção),
+    a menos que `total_exato=true`.
     """
     try:
-        total = pessoas.count_documents({})
+        filtro = {}
         skip = (page - 1) * limit
-        cursor = pessoas.find({}).skip(skip).limit(limit)
+        if cursor:
+            filtro = {"uuid": {"$gt": decodificar(cursor, ("uuid",))["uuid"]}}
+            skip = 0
+    except CursorInvalido as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    try:
+        if total_exato:
+            total = await em_thread(pessoas.count_documents, {})
+        else:
+            total = await em_thread(pessoas.estimated_document_count)
+        cursor_db = await em_thread(repositorio_pessoas.listar, filtro, skip, limit)
         result = []
-        for p in cursor:
+        for p in cursor_db:
             result.append({
                 "uuid": p["uuid"],
                 "tags": p.get("tags", [])
             })
-        return JSONResponse({"pessoas": result, "total": total}, status_code=200)
+        proximo_cursor = codificar({"uuid": result[-1]["uuid"]}) if len(result) == limit else None
+        return JSONResponse({
+            "pessoas": result,
+            "total": total,
+            "total_estimado": not total_exato,
+            "proximo_cursor": proximo_cursor
+        }, status_code=200)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.post("/pessoas/batch", dependencies=[Depends(get_current_active_user)])
+async def pessoas_batch(payload: PessoasBatchPayload):
+    """
+    Retorna, em uma única agregação, tags, URL da foto principal e quantidade de fotos
+    de cada pessoa em `uuids` (na mesma ordem; uuids inexistentes são omitidos).
+    Substitui as chamadas a /pessoas/{uuid} e /pessoas/{uuid}/photos/count por cartão.
+    """
+    if len(payload.uuids) > PESSOAS_BATCH_MAX:
+        return JSONResponse({"error": f"No máximo {PESSOAS_BATCH_MAX} uuids por chamada"}, status_code=400)
+    try:
+        detalhes = await em_thread(repositorio_pessoas.detalhes, payload.uuids)
+        por_uuid = {p["uuid"]: p for p in detalhes}
+        ordenadas = [por_uuid[u] for u in dict.fromkeys(payload.uuids) if u in por_uuid]
+        fotos = get_presigned_urls([p.get("primeira_foto") for p in ordenadas], payload.miniaturas)
+        result = [{
+            "uuid": p["uuid"],
+            "tags": p.get("tags", []),
+            "primary_photo": primary_photo,
+            "photo_count": p["photo_count"]
+        } for p, primary_photo in zip(ordenadas, fotos)]
+        return JSONResponse({"pessoas": result}, status_code=200)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @app.get("/pessoas/{uuid}", dependencies=[Depends(get_current_active_user)])
-async def get_pessoa(uuid: str):
+async def get_pessoa(uuid: str, miniaturas: bool = False):
     """
-    Retorna os detalhes de uma pessoa, incluindo UUID, tags e a URL assinada da foto principal no MinIO.
+    Retorna os detalhes de uma pessoa, incluindo UUID, tags e a URL assinada da foto principal no MinIO
+    (ou da sua miniatura, com `miniaturas=true`).
     """
     try:
-        pessoa = pessoas.find_one({"uuid": uuid})
+        pessoa = await em_thread(repositorio_pessoas.resumo, uuid)
         if not pessoa:
             raise HTTPException(status_code=404, detail="Pessoa não encontrada")
 
-        primary_photo = get_presigned_url(pessoa["image_paths"][0]) if pessoa.get("image_paths") else None
+        primary_photo = get_presigned_url(pessoa["image_paths"][0], miniaturas) if pessoa.get("image_paths") else None
 
         return JSONResponse({
             "uuid": pessoa["uuid"],
@@ -313,29 +475,41 @@ async def get_pessoa(uuid: str):
 
 
 @app.get("/pessoas/{uuid}/photos", dependencies=[Depends(get_current_active_user)])
-async def list_photos(uuid: str):
+async def list_photos(uuid: str, page: int = Query(1, ge=1), limit: int = Query(50, ge=1, le=PAGINA_MAX),
+                      miniaturas: bool = False):
     """
-    Retorna as URLs de todas as fotos de uma pessoa armazenadas no MinIO.
+    Retorna, paginadas, as URLs das fotos de uma pessoa armazenadas no MinIO.
+    Com `miniaturas=true`, "image_urls" traz as miniaturas e "originais" as fotos em tamanho real.
     """
     try:
-        pessoa = pessoas.find_one({"uuid": uuid})
-        if not pessoa:
+        skip = (page - 1) * limit
+        # Só a página pedida de image_paths e o total (calculado no servidor)
+        resultado = await em_thread(repositorio_pessoas.pagina_fotos, uuid, skip, limit)
+        if not resultado:
             raise HTTPException(status_code=404, detail="Pessoa não encontrada")
 
-        image_paths = pessoa.get("image_paths", [])
-        image_urls = [get_presigned_url(path) for path in image_paths]
-
-        return JSONResponse({"uuid": uuid, "image_urls": image_urls}, status_code=200)
+        image_paths = resultado["image_paths"]
+        resposta = {
+            "uuid": uuid,
+            "image_urls": get_presigned_urls(image_paths, miniaturas),
+            "total": resultado["total"],
+            "page": page,
+            "limit": limit,
+        }
+        if miniaturas:
+            resposta["originais"] = get_presigned_urls(image_paths)
+
+        return JSONResponse(resposta, status_code=200)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @app.get("/pessoas/{uuid}/photo", dependencies=[Depends(get_current_active_user)])
-async def get_primary_photo(uuid: str):
+async def get_primary_photo(uuid: str, miniaturas: bool = False):
     """
     Retorna a URL da foto principal (primeira foto) de uma pessoa armazenada no MinIO.
     """
     try:
-        pessoa = pessoas.find_one({"uuid": uuid})
+        pessoa = await em_thread(repositorio_pessoas.resumo, uuid)
         if not pessoa:
             raise HTTPException(status_code=404, detail="Pessoa não encontrada")
 
@@ -343,7 +517,7 @@ async def get_primary_photo(uuid: str):
         if not image_paths:
             raise HTTPException(status_code=404, detail="Nenhuma foto encontrada")
 
-        primary_photo = get_presigned_url(image_paths[0])
+        primary_photo = get_presigned_url(image_paths[0], miniaturas)
 
         return JSONResponse({"uuid": uuid, "primary_photo": primary_photo}, status_code=200)
     except Exception as e:
@@ -352,24 +526,35 @@ async def get_primary_photo(uuid: str):
 @app.delete("/pessoas/{uuid}", dependencies=[Depends(get_current_active_user)])
 async def delete_pessoa(uuid: str):
     """
-    Exclui uma pessoa com o UUID fornecido e remove suas imagens do MinIO.
+    Exclui a pessoa com o UUID fornecido e agenda, em segundo plano, a exclusão das suas
+    presenças e imagens no MinIO. Retorna 202 com o id da tarefa (ver GET /tarefas/{id}).
     """
     try:
-        pessoa = pessoas.find_one({"uuid": uuid})
-        if not pessoa:
-            raise HTTPException(status_code=404, detail="Pessoa não encontrada")
-
-        # Deletar imagens do MinIO
-        for image_path in pessoa.get("image_paths", []):
-            minio_client.remove_object(MINIO_BUCKET, image_path)
+        resultado = await em_thread(repositorio_pessoas.remover, uuid)
+        if resultado.deleted_count == 0:
+            return JSONResponse({"error": "Pessoa não encontrada"}, status_code=404)
 
-        # Deletar do banco de dados
-        pessoas.delete_one({"uuid": uuid})
-
-        return JSONResponse({"message": "Pessoa deletada com sucesso"}, status_code=200)
+        tarefa_id = await em_thread(exclusoes.agendar, uuid)
+        return JSONResponse({
+            "message": "Pessoa deletada; presenças e imagens estão sendo removidas",
+            "tarefa": tarefa_id,
+            "status_url": f"/tarefas/{tarefa_id}"
+        }, status_code=202)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+@app.get("/tarefas/{tarefa_id}", dependencies=[Depends(get_current_active_user)])
+async def get_tarefa(tarefa_id: str):
+    """
+    Estado de uma tarefa em segundo plano (ex.: exclusão de pessoa): "pendente", "presencas",
+    "imagens", "concluida" ou "erro", com os contadores de progresso.
+    """
+    tarefa = await em_thread(exclusoes.estado, tarefa_id)
+    if tarefa is None:
+        return JSONResponse({"error": "Tarefa não encontrada"}, status_code=404)
+    tarefa["id"] = tarefa.pop("_id")
+    return JSONResponse(tarefa, status_code=200)
+
 @app.post("/pessoas/{uuid}/tags", dependencies=[Depends(get_current_active_user)])
 async def add_tag(uuid: str, payload: TagPayload):
     """
@@ -379,13 +564,9 @@ async def add_tag(uuid: str, payload: TagPayload):
         tag = payload.tag.strip()
         if not tag:
             raise HTTPException(status_code=400, detail="Tag inválida")
-        result = pessoas.update_one(
-            {"uuid": uuid},
-            {"$push": {"tags": tag}}
-        )
-        if result.matched_count == 0:
+        pessoa = await em_thread(repositorio_pessoas.adicionar_tag, uuid, tag)
+        if pessoa is None:
             raise HTTPException(status_code=404, detail="Pessoa não encontrada")
-        pessoa = pessoas.find_one({"uuid": uuid})
         primary_photo = None
         if pessoa.get("image_paths"):
             primary_photo = f"http://localhost:8000/static/{os.path.relpath(pessoa['image_paths'][0], IMAGES_DIR).replace(os.path.sep, '/')}"
@@ -407,13 +588,9 @@ async def remove_tag(uuid: str, payload: TagPayload):
         tag = payload.tag.strip()
         if not tag:
             raise HTTPException(status_code=400, detail="Tag inválida")
-        result = pessoas.update_one(
-            {"uuid": uuid},
-            {"$pull": {"tags": tag}}
-        )
-        if result.matched_count == 0:
+        pessoa = await em_thread(repositorio_pessoas.remover_tag, uuid, tag)
+        if pessoa is None:
             raise HTTPException(status_code=404, detail="Pessoa não encontrada")
-        pessoa = pessoas.find_one({"uuid": uuid})
         return JSONResponse({
             "message": "Tag removida com sucesso",
             "uuid": pessoa["uuid"],
@@ -425,10 +602,9 @@ async def remove_tag(uuid: str, payload: TagPayload):
 @app.get("/pessoas/{uuid}/photos/count", dependencies=[Depends(get_current_active_user)])
 async def count_photos(uuid: str):
     try:
-        pessoa = pessoas.find_one({"uuid": uuid})
-        if not pessoa:
+        count = await em_thread(repositorio_pessoas.contar_fotos, uuid)
+        if count is None:
             raise HTTPException(status_code=404, detail="Pessoa não encontrada")
-        count = len(pessoa.get("image_paths", []))
         return JSONResponse({"uuid": uuid, "photo_count": count}, status_code=200)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -439,37 +615,114 @@ async def delete_presenca(id: str):
     Exclui o registro de presença com o _id fornecido.
     """
     try:
-        result = presencas.delete_one({"_id": ObjectId(id)})
-        if result.deleted_count == 0:
+        presenca = await em_thread(presencas.find_one_and_delete, {"_id": ObjectId(id)})
+        if presenca is None:
             raise HTTPException(status_code=404, detail="Presença não encontrada")
+        await em_thread(remover_presencas_dos_frames, db, [presenca["_id"]])
+        await em_thread(descontar_presenca, db, presenca)
         return JSONResponse({"message": "Presença deletada com sucesso"}, status_code=200)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
     
 
 
-from datetime import datetime
-from fastapi.responses import JSONResponse
+# Campos de presença devolvidos pela listagem
+CAMPOS_PRESENCA = {
+    "pessoa": 1, "tempo_processamento_total": 1, "tempo_captura_frame": 1, "tempo_deteccao": 1,
+    "tempo_reconhecimento": 1, "foto_captura": 1, "tag_video": 1, "tags": 1, "data_captura_frame": 1,
+    "timestamp_inicial": 1, "timestamp_final": 1, "tempo_fila_real": 1,
+    "inicio_processamento": 1,  # chave do cursor (ORDEM_PRESENCAS)
+}
+
+# filtro -> (versão dos agregados do filtro, instante do cálculo, totais)
+cache_totais_presencas = {}
+
+def _como_numero(campo: str) -> dict:
+    return {"$convert": {"input": f"${campo}", "to": "double", "onError": 0.0, "onNull": 0.0}}
+
+def apos_presenca(chave: dict) -> dict:
+    """Filtro keyset: presenças que vêm depois de `chave` na ORDEM_PRESENCAS (inicio_processamento, _id)."""
+    return {"$or": [
+        {"inicio_processamento": {"$lt": chave["inicio_processamento"]}},
+        {"inicio_processamento": chave["inicio_processamento"], "_id": {"$lt": chave["_id"]}},
+    ]}
+
+def consultar_presencas(query: dict, skip: int, limit: int, com_totais: bool, apos: Optional[dict] = None):
+    """
+    Página de presenças (a partir de `skip` ou, por keyset, depois da chave `apos`) e,
+    se `com_totais`, os totais do filtro. A página por cursor é um find limitado com o
+    keyset no próprio filtro, apoiado no índice; sem cursor e com totais, uma única
+    agregação: $match/$sort nos índices, projeção e um $facet com página e totais.
+    Os totais valem sempre para o filtro inteiro, não só para o que vem depois do cursor.
+    """
+    pagina = None
+    if apos or not com_totais:
+        filtro = {"$and": [query, apos_presenca(apos)]} if apos else query
+        pagina = list(presencas.find(filtro, CAMPOS_PRESENCA).sort(ORDEM_PRESENCAS).skip(skip).limit(limit))
+        if not com_totais:
+            return pagina, None
+
+    facetas = {}
+    if pagina is None:
+        facetas["pagina"] = [{"$skip": skip}, {"$limit": limit}]
+    facetas["totais"] = [{"$group": {
+        "_id": None,
+        "total": {"$sum": 1},
+        "tempo_processamento": {"$sum": {"$add": [
+            _como_numero("tempo_captura_frame"), _como_numero("tempo_deteccao"), _como_numero("tempo_reconhecimento"),
+        ]}},
+        "tempo_fila": {"$sum": _como_numero("tempo_fila_real")},
+    }}]
+    facetas["pessoas"] = [{"$group": {"_id": "$pessoa"}}, {"$count": "total"}]
+
+    pipeline = [{"$match": query}]
+    if pagina is None:
+        pipeline += [{"$sort": dict(ORDEM_PRESENCAS)}]
+    pipeline += [{"$project": CAMPOS_PRESENCA}, {"$facet": facetas}]
+    resultado = next(presencas.aggregate(pipeline, allowDiskUse=True))
+    somas = resultado["totais"][0] if resultado["totais"] else {}
+    totais = {
+        "total": somas.get("total", 0),
+        "tempo_processamento": somas.get("tempo_processamento", 0.0),
+        "tempo_fila": somas.get("tempo_fila", 0.0),
+        "total_de_pessoas": resultado["pessoas"][0]["total"] if resultado["pessoas"] else 0,
+    }
+    return (resultado["pagina"] if pagina is None else pagina), totais
 
 @app.get("/presencas", dependencies=[Depends(get_current_active_user)])
 async def list_presencas(
-    page: int = 1,
-    limit: int = 10,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=PAGINA_MAX),
     tag_video: Optional[str] = None,
-    data_captura_frame: Optional[str] = None
+    data_captura_frame: Optional[str] = None,
+    miniaturas: bool = False,
+    cursor: Optional[str] = None,
+    com_totais: bool = True
 ):
     """
     Retorna uma lista paginada de registros de presença.
     Se os parâmetros "tag_video" ou "data_captura_frame" forem informados,
-    filtra os registros pelo valor especificado.
+    filtra os registros pelo valor especificado. Com `miniaturas=true`,
+    "foto_captura" aponta para a miniatura da face.
+
+    Com `cursor` (o "proximo_cursor" da página anterior) a página é buscada por keyset
+    em (inicio_processamento, _id), em tempo constante qualquer que seja a profundidade.
 
-    Além disso, retorna:
+    Além disso, se `com_totais` (padrão), retorna (em cache por filtro, por alguns segundos e
+    depois até mudarem os agregados daquele tag_video/data):
       - o somatório de tempo_captura_frame + tempo_deteccao + tempo_reconhecimento de todos os documentos como "tempo_processamento",
       - o somatório de tempo_fila_real (registrado) como "tempo_fila",
       - o total de pessoas distintas como "total_de_pessoas".
     """
     try:
         skip = (page - 1) * limit
+        apos = None
+        if cursor:
+            try:
+                apos = decodificar(cursor, ("inicio_processamento", "_id"))
+            except CursorInvalido as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+            skip = 0
 
         # Monta o filtro de consulta
         query = {}
@@ -479,33 +732,34 @@ async def list_presencas(
             data_formatada = datetime.strptime(data_captura_frame, "%Y-%m-%d").strftime("%d-%m-%Y")
             query["data_captura_frame"] = data_formatada
 
-        # Obtem os documentos filtrados para cálculo personalizado
-        documentos = list(presencas.find(query))
-
-        tempo_processamento = 0.0
-        tempo_fila = 0.0
-
-        for doc in documentos:
-            captura = float(doc.get("tempo_captura_frame", 0))
-            deteccao = float(doc.get("tempo_deteccao", 0))
-            reconhecimento = float(doc.get("tempo_reconhecimento", 0))
-            tempo_fila_real = float(doc.get("tempo_fila_real", 0))
-
-            processamento = captura + deteccao + reconhecimento
-
-            tempo_processamento += processamento
-            tempo_fila += tempo_fila_real
-
-        # Calcula o total de pessoas distintas
-        distinct_personas = presencas.distinct("pessoa", query)
-        total_de_pessoas = len(distinct_personas)
-
-        # Busca os registros paginados
-        cursor = presencas.find(query).sort([("inicio_processamento", -1)]).skip(skip).limit(limit)
+        # Totais em cache: dentro do TTL sem consultar nada; depois, enquanto a versão
+        # dos agregados do filtro não mudar (ingestão em outros vídeos/dias não invalida)
+        totais = {}
+        if com_totais:
+            chave = (query.get("tag_video"), query.get("data_captura_frame"))
+            em_cache = cache_totais_presencas.get(chave)
+            versao_atual = em_cache[0] if em_cache else None
+            totais = None
+            if em_cache and time.monotonic() - em_cache[1] < PRESENCAS_CACHE_TTL:
+                totais = em_cache[2]
+            else:
+                filtro_agregados = {campo: valor for campo, valor in
+                                    (("tag_video", chave[0]), ("data", chave[1])) if valor is not None}
+                versao_atual = await em_thread(versao_filtro, db, filtro_agregados)
+                if em_cache and em_cache[0] == versao_atual:
+                    totais = em_cache[2]
+                    cache_totais_presencas[chave] = (versao_atual, time.monotonic(), totais)
+
+        pagina, calculados = await em_thread(consultar_presencas, query, skip, limit, totais is None, apos)
+        if calculados is not None:
+            totais = calculados
+            if chave not in cache_totais_presencas and len(cache_totais_presencas) >= PRESENCAS_CACHE_MAX:
+                cache_totais_presencas.pop(next(iter(cache_totais_presencas)))
+            cache_totais_presencas[chave] = (versao_atual, time.monotonic(), totais)
+
+        fotos = get_presigned_urls([p.get("foto_captura") for p in pagina], miniaturas)
         results = []
-        for p in cursor:
-            foto_captura = p.get("foto_captura")
-            foto_url = get_presigned_url(foto_captura) if foto_captura else None
+        for p, foto_url in zip(pagina, fotos):
 
             results.append({
                 "id": str(p["_id"]),
@@ -523,59 +777,97 @@ async def list_presencas(
                 "tempo_fila": p.get("tempo_fila_real"),
             })
 
-        total = presencas.count_documents(query)
+        proximo_cursor = None
+        if len(pagina) == limit:
+            ultima = pagina[-1]
+            proximo_cursor = codificar({"inicio_processamento": ultima.get("inicio_processamento"), "_id": ultima["_id"]})
 
         return JSONResponse({
             "presencas": results,
-            "total": total,
-            "tempo_processamento": tempo_processamento,
-            "tempo_fila": tempo_fila,
-            "total_de_pessoas": total_de_pessoas
+            "proximo_cursor": proximo_cursor,
+            **totais
         }, status_code=200)
 
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+# ----------------------------
+# Presenças em tempo real (WebSocket)
+# ----------------------------
+def preparar_eventos(eventos: list) -> list:
+    """Troca o caminho da foto de cada evento pela URL assinada da miniatura (uma vez por evento)."""
+    fotos = get_presigned_urls([e.get("foto_captura") for e in eventos], miniaturas=True)
+    return [{**evento, "foto_captura": foto} for evento, foto in zip(eventos, fotos)]
+
+transmissor = TransmissorPresencas(f"amqp://{RABBITMQ_HOST}/", EXCHANGE_PRESENCAS, preparar=preparar_eventos)
+
+@app.on_event("startup")
+async def iniciar_transmissao():
+    asyncio.create_task(transmissor.executar())
 
+async def _aguardar_desconexao(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
 
+@app.websocket("/ws/presencas")
+async def ws_presencas(websocket: WebSocket, token: str, tag_video: Optional[str] = None):
+    """
+    Envia as presenças à medida que são gravadas, como {"presencas": [...], "descartados": n},
+    com os mesmos campos das linhas de /presencas. O JWT vai em `token` (navegadores não
+    enviam cabeçalhos no WebSocket); `tag_video` restringe os eventos a uma tag.
+    """
+    try:
+        await get_current_active_user(await get_current_user(token))
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    cliente = transmissor.registrar(tag_video)
+    # Uma tarefa só para perceber a desconexão enquanto não há eventos a enviar
+    desconexao = asyncio.create_task(_aguardar_desconexao(websocket))
+    try:
+        while True:
+            proximos = asyncio.create_task(cliente.proximos())
+            await asyncio.wait({proximos, desconexao}, return_when=asyncio.FIRST_COMPLETED)
+            if desconexao.done():
+                proximos.cancel()
+                break
+            eventos, descartados = proximos.result()
+            await websocket.send_json({"presencas": eventos, "descartados": descartados})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        desconexao.cancel()
+        transmissor.remover(cliente)
 
 
 @app.get("/presentes", dependencies=[Depends(get_current_active_user)])
-async def list_presentes(date: str, min_presencas: int):
+async def list_presentes(date: str, min_presencas: int, miniaturas: bool = False):
     """
     Retorna uma lista de pessoas presentes na data especificada com pelo menos `min_presencas` registros de presença.
+    Com `miniaturas=true`, "primary_photo" aponta para a miniatura.
     """
     try:
         logger.info(f"Buscando presentes para a data: {date} com mínimo de presenças: {min_presencas}")
 
-        # Filtrar presenças pela data e agrupar por pessoa
-        pipeline = [
-            {"$match": {"data_captura_frame": date}},
-            {"$group": {"_id": "$pessoa", "count": {"$sum": 1}}},
-            {"$match": {"count": {"$gte": min_presencas}}},
-            {"$sort": {"count": -1}}  # Ordenar de forma decrescente pela quantidade de presenças
-        ]
-        presencas_agrupadas = list(presencas.aggregate(pipeline))
-        logger.info(f"Presenças agrupadas: {presencas_agrupadas}")
-
-        # Obter UUIDs das pessoas que atendem ao critério
-        uuids = [p["_id"] for p in presencas_agrupadas]
-        logger.info(f"UUIDs das pessoas que atendem ao critério: {uuids}")
-
-        # Obter detalhes das pessoas
-        pessoas_detalhes = pessoas.find({"uuid": {"$in": uuids}})
-        result = []
-        for pessoa in pessoas_detalhes:
-            primary_photo = get_presigned_url(pessoa["image_paths"][0]) if pessoa.get("image_paths") else None
-            presencas_count = next((p["count"] for p in presencas_agrupadas if p["_id"] == pessoa["uuid"]), 0)
-            result.append({
+        # Totais do dia (presencas_pessoa_dia) e dados das pessoas ($lookup) em uma única agregação,
+        # já em ordem decrescente de presenças
+        presentes = await em_thread(ler_presentes, db, date, min_presencas)
+        fotos = get_presigned_urls([p.get("primeira_foto") for p in presentes], miniaturas)
+        result = [
+            {
                 "uuid": pessoa["uuid"],
                 "primary_photo": primary_photo,
-                "tags": pessoa.get("tags", []),
-                "presencas_count": presencas_count
-            })
-        logger.info(f"Detalhes das pessoas: {result}")
+                "tags": pessoa["tags"],
+                "presencas_count": pessoa["presencas_count"]
+            }
+            for pessoa, primary_photo in zip(presentes, fotos)
+        ]
+        logger.info(f"Pessoas presentes: {len(result)}")
 
         return JSONResponse({"pessoas": result}, status_code=200)
     except Exception as e:
@@ -588,31 +880,14 @@ async def estatisticas_frames(tag_video: str):
     Retorna estatísticas sobre os frames com base na tag de vídeo fornecida.
     """
     try:
-        query = {"tag_video": tag_video}
-
-        # Total de frames com a tag
-        total_frames = frames.count_documents(query)
-
-        # Frame com menor quantidade de pessoas detectadas
-        menor_frame = frames.find({"total_faces_detectadas": {"$gte": 1}}).sort("total_faces_detectadas", 1).limit(1)
-        menor_qtd = None
-        menor_uuid = None
-        doc = next(menor_frame, None)
-        if doc:
-            menor_qtd = doc["total_faces_detectadas"]
-            menor_uuid = doc["uuid"]
-
-        # Frame com maior quantidade de pessoas detectadas
-        maior_frame = frames.find({"total_faces_detectadas": {"$gte": 1}}).sort("total_faces_detectadas", -1).limit(1)
-        maior_qtd = None
-        maior_uuid = None
-        doc = next(maior_frame, None)
-        if doc:
-            maior_qtd = doc["total_faces_detectadas"]
-            maior_uuid = doc["uuid"]
-
-        # Quantidade de frames com 0 pessoas detectadas
-        frames_sem_pessoas = frames.count_documents({**query, "total_faces_detectadas": 0})
+        # Contagens, mín/máx e frames de exemplo vêm de uma única agregação sobre os agregados
+        agregado = next(iter(await em_thread(ler_estatisticas, db, {"tag_video": tag_video}, True)), {})
+        total_frames = agregado.get("total_frames", 0)
+        frames_sem_pessoas = agregado.get("frames_sem_pessoas", 0)
+        menor_qtd = agregado.get("menor_qtd_faces_detectadas")
+        maior_qtd = agregado.get("maior_qtd_faces_detectadas")
+        menor_uuid = agregado.get("uuid_menor_qtd")
+        maior_uuid = agregado.get("uuid_maior_qtd")
 
         return JSONResponse({
             "tag_video": tag_video,
@@ -633,59 +908,31 @@ async def listar_agrupamentos_por_tag_video():
     """
     Retorna uma lista com informações agregadas por tag_video,
     incluindo total_pessoas, fps, duracao e gráficos de detecção e reconhecimento.
+    Os gráficos são renderizados em segundo plano; enquanto um gráfico novo não fica
+    pronto é devolvida a versão anterior (ou null).
     """
     try:
-        tags = frames.distinct("tag_video")
         resultados = []
 
-        for tag_video in tags:
-            query = {"tag_video": tag_video}
-
-            total_frames = frames.count_documents(query)
-            frames_sem_pessoas = frames.count_documents({**query, "total_faces_detectadas": 0})
-
-            # Frame de exemplo para extrair fps e duracao
-            frame_amostra = frames.find_one(query)
-            fps = frame_amostra.get("fps") if frame_amostra else None
-            duracao = frame_amostra.get("duracao") if frame_amostra else None
-
-            # Pessoas distintas com presença ligada à tag_video
-            pessoas_unicas = presencas.distinct("pessoa", {"tag_video": tag_video})
-            total_pessoas = len(pessoas_unicas)
-
-            # Frame com menor qtd de pessoas detectadas
-            menor_doc = frames.find({**query, "total_faces_detectadas": {"$gte": 1}})\
-                              .sort("total_faces_detectadas", 1).limit(1)
-            menor_qtd, menor_uuid = None, None
-            for doc in menor_doc:
-                menor_qtd = doc["total_faces_detectadas"]
-                menor_uuid = doc["uuid"]
-
-            # Frame com maior qtd de pessoas detectadas
-            maior_doc = frames.find({**query, "total_faces_detectadas": {"$gte": 1}})\
-                              .sort("total_faces_detectadas", -1).limit(1)
-            maior_qtd, maior_uuid = None, None
-            for doc in maior_doc:
-                maior_qtd = doc["total_faces_detectadas"]
-                maior_uuid = doc["uuid"]
-
-            # Buscar frames ordenados para gerar gráficos
-            frames_ordenados = list(frames.find(query).sort("numero_frame", 1))
-
-            # Gerar gráficos e obter paths relativos
-            grafico_detectados, grafico_reconhecidos = gerar_graficos_para_tag(tag_video, frames_ordenados)
+        # Uma única agregação ($group por tag_video) sobre os agregados
+        for agregado in await em_thread(ler_estatisticas, db, {}, True):
+            tag_video = agregado["tag_video"]
+            total_frames = agregado.get("total_frames", 0)
+            # total_presencas = faces reconhecidas da tag (muda sem mudar total_frames)
+            grafico_detectados, grafico_reconhecidos = await em_thread(
+                gerador_graficos.obter, tag_video, total_frames, agregado.get("total_presencas", 0))
 
             resultados.append({
                 "tag_video": tag_video,
                 "total_frames": total_frames,
-                "frames_sem_pessoas": frames_sem_pessoas,
-                "menor_qtd_faces_detectadas": menor_qtd,
-                "uuid_menor_qtd": menor_uuid,
-                "maior_qtd_faces_detectadas": maior_qtd,
-                "uuid_maior_qtd": maior_uuid,
-                "total_pessoas": total_pessoas,
-                "fps": fps,
-                "duracao": duracao,
+                "frames_sem_pessoas": agregado.get("frames_sem_pessoas", 0),
+                "menor_qtd_faces_detectadas": agregado.get("menor_qtd_faces_detectadas"),
+                "uuid_menor_qtd": agregado.get("uuid_menor_qtd"),
+                "maior_qtd_faces_detectadas": agregado.get("maior_qtd_faces_detectadas"),
+                "uuid_maior_qtd": agregado.get("uuid_maior_qtd"),
+                "total_pessoas": agregado.get("total_pessoas", 0),
+                "fps": agregado.get("fps"),
+                "duracao": agregado.get("duracao"),
                 "grafico_detectados": grafico_detectados,
                 "grafico_reconhecidos": grafico_reconhecidos
             })
@@ -699,10 +946,70 @@ async def listar_agrupamentos_por_tag_video():
 
 
 
+@app.get("/frames/{tag_video}/series", dependencies=[Depends(get_current_active_user)])
+async def series_frames(tag_video: str, pontos: int = 1000, metodo: str = "lttb"):
+    """
+    Retorna as séries numero_frame x faces detectadas e numero_frame x faces reconhecidas
+    da tag, reduzidas no servidor a no máximo `pontos` pontos (metodo "lttb" ou "minmax").
+    """
+    # series (NumPy) é importado só na primeira chamada, fora da partida do backend
+    from series import METODOS, ler_serie, reduzir
+
+    if metodo not in METODOS:
+        return JSONResponse({"error": f"metodo deve ser um de {', '.join(METODOS)}"}, status_code=400)
+    if pontos < 2:
+        return JSONResponse({"error": "pontos deve ser >= 2"}, status_code=400)
+    try:
+        numeros, detectados, reconhecidos = await em_thread(ler_serie, frames, tag_video)
+        return JSONResponse({
+            "tag_video": tag_video,
+            "metodo": metodo,
+            "total_pontos": len(numeros),
+            "detectados": await em_thread(reduzir, numeros, detectados, pontos, metodo),
+            "reconhecidos": await em_thread(reduzir, numeros, reconhecidos, pontos, metodo),
+        }, status_code=200)
+    except Exception as e:
+        logger.error(f"Erro ao montar séries da tag_video: {e}")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+def exportar(colecao: str, formato: str, compressao: Optional[str], tag_video: Optional[str],
+             data_inicio: Optional[str], data_fim: Optional[str]):
+    """Resposta em streaming de comum.exportacao; o cursor é lido em lotes fora do event loop."""
+    compressao = compressao or ("zstd" if formato == "parquet" else "gzip")
+    try:
+        blocos, tipo, nome = preparar_exportacao(db, colecao, formato, compressao, tag_video, data_inicio, data_fim)
+    except ExportacaoInvalida as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return StreamingResponse(blocos, media_type=tipo, headers={"Content-Disposition": f'attachment; filename="{nome}"'})
+
+@app.get("/export/presencas", dependencies=[Depends(get_current_active_user)])
+async def export_presencas(formato: str = "csv", compressao: Optional[str] = None, tag_video: Optional[str] = None,
+                           data_inicio: Optional[str] = None, data_fim: Optional[str] = None):
+    """
+    Exporta as presenças (campos de comum.exportacao.CAMPOS) em CSV ou Parquet, em streaming.
+    Filtros: tag_video e intervalo data_inicio/data_fim (aaaa-mm-dd). Compressão: gzip, zstd
+    ou nenhuma (padrão: gzip no CSV, zstd no Parquet).
+    """
+    return exportar("presencas", formato, compressao, tag_video, data_inicio, data_fim)
+
+@app.get("/export/frames", dependencies=[Depends(get_current_active_user)])
+async def export_frames(formato: str = "csv", compressao: Optional[str] = None, tag_video: Optional[str] = None,
+                        data_inicio: Optional[str] = None, data_fim: Optional[str] = None):
+    """Exporta os frames em CSV ou Parquet, em streaming (mesmos filtros de /export/presencas)."""
+    return exportar("frames", formato, compressao, tag_video, data_inicio, data_fim)
+
+
+@app.get("/metricas")
+async def metricas_prometheus():
+    """Métricas do backend no formato texto do Prometheus (inclui a taxa de acerto do cache de URLs)."""
+    return PlainTextResponse(metricas.texto_prometheus())
+
+
 @app.get("/create_admin")
 async def create_admin():
     # Verifica se o usuário admin já existe
-    existing_admin = users.find_one({"username": "admin"})
+    existing_admin = await em_thread(users.find_one, {"username": "admin"})
     if existing_admin:
         return JSONResponse({"message": "O usuário admin já foi criado."}, status_code=400)
     
@@ -712,9 +1019,10 @@ async def create_admin():
         "email": None,
         "full_name": "Admin",
         "disabled": False,
-        "hashed_password": get_password_hash("admin")
+        "hashed_password": await em_thread(get_password_hash, "admin")
     }
-    users.insert_one(admin_data)
+    await em_thread(users.insert_one, admin_data)
+    usuario_alterado("admin")
     return JSONResponse({"message": "Usuário admin criado com sucesso."}, status_code=201)
 
 # To run:
@@ -0,0 +1,80 @@
+"""
+Cache em processo da autenticação: tokens JWT já decodificados e usuários ativos.
+
+Com o cache quente, uma requisição autenticada não decodifica o JWT de novo nem
+consulta `users` no MongoDB. Os usuários ficam sob a chave (username, jti do token)
+por até AUTH_CACHE_TTL segundos (10 por padrão, nunca além da expiração do token).
+Toda rota do backend que grava em `users` chama `invalidar(username)` (via
+`usuario_alterado` em server.py); alterações feitas por fora (direto no MongoDB ou em
+outro processo uvicorn) não são vistas aqui e valem no máximo após o TTL, por isso ele
+é curto.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from comum import metricas
+
+
+class CacheSessoes:
+    """Cache TTL/LRU limitado de tokens decodificados e usuários; thread-safe."""
+
+    def __init__(self, ttl: float = 10, maximo: int = 10000):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._tokens = OrderedDict()  # token -> ((username, jti, exp), válido até)
+        self._usuarios = OrderedDict()  # (username, jti) -> (usuário, válido até)
+        self._lock = threading.Lock()
+
+        self.acertos = metricas.contador("auth_cache_acertos_total", "Autenticações resolvidas pelo cache")
+        self.faltas = metricas.contador("auth_cache_faltas_total", "Autenticações que consultaram o MongoDB")
+        self.tamanho = metricas.medidor("auth_cache_usuarios", "Usuários autenticados em cache")
+
+    def _obter(self, cache: OrderedDict, chave):
+        item = cache.get(chave)
+        if item is None:
+            return None
+        valor, valido_ate = item
+        if valido_ate <= time.time():
+            del cache[chave]
+            return None
+        cache.move_to_end(chave)
+        return valor
+
+    def _guardar(self, cache: OrderedDict, chave, valor, exp: float = None):
+        valido_ate = time.time() + self.ttl
+        if exp is not None:
+            valido_ate = min(valido_ate, exp)
+        cache[chave] = (valor, valido_ate)
+        cache.move_to_end(chave)
+        while len(cache) > self.maximo:
+            cache.popitem(last=False)
+
+    def token(self, token: str):
+        """(username, jti, exp) do token já decodificado, ou None."""
+        with self._lock:
+            return self._obter(self._tokens, token)
+
+    def guardar_token(self, token: str, username: str, jti: str, exp: float):
+        with self._lock:
+            self._guardar(self._tokens, token, (username, jti, exp), exp)
+
+    def usuario(self, username: str, jti: str):
+        with self._lock:
+            usuario = self._obter(self._usuarios, (username, jti))
+        (self.acertos if usuario is not None else self.faltas).inc()
+        return usuario
+
+    def guardar_usuario(self, username: str, jti: str, usuario, exp: float = None):
+        with self._lock:
+            self._guardar(self._usuarios, (username, jti), usuario, exp)
+            tamanho = len(self._usuarios)
+        self.tamanho.set(tamanho)
+
+    def invalidar(self, username: str):
+        """Descarta o usuário (em todos os tokens); a próxima requisição relê o MongoDB."""
+        with self._lock:
+            for chave in [c for c in self._usuarios if c[0] == username]:
+                del self._usuarios[chave]
+            tamanho = len(self._usuarios)
+        self.tamanho.set(tamanho)
@@ -0,0 +1,109 @@
+"""
+Transmissão de presenças em tempo real para os dashboards (WebSocket /ws/presencas).
+
+Um único consumidor aio_pika por processo lê o exchange fanout de eventos
+(comum.eventos) por uma fila exclusiva e distribui cada evento aos clientes
+conectados, sem consultar o MongoDB. Cada cliente tem um buffer limitado
+(TRANSMISSAO_BUFFER eventos): se ele não consome a tempo, os eventos mais antigos
+são descartados e a próxima mensagem informa quantos foram perdidos.
+"""
+import asyncio
+import json
+import logging
+import os
+
+import aio_pika
+
+from comum import metricas
+
+TRANSMISSAO_BUFFER = int(os.getenv("TRANSMISSAO_BUFFER", 500))
+TRANSMISSAO_LOTE_MAX = int(os.getenv("TRANSMISSAO_LOTE_MAX", 100))  # eventos por mensagem enviada
+TRANSMISSAO_RECONEXAO = float(os.getenv("TRANSMISSAO_RECONEXAO", 5))
+
+logger = logging.getLogger("server")
+
+
+class ClienteTransmissao:
+    """Buffer limitado de eventos de um cliente, com filtro opcional por tag_video."""
+
+    def __init__(self, tag_video: str = None, buffer: int = TRANSMISSAO_BUFFER):
+        self.tag_video = tag_video
+        self.fila = asyncio.Queue(maxsize=buffer)
+        self.descartados = 0
+
+    def entregar(self, evento: dict) -> bool:
+        """Enfileira o evento (se passar no filtro); retorna False se outro precisou ser descartado."""
+        if self.tag_video and evento.get("tag_video") != self.tag_video:
+            return True
+        descartou = False
+        if self.fila.full():
+            self.fila.get_nowait()
+            self.descartados += 1
+            descartou = True
+        self.fila.put_nowait(evento)
+        return not descartou
+
+    async def proximos(self, maximo: int = TRANSMISSAO_LOTE_MAX):
+        """Aguarda ao menos um evento e retorna (eventos disponíveis, descartados desde a última chamada)."""
+        eventos = [await self.fila.get()]
+        while len(eventos) < maximo and not self.fila.empty():
+            eventos.append(self.fila.get_nowait())
+        descartados, self.descartados = self.descartados, 0
+        return eventos, descartados
+
+
+class TransmissorPresencas:
+    """Consome o exchange de eventos e repassa aos clientes registrados."""
+
+    def __init__(self, url: str, exchange: str, preparar=None):
+        self.url = url
+        self.exchange = exchange
+        # Aplicado uma vez por evento, antes da distribuição (ex.: assinar a URL da foto)
+        self.preparar = preparar
+        self.clientes = set()
+
+        self.conectados = metricas.medidor("transmissao_clientes", "Dashboards conectados em /ws/presencas")
+        self.eventos = metricas.contador("transmissao_eventos_total", "Eventos de presença recebidos do RabbitMQ")
+        self.descartes = metricas.contador("transmissao_descartados_total", "Eventos descartados por buffer cheio")
+
+    def registrar(self, tag_video: str = None) -> ClienteTransmissao:
+        cliente = ClienteTransmissao(tag_video)
+        self.clientes.add(cliente)
+        self.conectados.set(len(self.clientes))
+        return cliente
+
+    def remover(self, cliente: ClienteTransmissao):
+        self.clientes.discard(cliente)
+        self.conectados.set(len(self.clientes))
+
+    async def executar(self):
+        """Mantém a assinatura do exchange, reconectando se o RabbitMQ estiver indisponível."""
+        while True:
+            try:
+                conexao = await aio_pika.connect_robust(self.url)
+                canal = await conexao.channel()
+                exchange = await canal.declare_exchange(self.exchange, aio_pika.ExchangeType.FANOUT, durable=True)
+                fila = await canal.declare_queue(exclusive=True, auto_delete=True)
+                await fila.bind(exchange)
+                await fila.consume(self._receber, no_ack=True)
+                logger.info(f"📡 Transmissão de presenças assinando '{self.exchange}'")
+                await asyncio.Future()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Transmissão de presenças sem RabbitMQ: {e}")
+                await asyncio.sleep(TRANSMISSAO_RECONEXAO)
+
+    async def _receber(self, message: aio_pika.IncomingMessage):
+        try:
+            eventos = json.loads(message.body.decode())["presencas"]
+        except Exception as e:
+            logger.error(f"❌ Evento de presença inválido: {e}")
+            return
+        if self.preparar is not None:
+            eventos = self.preparar(eventos)
+        self.eventos.inc(len(eventos))
+        for cliente in list(self.clientes):
+            for evento in eventos:
+                if not cliente.entregar(evento):
+                    self.descartes.inc()
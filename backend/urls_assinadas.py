@@ -0,0 +1,119 @@
+"""
+URLs pré-assinadas (AWS Signature V4, query string) para objetos do MinIO.
+
+Em vez de chamar o SDK do MinIO a cada foto:
+  - a chave de assinatura derivada (HMAC de data/região/serviço) é calculada uma vez por dia;
+  - lotes de objetos são assinados com o mesmo carimbo de tempo;
+  - cada URL fica em um cache TTL (chave = caminho normalizado) e é reaproveitada
+    até `margem` segundos antes de expirar.
+"""
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from comum import metricas
+
+ALGORITMO = "AWS4-HMAC-SHA256"
+
+
+def _hmac(chave: bytes, mensagem: str) -> bytes:
+    return hmac.new(chave, mensagem.encode("utf-8"), hashlib.sha256).digest()
+
+
+class AssinadorURLs:
+    """Gera e reaproveita URLs pré-assinadas de GET; thread-safe."""
+
+    def __init__(self, endpoint: str, access_key: str, secret_key: str, bucket: str,
+                 regiao: str = "us-east-1", seguro: bool = False, expiracao: int = 600,
+                 margem: int = 60, cache_max: int = 50000):
+        self.host = endpoint
+        self.esquema = "https" if seguro else "http"
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.bucket = bucket
+        self.regiao = regiao
+        self.expiracao = expiracao
+        self.margem = margem
+        self.cache_max = cache_max
+
+        self._cache = OrderedDict()  # caminho -> (url, válida até)
+        self._chave_assinatura = (None, None)  # (data, chave)
+        self._lock = threading.Lock()
+
+        self.acertos = metricas.contador("presign_cache_acertos_total", "URLs pré-assinadas servidas do cache")
+        self.faltas = metricas.contador("presign_cache_faltas_total", "URLs pré-assinadas geradas")
+        self.taxa_acerto = metricas.medidor("presign_cache_taxa_acerto", "Fração de URLs servidas do cache")
+        self.tamanho = metricas.medidor("presign_cache_tamanho", "URLs pré-assinadas em cache")
+        self._total_acertos = 0
+        self._total_consultas = 0
+
+    def _chave(self, data: str) -> bytes:
+        data_atual, chave = self._chave_assinatura
+        if data_atual != data:
+            chave = _hmac(("AWS4" + self.secret_key).encode("utf-8"), data)
+            chave = _hmac(chave, self.regiao)
+            chave = _hmac(chave, "s3")
+            chave = _hmac(chave, "aws4_request")
+            self._chave_assinatura = (data, chave)
+        return chave
+
+    def _assinar(self, caminho: str, agora: datetime, chave: bytes) -> str:
+        carimbo = agora.strftime("%Y%m%dT%H%M%SZ")
+        data = carimbo[:8]
+        escopo = f"{data}/{self.regiao}/s3/aws4_request"
+        uri = f"/{self.bucket}/{quote(caminho, safe='/~')}"
+        parametros = sorted({
+            "X-Amz-Algorithm": ALGORITMO,
+            "X-Amz-Credential": f"{self.access_key}/{escopo}",
+            "X-Amz-Date": carimbo,
+            "X-Amz-Expires": str(self.expiracao),
+            "X-Amz-SignedHeaders": "host",
+        }.items())
+        consulta = "&".join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in parametros)
+        requisicao = f"GET\n{uri}\n{consulta}\nhost:{self.host}\n\nhost\nUNSIGNED-PAYLOAD"
+        texto = f"{ALGORITMO}\n{carimbo}\n{escopo}\n{hashlib.sha256(requisicao.encode('utf-8')).hexdigest()}"
+        assinatura = hmac.new(chave, texto.encode("utf-8"), hashlib.sha256).hexdigest()
+        return f"{self.esquema}://{self.host}{uri}?{consulta}&X-Amz-Signature={assinatura}"
+
+    def urls(self, caminhos: list) -> list:
+        """URLs para uma lista de caminhos já normalizados (um único carimbo de tempo por lote)."""
+        agora = time.time()
+        resultado = []
+        with self._lock:
+            momento = None
+            chave = None
+            acertos = 0
+            for caminho in caminhos:
+                em_cache = self._cache.get(caminho)
+                if em_cache and em_cache[1] > agora:
+                    self._cache.move_to_end(caminho)
+                    resultado.append(em_cache[0])
+                    acertos += 1
+                    continue
+                if momento is None:
+                    momento = datetime.fromtimestamp(agora, tz=timezone.utc)
+                    chave = self._chave(momento.strftime("%Y%m%d"))
+                url = self._assinar(caminho, momento, chave)
+                self._cache[caminho] = (url, agora + self.expiracao - self.margem)
+                self._cache.move_to_end(caminho)
+                resultado.append(url)
+            while len(self._cache) > self.cache_max:
+                self._cache.popitem(last=False)
+
+            self._total_acertos += acertos
+            self._total_consultas += len(caminhos)
+            tamanho = len(self._cache)
+            taxa = self._total_acertos / self._total_consultas if self._total_consultas else 0.0
+
+        self.acertos.inc(acertos)
+        self.faltas.inc(len(caminhos) - acertos)
+        self.taxa_acerto.set(taxa)
+        self.tamanho.set(tamanho)
+        return resultado
+
+    def url(self, caminho: str) -> str:
+        return self.urls([caminho])[0]
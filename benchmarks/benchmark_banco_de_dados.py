@@ -0,0 +1,85 @@
+"""
+Benchmark de inserção sustentada do worker banco_de_dados.
+
+Gera mensagens sintéticas de reconhecimento (várias faces por frame) e as grava
+com `gravar_lote`, comparando lotes de 1 mensagem (equivalente ao fluxo antigo,
+uma mensagem por vez) com o tamanho de lote configurado. Usa um banco separado,
+removido ao final.
+
+Uso:
+    python benchmarks/benchmark_banco_de_dados.py --mensagens 20000 --lote 200
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def gerar_mensagens(quantidade: int, faces_por_frame: int, tag_video: str) -> list:
+    agora = datetime.now().timestamp()
+    msgs = []
+    frame_uuid = None
+    for i in range(quantidade):
+        if i % faces_por_frame == 0:
+            frame_uuid = str(uuid.uuid4())
+        msgs.append({
+            "data_captura_frame": datetime.now().strftime("%d-%m-%Y"),
+            "reconhecimento_path": f"{uuid.uuid4()}/face_{i}.png",
+            "uuid": str(uuid.uuid4()),
+            "tags": [],
+            "inicio_processamento": agora,
+            "tempo_captura_frame": 0.01,
+            "tempo_deteccao": 0.05,
+            "tempo_reconhecimento": 0.2,
+            "tag_video": tag_video,
+            "timestamp": agora,
+            "frame_uuid": frame_uuid,
+            "frame_total_faces": faces_por_frame,
+            "fps": 20,
+            "duracao": None,
+            "tempo_espera_captura_deteccao": 0.1,
+            "tempo_espera_deteccao_reconhecimento": 0.1,
+        })
+    return msgs
+
+
+def medir(banco, msgs: list, tamanho_lote: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(0, len(msgs), tamanho_lote):
+        banco.gravar_lote(msgs[i:i + tamanho_lote])
+    return len(msgs) / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mensagens", type=int, default=20000)
+    parser.add_argument("--lote", type=int, default=200)
+    parser.add_argument("--faces-por-frame", type=int, default=4)
+    parser.add_argument("--banco", default="benchmark_banco_de_dados")
+    parser.add_argument("--manter", action="store_true", help="Não remove o banco de benchmark ao final")
+    args = parser.parse_args()
+
+    # O worker lê MONGO_DB_NAME na importação; load_dotenv não sobrescreve o valor definido aqui
+    os.environ["MONGO_DB_NAME"] = args.banco
+    sys.path.append(os.path.join(RAIZ, "workers", "banco_de_dados"))
+    import banco_de_dados as banco
+
+    try:
+        individual = min(args.mensagens, 2000)
+        taxa_individual = medir(banco, gerar_mensagens(individual, args.faces_por_frame, "bench_individual"), 1)
+        taxa_lote = medir(banco, gerar_mensagens(args.mensagens, args.faces_por_frame, "bench_lote"), args.lote)
+
+        print(f"📊 Mensagem a mensagem ({individual} msgs): {taxa_individual:,.0f} msgs/s")
+        print(f"📊 Em lotes de {args.lote} ({args.mensagens} msgs): {taxa_lote:,.0f} msgs/s")
+        print(f"🚀 Ganho: {taxa_lote / taxa_individual:.1f}x")
+    finally:
+        if not args.manter:
+            banco.client.drop_database(args.banco)
+
+
+if __name__ == "__main__":
+    main()
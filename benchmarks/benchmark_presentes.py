@@ -0,0 +1,222 @@
+"""
+Benchmark de /presentes e /frames/estatisticas em um conjunto sintético grande.
+
+Cria (em um banco separado, removido ao final) pessoas com fotos e embeddings,
+N presenças (padrão: 1 milhão) distribuídas entre dias e vídeos e os frames
+correspondentes; reconstrói os agregados e compara, por rota:
+
+  /presentes
+    - original:      $group em `presencas` + pessoas inteiras por $in + junção com next() (O(n²));
+    - dois passos:   totais de `presencas_pessoa_dia` + resumos das pessoas por $in;
+    - pipeline:      comum.agregados.ler_presentes ($lookup projetado, uma ida ao servidor).
+  /frames/estatisticas
+    - original:      quatro consultas em `frames` (mín/máx sem filtro de tag_video);
+    - pipeline:      comum.agregados.ler_estatisticas sobre `estatisticas_video`.
+
+Uso:
+    python benchmarks/benchmark_presentes.py --presencas 1000000 --pessoas 5000 --dias 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(RAIZ)
+from comum.agregados import ler_estatisticas, ler_presentes, reconstruir  # noqa: E402
+from comum.esquema import garantir_indices  # noqa: E402
+
+LOTE_INSERCAO = 10000
+
+
+def gerar_pessoas(quantidade: int, fotos: int, dimensao: int) -> list:
+    documentos = []
+    for _ in range(quantidade):
+        id_pessoa = str(uuid.uuid4())
+        documentos.append({
+            "uuid": id_pessoa,
+            "tags": ["visitante"],
+            "image_paths": [f"{id_pessoa}/face_{uuid.uuid4()}.png" for _ in range(fotos)],
+            "embeddings": [[random.random() for _ in range(dimensao)] for _ in range(fotos)],
+            "last_appearance": time.time(),
+        })
+    return documentos
+
+
+def inserir_em_lotes(colecao, documentos):
+    lote = []
+    for documento in documentos:
+        lote.append(documento)
+        if len(lote) >= LOTE_INSERCAO:
+            colecao.insert_many(lote, ordered=False)
+            lote = []
+    if lote:
+        colecao.insert_many(lote, ordered=False)
+
+
+def gerar_presencas(quantidade: int, uuids: list, datas: list, videos: list):
+    """Presenças com distribuição desigual entre pessoas (poucas pessoas com muitas presenças)."""
+    agora = time.time()
+    for i in range(quantidade):
+        indice = min(int(random.paretovariate(1.2)) - 1, len(uuids) - 1)
+        yield {
+            "pessoa": uuids[(indice * 7919 + i % 3) % len(uuids)],
+            "tag_video": random.choice(videos),
+            "data_captura_frame": random.choice(datas),
+            "inicio_processamento": agora + i,
+            "fim_processamento": agora + i + 0.2,
+            "tempo_captura_frame": 0.01,
+            "tempo_deteccao": 0.05,
+            "tempo_reconhecimento": 0.1,
+            "tempo_fila_real": 0.02,
+            "foto_captura": f"{uuids[0]}/presenca_{i}.png",
+        }
+
+
+def gerar_frames(quantidade: int, datas: list, videos: list):
+    for i in range(quantidade):
+        yield {
+            "uuid": str(uuid.uuid4()),
+            "tag_video": videos[i % len(videos)],
+            "data_captura_frame": random.choice(datas),
+            "numero_frame": i // len(videos),
+            "total_faces_detectadas": random.choice((0, 0, 1, 2, 3, 4, 5, 8)),
+            "fps": 30,
+            "duracao": quantidade / len(videos) / 30,
+        }
+
+
+# ----------------------------------------
+# /presentes
+# ----------------------------------------
+def presentes_original(db, data: str, minimo: int) -> list:
+    agrupadas = list(db["presencas"].aggregate([
+        {"$match": {"data_captura_frame": data}},
+        {"$group": {"_id": "$pessoa", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gte": minimo}}},
+    ], allowDiskUse=True))
+    detalhes = db["pessoas"].find({"uuid": {"$in": [p["_id"] for p in agrupadas]}})
+    resultado = []
+    for pessoa in detalhes:
+        total = next((p["count"] for p in agrupadas if p["_id"] == pessoa["uuid"]), 0)
+        resultado.append({"uuid": pessoa["uuid"], "tags": pessoa.get("tags", []),
+                          "primeira_foto": (pessoa.get("image_paths") or [None])[0], "presencas_count": total})
+    resultado.sort(key=lambda p: p["presencas_count"], reverse=True)
+    return resultado
+
+
+def presentes_dois_passos(db, data: str, minimo: int) -> list:
+    totais = list(db["presencas_pessoa_dia"].find(
+        {"data": data, "total": {"$gte": minimo}}, {"_id": 0, "pessoa": 1, "total": 1}
+    ).sort("total", -1))
+    contagens = {p["pessoa"]: p["total"] for p in totais}
+    detalhes = db["pessoas"].find({"uuid": {"$in": list(contagens)}},
+                                  {"_id": 0, "uuid": 1, "tags": 1, "image_paths": {"$slice": 1}})
+    resultado = [{"uuid": p["uuid"], "tags": p.get("tags", []), "primeira_foto": (p.get("image_paths") or [None])[0],
+                  "presencas_count": contagens[p["uuid"]]} for p in detalhes]
+    resultado.sort(key=lambda p: p["presencas_count"], reverse=True)
+    return resultado
+
+
+# ----------------------------------------
+# /frames/estatisticas
+# ----------------------------------------
+def estatisticas_original(db, tag_video: str) -> dict:
+    frames = db["frames"]
+    menor = frames.find_one({"total_faces_detectadas": {"$gte": 1}}, sort=[("total_faces_detectadas", 1)])
+    maior = frames.find_one({}, sort=[("total_faces_detectadas", -1)])
+    return {
+        "total_frames": frames.count_documents({"tag_video": tag_video}),
+        "frames_sem_pessoas": frames.count_documents({"tag_video": tag_video, "total_faces_detectadas": 0}),
+        "menor_qtd_faces_detectadas": menor and menor["total_faces_detectadas"],
+        "maior_qtd_faces_detectadas": maior and maior["total_faces_detectadas"],
+    }
+
+
+def estatisticas_pipeline(db, tag_video: str) -> dict:
+    return next(iter(ler_estatisticas(db, {"tag_video": tag_video}, True)), {})
+
+
+def medir(consulta, repeticoes: int):
+    """(resultado da última execução, ms por execução)."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = consulta()
+    return resultado, (time.perf_counter() - inicio) * 1000 / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--presencas", type=int, default=1_000_000)
+    parser.add_argument("--pessoas", type=int, default=5000)
+    parser.add_argument("--frames", type=int, default=200_000)
+    parser.add_argument("--dias", type=int, default=10)
+    parser.add_argument("--videos", type=int, default=4)
+    parser.add_argument("--fotos", type=int, default=5, help="Fotos (e embeddings) por pessoa")
+    parser.add_argument("--dimensao", type=int, default=128, help="Dimensão de cada embedding")
+    parser.add_argument("--minimo", type=int, default=5, help="min_presencas de /presentes")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--banco", default="benchmark_presentes")
+    parser.add_argument("--manter", action="store_true", help="Não remove o banco de benchmark ao final")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI"))
+    db = client[args.banco]
+
+    try:
+        client.drop_database(args.banco)
+        garantir_indices(db)
+        datas = [(datetime(2025, 1, 1) + timedelta(days=i)).strftime("%d-%m-%Y") for i in range(args.dias)]
+        videos = [f"camera{i + 1}" for i in range(args.videos)]
+
+        inicio = time.perf_counter()
+        pessoas = gerar_pessoas(args.pessoas, args.fotos, args.dimensao)
+        inserir_em_lotes(db["pessoas"], pessoas)
+        uuids = [p["uuid"] for p in pessoas]
+        del pessoas
+        inserir_em_lotes(db["presencas"], gerar_presencas(args.presencas, uuids, datas, videos))
+        inserir_em_lotes(db["frames"], gerar_frames(args.frames, datas, videos))
+        print(f"📦 {args.presencas:,} presenças, {args.pessoas:,} pessoas, {args.frames:,} frames "
+              f"em {args.dias} dias e {args.videos} vídeos ({time.perf_counter() - inicio:.1f} s)")
+
+        inicio = time.perf_counter()
+        reconstruir(db)
+        print(f"🧮 Agregados reconstruídos em {time.perf_counter() - inicio:.1f} s")
+
+        data = datas[0]
+        casos_presentes = [
+            ("original", lambda: presentes_original(db, data, args.minimo)),
+            ("dois passos", lambda: presentes_dois_passos(db, data, args.minimo)),
+            ("pipeline", lambda: ler_presentes(db, data, args.minimo)),
+        ]
+        print(f"\n📊 /presentes (data={data}, min_presencas={args.minimo})")
+        referencia = None
+        for nome, consulta in casos_presentes:
+            resultado, ms = medir(consulta, args.repeticoes)
+            contagens = sorted((p["uuid"], p["presencas_count"]) for p in resultado)
+            referencia = referencia or contagens
+            igual = "✅" if contagens == referencia else "❌ resultado diferente"
+            print(f"   {nome:12s} {ms:9.1f} ms  {len(resultado):,} pessoas {igual}")
+
+        tag_video = videos[0]
+        print(f"\n📊 /frames/estatisticas (tag_video={tag_video})")
+        for nome, consulta in [("original", lambda: estatisticas_original(db, tag_video)),
+                               ("pipeline", lambda: estatisticas_pipeline(db, tag_video))]:
+            resultado, ms = medir(consulta, args.repeticoes)
+            print(f"   {nome:12s} {ms:9.1f} ms  total_frames={resultado.get('total_frames')} "
+                  f"sem_pessoas={resultado.get('frames_sem_pessoas')} "
+                  f"mín/máx={resultado.get('menor_qtd_faces_detectadas')}/{resultado.get('maior_qtd_faces_detectadas')}")
+    finally:
+        if not args.manter:
+            client.drop_database(args.banco)
+
+
+if __name__ == "__main__":
+    main()
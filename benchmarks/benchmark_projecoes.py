@@ -0,0 +1,114 @@
+"""
+Benchmark de bytes trafegados nas consultas de `pessoas` do backend.
+
+Cria pessoas sintéticas (com `image_paths` e `embeddings` do tamanho real do modelo)
+em um banco separado, removido ao final. Cada caso de uso é medido da forma antiga
+(documento inteiro) e pelo `RepositorioPessoas` (projeções, $slice e $size). Os bytes
+são o tamanho BSON dos documentos devolvidos pelo servidor.
+
+Uso:
+    python benchmarks/benchmark_projecoes.py --pessoas 500 --fotos 40 --dimensao 512
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+import bson
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(RAIZ, "backend"))
+from repositorio import RepositorioPessoas  # noqa: E402
+
+
+def gerar_pessoas(quantidade: int, fotos: int, dimensao: int) -> list:
+    documentos = []
+    for _ in range(quantidade):
+        id_pessoa = str(uuid.uuid4())
+        documentos.append({
+            "uuid": id_pessoa,
+            "tags": ["visitante"],
+            "image_paths": [f"{id_pessoa}/face_{uuid.uuid4()}.png" for _ in range(fotos)],
+            "embeddings": [[random.random() for _ in range(dimensao)] for _ in range(fotos)],
+            "last_appearance": time.time(),
+        })
+    return documentos
+
+
+def tamanho(documentos) -> int:
+    if documentos is None:
+        return 0
+    if isinstance(documentos, dict):
+        documentos = [documentos]
+    return sum(len(bson.encode(d)) for d in documentos)
+
+
+def medir(consulta, repeticoes: int):
+    """(bytes devolvidos por execução, ms por execução)."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = consulta()
+    ms = (time.perf_counter() - inicio) * 1000 / repeticoes
+    return tamanho(resultado), ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pessoas", type=int, default=500)
+    parser.add_argument("--fotos", type=int, default=40, help="Fotos (e embeddings) por pessoa")
+    parser.add_argument("--dimensao", type=int, default=512, help="Dimensão de cada embedding")
+    parser.add_argument("--limite", type=int, default=10, help="Tamanho da página de /pessoas")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--banco", default="benchmark_projecoes")
+    parser.add_argument("--manter", action="store_true", help="Não remove o banco de benchmark ao final")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv("MONGO_URI"))
+    pessoas = client[args.banco]["pessoas"]
+    repositorio = RepositorioPessoas(pessoas)
+
+    try:
+        documentos = gerar_pessoas(args.pessoas, args.fotos, args.dimensao)
+        pessoas.insert_many(documentos)
+        pessoas.create_index("uuid")
+        alvo = documentos[0]["uuid"]
+        lote = [d["uuid"] for d in documentos[:20]]
+
+        casos = [
+            ("/pessoas (página)",
+             lambda: list(pessoas.find({}).sort("uuid", 1).limit(args.limite)),
+             lambda: repositorio.listar({}, 0, args.limite)),
+            ("/pessoas/{uuid}",
+             lambda: pessoas.find_one({"uuid": alvo}),
+             lambda: repositorio.resumo(alvo)),
+            ("/pessoas/{uuid}/photos/count",
+             lambda: pessoas.find_one({"uuid": alvo}),
+             lambda: {"total": repositorio.contar_fotos(alvo)}),
+            ("/pessoas/{uuid}/tags",
+             lambda: (pessoas.update_one({"uuid": alvo}, {"$push": {"tags": "bench"}}),
+                      pessoas.find_one({"uuid": alvo}))[1],
+             lambda: repositorio.adicionar_tag(alvo, "bench")),
+            ("/presentes (20 pessoas)",
+             lambda: list(pessoas.find({"uuid": {"$in": lote}})),
+             lambda: repositorio.resumos(lote)),
+        ]
+
+        print(f"📦 {args.pessoas} pessoas, {args.fotos} fotos x {args.dimensao} dimensões cada")
+        for nome, antes, depois in casos:
+            bytes_antes, ms_antes = medir(antes, args.repeticoes)
+            bytes_depois, ms_depois = medir(depois, args.repeticoes)
+            reducao = bytes_antes / bytes_depois if bytes_depois else float("inf")
+            print(f"📊 {nome}: {bytes_antes:,} B ({ms_antes:.1f} ms) -> "
+                  f"{bytes_depois:,} B ({ms_depois:.1f} ms), {reducao:,.0f}x menos bytes")
+    finally:
+        if not args.manter:
+            client.drop_database(args.banco)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Teste de carga do backend: latência de /pessoas com e sem /frames/agrupamentos
+rodando em paralelo.
+
+Mede p50/p95/p99 de /pessoas em duas fases:
+  1. somente /pessoas;
+  2. /pessoas enquanto outros clientes chamam /frames/agrupamentos sem parar.
+Com o acesso ao MongoDB fora do event loop, a fase 2 não deve degradar o p99.
+
+Uso (backend rodando em localhost:8000):
+    python benchmarks/carga_backend.py --usuario admin --senha admin --duracao 20
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+
+def obter_token(url: str, usuario: str, senha: str) -> str:
+    dados = urllib.parse.urlencode({"username": usuario, "password": senha}).encode()
+    with urllib.request.urlopen(urllib.request.Request(f"{url}/token", data=dados)) as resposta:
+        return json.load(resposta)["access_token"]
+
+
+def chamar(url: str, token: str) -> float:
+    requisicao = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    inicio = time.perf_counter()
+    with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+        resposta.read()
+    return time.perf_counter() - inicio
+
+
+def percentil(valores: list, p: float) -> float:
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def rodar_fase(url: str, token: str, clientes: int, clientes_pesados: int, duracao: float) -> dict:
+    fim = time.perf_counter() + duracao
+    latencias, erros, pesadas = [], [0], [0]
+    lock = threading.Lock()
+
+    def cliente_leve():
+        while time.perf_counter() < fim:
+            try:
+                latencia = chamar(f"{url}/pessoas?page=1&limit=10", token)
+                with lock:
+                    latencias.append(latencia)
+            except Exception:
+                with lock:
+                    erros[0] += 1
+
+    def cliente_pesado():
+        while time.perf_counter() < fim:
+            try:
+                chamar(f"{url}/frames/agrupamentos", token)
+                with lock:
+                    pesadas[0] += 1
+            except Exception:
+                with lock:
+                    erros[0] += 1
+
+    threads = [threading.Thread(target=cliente_leve) for _ in range(clientes)]
+    threads += [threading.Thread(target=cliente_pesado) for _ in range(clientes_pesados)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros[0],
+        "agrupamentos": pesadas[0],
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p95_ms": percentil(latencias, 95) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência de /pessoas sob carga de /frames/agrupamentos")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--usuario", default="admin")
+    parser.add_argument("--senha", default="admin")
+    parser.add_argument("--clientes", type=int, default=8, help="Clientes chamando /pessoas")
+    parser.add_argument("--pesados", type=int, default=4, help="Clientes chamando /frames/agrupamentos")
+    parser.add_argument("--duracao", type=float, default=20, help="Segundos por fase")
+    args = parser.parse_args()
+
+    token = obter_token(args.url, args.usuario, args.senha)
+
+    print(f"▶️ Fase 1: {args.clientes} clientes em /pessoas")
+    base = rodar_fase(args.url, token, args.clientes, 0, args.duracao)
+    print(f"▶️ Fase 2: {args.clientes} clientes em /pessoas + {args.pesados} em /frames/agrupamentos")
+    carga = rodar_fase(args.url, token, args.clientes, args.pesados, args.duracao)
+
+    print("\n📊 /pessoas")
+    print(f"{'fase':<28}{'reqs':>8}{'erros':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for nome, r in (("sozinho", base), ("com /frames/agrupamentos", carga)):
+        print(f"{nome:<28}{r['requisicoes']:>8}{r['erros']:>8}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+    print(f"\n/frames/agrupamentos concluídos na fase 2: {carga['agrupamentos']}")
+
+
+if __name__ == "__main__":
+    main()
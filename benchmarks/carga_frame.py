@@ -0,0 +1,116 @@
+"""
+Teste de carga de POST /frame (faces detectadas no navegador).
+
+Vários clientes enviam, sem parar, frames com N faces sintéticas (PNG) em multipart
+ou em JSON/base64. Ao final mostra as faces aceitas por segundo, quantas requisições
+foram recusadas com 429 (contrapressão da fila `deteccoes`) e a latência das aceitas.
+
+Uso (backend rodando em localhost:8000):
+    python benchmarks/carga_frame.py --clientes 16 --faces 4 --duracao 20
+    python benchmarks/carga_frame.py --formato json
+"""
+import argparse
+import base64
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from io import BytesIO
+
+from PIL import Image
+
+from carga_backend import obter_token, percentil
+
+
+def gerar_face(tamanho: int) -> bytes:
+    saida = BytesIO()
+    Image.frombytes("RGB", (tamanho, tamanho), os.urandom(tamanho * tamanho * 3)).save(saida, format="PNG")
+    return saida.getvalue()
+
+
+def corpo_multipart(faces: list, timestamp: int):
+    fronteira = uuid.uuid4().hex
+    partes = [
+        f'--{fronteira}\r\nContent-Disposition: form-data; name="timestamp"\r\n\r\n{timestamp}\r\n'.encode(),
+        f'--{fronteira}\r\nContent-Disposition: form-data; name="tag_video"\r\n\r\ncarga_frame\r\n'.encode(),
+    ]
+    for i, face in enumerate(faces):
+        partes.append(
+            f'--{fronteira}\r\nContent-Disposition: form-data; name="faces"; filename="face_{i}.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n'.encode() + face + b"\r\n"
+        )
+    partes.append(f"--{fronteira}--\r\n".encode())
+    return b"".join(partes), f"multipart/form-data; boundary={fronteira}"
+
+
+def corpo_json(faces: list, timestamp: int):
+    imagens = [{"image": base64.b64encode(face).decode(), "timestamp": timestamp} for face in faces]
+    return json.dumps({"images": imagens}).encode(), "application/json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--usuario", default="admin")
+    parser.add_argument("--senha", default="admin")
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--faces", type=int, default=4, help="Faces por frame")
+    parser.add_argument("--tamanho", type=int, default=112, help="Lado de cada face, em pixels")
+    parser.add_argument("--formato", choices=("multipart", "json"), default="multipart")
+    parser.add_argument("--duracao", type=float, default=20)
+    args = parser.parse_args()
+
+    token = obter_token(args.url, args.usuario, args.senha)
+    faces = [gerar_face(args.tamanho) for _ in range(args.faces)]
+    montar = corpo_multipart if args.formato == "multipart" else corpo_json
+
+    fim = time.perf_counter() + args.duracao
+    latencias, aceitas, recusadas, erros = [], [0], [0], [0]
+    lock = threading.Lock()
+
+    def cliente():
+        while time.perf_counter() < fim:
+            corpo, tipo = montar(faces, int(time.time() * 1000))
+            requisicao = urllib.request.Request(
+                f"{args.url}/frame", data=corpo,
+                headers={"Authorization": f"Bearer {token}", "Content-Type": tipo})
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+                    total = json.load(resposta)["faces_aceitas"]
+                with lock:
+                    latencias.append(time.perf_counter() - inicio)
+                    aceitas[0] += total
+            except urllib.error.HTTPError as e:
+                with lock:
+                    if e.code == 429:
+                        recusadas[0] += 1
+                    else:
+                        erros[0] += 1
+                if e.code == 429:
+                    time.sleep(float(e.headers.get("Retry-After", 1)))
+            except Exception:
+                with lock:
+                    erros[0] += 1
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=cliente) for _ in range(args.clientes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+
+    print(f"📊 POST /frame ({args.formato}, {args.clientes} clientes, {args.faces} faces de "
+          f"{args.tamanho}px por frame, {decorrido:.1f}s)")
+    print(f"   faces aceitas: {aceitas[0]} ({aceitas[0] / decorrido:,.1f} faces/s)")
+    print(f"   frames aceitos: {len(latencias)}, recusados (429): {recusadas[0]}, erros: {erros[0]}")
+    print(f"   latência dos aceitos: p50 {percentil(latencias, 50) * 1000:.1f} ms, "
+          f"p95 {percentil(latencias, 95) * 1000:.1f} ms, p99 {percentil(latencias, 99) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
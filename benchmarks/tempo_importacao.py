@@ -0,0 +1,113 @@
+"""
+Orçamento de tempo de importação do backend (partida a frio).
+
+Importa `server` em um processo novo com `python -X importtime`, soma o tempo
+cumulativo dos módulos de primeiro nível e falha (código de saída 1) se passar do
+orçamento ou se algum módulo pesado proibido for carregado na importação (eles
+devem ser importados só quando usados, como o matplotlib em graficos.py e o NumPy
+em series.py).
+
+A importação não conecta ao MongoDB, ao MinIO nem ao RabbitMQ (índices e
+transmissão começam no evento de startup), então não precisa dos serviços no ar.
+
+Uso:
+    python benchmarks/tempo_importacao.py
+    python benchmarks/tempo_importacao.py --orcamento-ms 1000 --repeticoes 5 --top 15
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+IMPORTACAO_ORCAMENTO_MS = float(os.getenv("IMPORTACAO_ORCAMENTO_MS", 1500))
+PROIBIDOS = ("deepface", "tensorflow", "tf_keras", "keras", "torch", "cv2", "mediapipe", "matplotlib", "numpy", "pyarrow")
+
+# Variáveis mínimas para o módulo importar fora do docker-compose (só se ausentes)
+AMBIENTE_PADRAO = {
+    "MINIO_ENDPOINT": "localhost:9000",
+    "MINIO_ACCESS_KEY": "minioadmin",
+    "MINIO_SECRET_KEY": "minioadmin",
+    "MINIO_BUCKET": "reconhecimento",
+    "MONGO_URI": "mongodb://localhost:27017",
+    "MONGO_DB_NAME": "tempo_importacao",
+    "SECRET_KEY": "tempo_importacao",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+}
+
+
+def medir(ambiente: dict):
+    """Uma importação a frio de `server`: (ms de parede, {módulo: (self_us, cumulativo_us, nível)})."""
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND, env=ambiente, capture_output=True, text=True,
+    )
+    parede_ms = (time.perf_counter() - inicio) * 1000
+    if processo.returncode != 0:
+        erro = [linha for linha in processo.stderr.splitlines() if not linha.startswith("import time:")]
+        raise RuntimeError("falha ao importar server:\n" + "\n".join(erro[-20:]))
+
+    modulos = {}
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "[us]" in linha:
+            continue
+        proprio, cumulativo, nome = linha[len("import time:"):].split("|", 2)
+        nivel = (len(nome) - len(nome.lstrip(" "))) // 2
+        modulos[nome.strip()] = (int(proprio), int(cumulativo), nivel)
+    return parede_ms, modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação do backend e aplica um orçamento")
+    parser.add_argument("--orcamento-ms", type=float, default=IMPORTACAO_ORCAMENTO_MS,
+                        help="Tempo máximo de importação (mediana das repetições)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Módulos de primeiro nível mais lentos a listar")
+    args = parser.parse_args()
+
+    ambiente = dict(os.environ)
+    for nome, valor in AMBIENTE_PADRAO.items():
+        ambiente.setdefault(nome, valor)
+    diretorio_imagens = tempfile.mkdtemp(prefix="tempo_importacao_")
+    ambiente.setdefault("IMAGES_DIR", diretorio_imagens)
+    ambiente["PYTHONDONTWRITEBYTECODE"] = "1"
+
+    # A primeira execução só aquece os .pyc e o cache de disco; não entra na mediana
+    medir(ambiente)
+    tempos, paredes = [], []
+    for _ in range(max(1, args.repeticoes)):
+        parede_ms, modulos = medir(ambiente)
+        tempos.append(sum(c for _, c, nivel in modulos.values() if nivel == 0) / 1000)
+        paredes.append(parede_ms)
+    shutil.rmtree(diretorio_imagens, ignore_errors=True)  # server cria IMAGES_DIR/plots na importação
+
+    print(f"📦 Módulos importados: {len(modulos)}")
+    print(f"⏱️ Importação (mediana de {len(tempos)}): {statistics.median(tempos):.0f} ms "
+          f"| processo completo: {statistics.median(paredes):.0f} ms | orçamento: {args.orcamento_ms:.0f} ms")
+    print(f"\n🐢 {args.top} módulos de primeiro nível mais lentos (cumulativo):")
+    primeiro_nivel = sorted(((c, nome) for nome, (_, c, nivel) in modulos.items() if nivel == 0), reverse=True)
+    for cumulativo, nome in primeiro_nivel[:args.top]:
+        print(f"   {cumulativo / 1000:8.1f} ms  {nome}")
+
+    proibidos = sorted(nome for nome in modulos if nome.split(".")[0] in PROIBIDOS)
+    falhou = False
+    if proibidos:
+        raizes = sorted({nome.split(".")[0] for nome in proibidos})
+        print(f"\n❌ Módulos pesados carregados na importação: {', '.join(raizes)}")
+        falhou = True
+    if statistics.median(tempos) > args.orcamento_ms:
+        print(f"\n❌ Importação acima do orçamento ({statistics.median(tempos):.0f} ms > {args.orcamento_ms:.0f} ms)")
+        falhou = True
+    if not falhou:
+        print("\n✅ Importação dentro do orçamento")
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Módulos compartilhados entre o backend e os workers.
@@ -0,0 +1,407 @@
+"""
+Agregados materializados para os dashboards, mantidos incrementalmente pelos
+workers à medida que frames e presenças são gravados.
+
+Coleções:
+  - estatisticas_video: um documento por (tag_video, data) com contagem de frames,
+    frames vazios, mín/máx de faces detectadas e somatórios de tempos;
+  - presencas_pessoa_dia: um documento por (data, pessoa) com o total de presenças;
+  - pessoas_video_dia: um documento por (tag_video, data, pessoa) com o total de presenças,
+    de onde sai a contagem de pessoas distintas (sem arrays que crescem no documento do vídeo);
+  - versoes: contadores incrementados a cada alteração (invalidação de caches de leitura).
+
+Para recalcular tudo a partir de `frames` e `presencas`:
+    python -m comum.agregados --reconstruir
+"""
+import argparse
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+ESTATISTICAS_VIDEO = "estatisticas_video"
+PRESENCAS_PESSOA_DIA = "presencas_pessoa_dia"
+PESSOAS_VIDEO_DIA = "pessoas_video_dia"
+VERSOES = "versoes"
+SUFIXO_RECONSTRUCAO = "_reconstrucao"  # coleções temporárias de reconstruir()
+
+
+def _chave_video(tag_video, data) -> dict:
+    # O $merge da reconstrução não aceita chaves nulas; valores ausentes viram ""
+    return {"tag_video": tag_video or "", "data": data or ""}
+
+
+def garantir_indices_agregados(db, sufixo: str = ""):
+    db[ESTATISTICAS_VIDEO + sufixo].create_index([("tag_video", ASCENDING), ("data", ASCENDING)], unique=True)
+    db[PRESENCAS_PESSOA_DIA + sufixo].create_index([("data", ASCENDING), ("pessoa", ASCENDING)], unique=True)
+    db[PRESENCAS_PESSOA_DIA + sufixo].create_index([("data", ASCENDING), ("total", DESCENDING)])
+    db[PESSOAS_VIDEO_DIA + sufixo].create_index(
+        [("tag_video", ASCENDING), ("data", ASCENDING), ("pessoa", ASCENDING)], unique=True)
+    db[PESSOAS_VIDEO_DIA + sufixo].create_index([("pessoa", ASCENDING)])
+
+
+def incrementar_versao(db, nome: str):
+    db[VERSOES].update_one({"_id": nome}, {"$inc": {"versao": 1}}, upsert=True)
+
+
+def versao(db, nome: str) -> int:
+    """Versão atual de `nome`; muda sempre que os dados correspondentes são alterados."""
+    doc = db[VERSOES].find_one({"_id": nome})
+    return doc["versao"] if doc else 0
+
+
+def versao_filtro(db, filtro: dict) -> tuple:
+    """
+    Versão dos documentos de `estatisticas_video` que atendem ao filtro (tag_video e/ou data):
+    muda quando entram ou saem presenças ou frames desses vídeos e dias, e só deles.
+    """
+    doc = next(db[ESTATISTICAS_VIDEO].aggregate([
+        {"$match": filtro},
+        {"$group": {
+            "_id": None,
+            "documentos": {"$sum": 1},
+            "total_presencas": {"$sum": "$total_presencas"},
+            "total_frames": {"$sum": "$total_frames"},
+            "atualizado_em": {"$max": "$atualizado_em"},
+        }},
+    ]), {})
+    return tuple(doc.get(campo) for campo in ("documentos", "total_presencas", "total_frames", "atualizado_em"))
+
+
+# ----------------------------------------
+# Atualização incremental
+# ----------------------------------------
+def atualizar_frames(db, frames: list):
+    """Contabiliza frames recém-inseridos (cada frame entra uma única vez, na inserção)."""
+    operacoes = []
+    for frame in frames:
+        faces = frame["total_faces_detectadas"]
+        atualizacao = {
+            "$inc": {
+                "total_frames": 1,
+                "frames_sem_pessoas": 1 if faces == 0 else 0,
+                "total_faces_detectadas": faces,
+            },
+            "$set": {"fps": frame.get("fps"), "duracao": frame.get("duracao"), "atualizado_em": datetime.now().timestamp()},
+        }
+        if faces >= 1:
+            atualizacao["$min"] = {"menor_qtd_faces_detectadas": faces}
+            atualizacao["$max"] = {"maior_qtd_faces_detectadas": faces}
+        operacoes.append(UpdateOne(
+            _chave_video(frame.get("tag_video"), frame.get("data_captura_frame")), atualizacao, upsert=True))
+    if operacoes:
+        db[ESTATISTICAS_VIDEO].bulk_write(operacoes, ordered=False)
+
+
+def atualizar_presencas(db, presencas: list):
+    """Acumula os documentos de presença recém-inseridos por (tag_video, data), por (data, pessoa) e por (tag_video, data, pessoa)."""
+    por_video = {}
+    por_pessoa = defaultdict(int)
+    por_pessoa_video = defaultdict(int)
+    for p in presencas:
+        chave = (p.get("tag_video"), p.get("data_captura_frame"))
+        acumulado = por_video.setdefault(chave, {
+            "total_presencas": 0, "soma_tempo_processamento": 0.0, "soma_tempo_fila": 0.0,
+            "soma_tempo_deteccao": 0.0, "soma_tempo_reconhecimento": 0.0,
+        })
+        deteccao = float(p.get("tempo_deteccao") or 0)
+        reconhecimento = float(p.get("tempo_reconhecimento") or 0)
+        acumulado["total_presencas"] += 1
+        acumulado["soma_tempo_processamento"] += float(p.get("tempo_captura_frame") or 0) + deteccao + reconhecimento
+        acumulado["soma_tempo_fila"] += float(p.get("tempo_fila_real") or 0)
+        acumulado["soma_tempo_deteccao"] += deteccao
+        acumulado["soma_tempo_reconhecimento"] += reconhecimento
+        if p.get("pessoa"):
+            por_pessoa[(p.get("data_captura_frame") or "", p["pessoa"])] += 1
+            por_pessoa_video[chave + (p["pessoa"],)] += 1
+
+    agora = datetime.now().timestamp()
+    operacoes = [
+        UpdateOne(_chave_video(tag_video, data), {"$inc": acumulado, "$set": {"atualizado_em": agora}}, upsert=True)
+        for (tag_video, data), acumulado in por_video.items()
+    ]
+    if operacoes:
+        db[ESTATISTICAS_VIDEO].bulk_write(operacoes, ordered=False)
+
+    operacoes = [
+        UpdateOne({"data": data, "pessoa": pessoa}, {"$inc": {"total": total}}, upsert=True)
+        for (data, pessoa), total in por_pessoa.items()
+    ]
+    if operacoes:
+        db[PRESENCAS_PESSOA_DIA].bulk_write(operacoes, ordered=False)
+    operacoes = [
+        UpdateOne({**_chave_video(tag_video, data), "pessoa": pessoa}, {"$inc": {"total": total}}, upsert=True)
+        for (tag_video, data, pessoa), total in por_pessoa_video.items()
+    ]
+    if operacoes:
+        db[PESSOAS_VIDEO_DIA].bulk_write(operacoes, ordered=False)
+    if presencas:
+        incrementar_versao(db, "presencas")
+
+
+def descontar_presencas(db, presencas: list):
+    """
+    Desfaz, em lote, a contribuição de presenças excluídas. Uma pessoa cujo total em
+    (tag_video, data) chega a zero deixa de contar entre as pessoas distintas do vídeo.
+    """
+    por_video = {}
+    por_pessoa = defaultdict(int)
+    por_pessoa_video = defaultdict(int)
+    for p in presencas:
+        chave = (p.get("tag_video"), p.get("data_captura_frame"))
+        acumulado = por_video.setdefault(chave, {
+            "total_presencas": 0, "soma_tempo_processamento": 0.0, "soma_tempo_fila": 0.0,
+            "soma_tempo_deteccao": 0.0, "soma_tempo_reconhecimento": 0.0,
+        })
+        deteccao = float(p.get("tempo_deteccao") or 0)
+        reconhecimento = float(p.get("tempo_reconhecimento") or 0)
+        acumulado["total_presencas"] -= 1
+        acumulado["soma_tempo_processamento"] -= float(p.get("tempo_captura_frame") or 0) + deteccao + reconhecimento
+        acumulado["soma_tempo_fila"] -= float(p.get("tempo_fila_real") or 0)
+        acumulado["soma_tempo_deteccao"] -= deteccao
+        acumulado["soma_tempo_reconhecimento"] -= reconhecimento
+        if p.get("pessoa"):
+            por_pessoa[(p.get("data_captura_frame") or "", p["pessoa"])] -= 1
+            por_pessoa_video[chave + (p["pessoa"],)] -= 1
+
+    operacoes = [
+        UpdateOne(_chave_video(tag_video, data), {"$inc": acumulado})
+        for (tag_video, data), acumulado in por_video.items()
+    ]
+    if operacoes:
+        db[ESTATISTICAS_VIDEO].bulk_write(operacoes, ordered=False)
+    operacoes = [
+        UpdateOne({"data": data, "pessoa": pessoa}, {"$inc": {"total": total}})
+        for (data, pessoa), total in por_pessoa.items()
+    ]
+    if operacoes:
+        db[PRESENCAS_PESSOA_DIA].bulk_write(operacoes, ordered=False)
+    operacoes = [
+        UpdateOne({**_chave_video(tag_video, data), "pessoa": pessoa}, {"$inc": {"total": total}})
+        for (tag_video, data, pessoa), total in por_pessoa_video.items()
+    ]
+    if operacoes:
+        db[PESSOAS_VIDEO_DIA].bulk_write(operacoes, ordered=False)
+        db[PESSOAS_VIDEO_DIA].delete_many({
+            "pessoa": {"$in": sorted({pessoa for _, _, pessoa in por_pessoa_video})}, "total": {"$lte": 0}})
+    if presencas:
+        incrementar_versao(db, "presencas")
+
+
+def descontar_presenca(db, presenca: dict):
+    """Desfaz a contribuição de uma presença excluída."""
+    descontar_presencas(db, [presenca])
+
+
+def remover_pessoa(db, pessoa: str):
+    """Tira uma pessoa excluída dos agregados (totais por dia e pessoas distintas por vídeo)."""
+    db[PRESENCAS_PESSOA_DIA].delete_many({"pessoa": pessoa})
+    db[PESSOAS_VIDEO_DIA].delete_many({"pessoa": pessoa})
+    incrementar_versao(db, "presencas")
+
+
+# ----------------------------------------
+# Leitura
+# ----------------------------------------
+def _frame_exemplo(campo_qtd: str, destino: str) -> list:
+    """Estágios que anexam o uuid de um frame da tag com a quantidade de faces em `campo_qtd`."""
+    return [
+        {"$lookup": {
+            "from": "frames",
+            "let": {"tag": "$tag_video", "qtd": f"${campo_qtd}"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$tag_video", "$$tag"]}, {"$eq": ["$total_faces_detectadas", "$$qtd"]},
+                ]}}},
+                {"$limit": 1},
+                {"$project": {"_id": 0, "uuid": 1}},
+            ],
+            "as": destino,
+        }},
+        {"$addFields": {destino: {"$arrayElemAt": [f"${destino}.uuid", 0]}}},
+    ]
+
+
+def ler_estatisticas(db, filtro: dict, por_tag: bool = False) -> list:
+    """
+    Combina, em uma única agregação, os documentos de `estatisticas_video` que atendem
+    ao filtro (tag_video e/ou data). Com `por_tag=True` retorna um item por tag_video,
+    já com os uuids de exemplo dos frames com menor e maior quantidade de faces.
+    As pessoas distintas são contadas em `pessoas_video_dia` por um $lookup.
+    """
+    distintas = [{"$match": {**filtro, "total": {"$gt": 0}}}]
+    if por_tag:
+        distintas.append({"$match": {"$expr": {"$eq": ["$tag_video", "$$tag"]}}})
+    distintas += [{"$group": {"_id": "$pessoa"}}, {"$count": "total"}]
+    pipeline = [
+        {"$match": filtro},
+        {"$group": {
+            "_id": "$tag_video" if por_tag else None,
+            "total_frames": {"$sum": "$total_frames"},
+            "frames_sem_pessoas": {"$sum": "$frames_sem_pessoas"},
+            "menor_qtd_faces_detectadas": {"$min": "$menor_qtd_faces_detectadas"},
+            "maior_qtd_faces_detectadas": {"$max": "$maior_qtd_faces_detectadas"},
+            "total_presencas": {"$sum": "$total_presencas"},
+            "tempo_processamento": {"$sum": "$soma_tempo_processamento"},
+            "tempo_fila": {"$sum": "$soma_tempo_fila"},
+            "tempo_deteccao": {"$sum": "$soma_tempo_deteccao"},
+            "tempo_reconhecimento": {"$sum": "$soma_tempo_reconhecimento"},
+            "fps": {"$max": "$fps"},
+            "duracao": {"$max": "$duracao"},
+        }},
+        {"$lookup": {"from": PESSOAS_VIDEO_DIA, "let": {"tag": "$_id"}, "pipeline": distintas, "as": "pessoas"}},
+        {"$addFields": {
+            "tag_video": "$_id",
+            "total_pessoas": {"$ifNull": [{"$arrayElemAt": ["$pessoas.total", 0]}, 0]},
+        }},
+        {"$project": {"_id": 0, "pessoas": 0}},
+        {"$sort": {"tag_video": 1}},
+    ]
+    if por_tag:
+        pipeline += _frame_exemplo("menor_qtd_faces_detectadas", "uuid_menor_qtd")
+        pipeline += _frame_exemplo("maior_qtd_faces_detectadas", "uuid_maior_qtd")
+    return list(db[ESTATISTICAS_VIDEO].aggregate(pipeline))
+
+
+def ler_presentes(db, data: str, minimo: int) -> list:
+    """
+    Pessoas com pelo menos `minimo` presenças em `data`, em ordem decrescente de total,
+    em uma única agregação: os totais vêm de `presencas_pessoa_dia` (índice data/total) e
+    uuid, tags e primeira foto de cada pessoa de um $lookup projetado em `pessoas` (índice uuid).
+    Pessoas já excluídas ficam de fora.
+    """
+    return list(db[PRESENCAS_PESSOA_DIA].aggregate([
+        {"$match": {"data": data, "total": {"$gte": minimo}}},
+        {"$sort": {"total": -1}},
+        {"$lookup": {
+            "from": "pessoas",
+            "let": {"pessoa": "$pessoa"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$uuid", "$$pessoa"]}}},
+                {"$limit": 1},
+                {"$project": {
+                    "_id": 0,
+                    "tags": {"$ifNull": ["$tags", []]},
+                    "primeira_foto": {"$arrayElemAt": [{"$ifNull": ["$image_paths", []]}, 0]},
+                }},
+            ],
+            "as": "detalhes",
+        }},
+        {"$unwind": "$detalhes"},
+        {"$project": {
+            "_id": 0,
+            "uuid": "$pessoa",
+            "tags": "$detalhes.tags",
+            "primeira_foto": "$detalhes.primeira_foto",
+            "presencas_count": "$total",
+        }},
+    ]))
+
+
+# ----------------------------------------
+# Reconstrução a partir dos dados brutos
+# ----------------------------------------
+def reconstruir(db):
+    """
+    Recalcula os agregados a partir de `frames` e `presencas` em coleções temporárias
+    e as troca pelas atuais com renameCollection (dropTarget), de modo que os dashboards
+    nunca leem agregados vazios ou parciais. Como nas somas incrementais, presenças sem
+    pessoa contam no total, mas não em presencas_pessoa_dia nem em pessoas_video_dia.
+
+    Gravações dos workers feitas durante a reconstrução podem ficar de fora da cópia
+    nova; para um resultado exato, rode com os workers parados.
+    """
+    estatisticas, pessoa_dia = ESTATISTICAS_VIDEO + SUFIXO_RECONSTRUCAO, PRESENCAS_PESSOA_DIA + SUFIXO_RECONSTRUCAO
+    pessoa_video = PESSOAS_VIDEO_DIA + SUFIXO_RECONSTRUCAO
+    for colecao in (estatisticas, pessoa_dia, pessoa_video):
+        db[colecao].drop()
+    garantir_indices_agregados(db, SUFIXO_RECONSTRUCAO)
+
+    db["frames"].aggregate([
+        {"$group": {
+            "_id": {"tag_video": {"$ifNull": ["$tag_video", ""]}, "data": {"$ifNull": ["$data_captura_frame", ""]}},
+            "total_frames": {"$sum": 1},
+            "frames_sem_pessoas": {"$sum": {"$cond": [{"$eq": ["$total_faces_detectadas", 0]}, 1, 0]}},
+            "total_faces_detectadas": {"$sum": "$total_faces_detectadas"},
+            "menor_qtd_faces_detectadas": {"$min": {
+                "$cond": [{"$gte": ["$total_faces_detectadas", 1]}, "$total_faces_detectadas", None]}},
+            "maior_qtd_faces_detectadas": {"$max": {
+                "$cond": [{"$gte": ["$total_faces_detectadas", 1]}, "$total_faces_detectadas", None]}},
+            "fps": {"$last": "$fps"},
+            "duracao": {"$last": "$duracao"},
+        }},
+        {"$addFields": {"tag_video": "$_id.tag_video", "data": "$_id.data"}},
+        {"$project": {"_id": 0}},
+        {"$merge": {"into": estatisticas, "on": ["tag_video", "data"],
+                    "whenMatched": "merge", "whenNotMatched": "insert"}},
+    ], allowDiskUse=True)
+
+    db["presencas"].aggregate([
+        {"$group": {
+            "_id": {"tag_video": {"$ifNull": ["$tag_video", ""]}, "data": {"$ifNull": ["$data_captura_frame", ""]}},
+            "total_presencas": {"$sum": 1},
+            "soma_tempo_processamento": {"$sum": {"$add": [
+                {"$toDouble": {"$ifNull": ["$tempo_captura_frame", 0]}},
+                {"$toDouble": {"$ifNull": ["$tempo_deteccao", 0]}},
+                {"$toDouble": {"$ifNull": ["$tempo_reconhecimento", 0]}},
+            ]}},
+            "soma_tempo_fila": {"$sum": {"$toDouble": {"$ifNull": ["$tempo_fila_real", 0]}}},
+            "soma_tempo_deteccao": {"$sum": {"$toDouble": {"$ifNull": ["$tempo_deteccao", 0]}}},
+            "soma_tempo_reconhecimento": {"$sum": {"$toDouble": {"$ifNull": ["$tempo_reconhecimento", 0]}}},
+        }},
+        {"$addFields": {"tag_video": "$_id.tag_video", "data": "$_id.data"}},
+        {"$project": {"_id": 0}},
+        {"$merge": {"into": estatisticas, "on": ["tag_video", "data"],
+                    "whenMatched": "merge", "whenNotMatched": "insert"}},
+    ], allowDiskUse=True)
+
+    db["presencas"].aggregate([
+        {"$match": {"pessoa": {"$nin": [None, ""]}}},
+        {"$group": {"_id": {"data": {"$ifNull": ["$data_captura_frame", ""]}, "pessoa": "$pessoa"}, "total": {"$sum": 1}}},
+        {"$addFields": {"data": "$_id.data", "pessoa": "$_id.pessoa"}},
+        {"$project": {"_id": 0}},
+        {"$merge": {"into": pessoa_dia, "on": ["data", "pessoa"],
+                    "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ], allowDiskUse=True)
+
+    db["presencas"].aggregate([
+        {"$match": {"pessoa": {"$nin": [None, ""]}}},
+        {"$group": {
+            "_id": {"tag_video": {"$ifNull": ["$tag_video", ""]}, "data": {"$ifNull": ["$data_captura_frame", ""]},
+                    "pessoa": "$pessoa"},
+            "total": {"$sum": 1},
+        }},
+        {"$addFields": {"tag_video": "$_id.tag_video", "data": "$_id.data", "pessoa": "$_id.pessoa"}},
+        {"$project": {"_id": 0}},
+        {"$merge": {"into": pessoa_video, "on": ["tag_video", "data", "pessoa"],
+                    "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ], allowDiskUse=True)
+
+    # Troca atômica de cada coleção (os índices acompanham a coleção renomeada)
+    db[estatisticas].rename(ESTATISTICAS_VIDEO, dropTarget=True)
+    db[pessoa_dia].rename(PRESENCAS_PESSOA_DIA, dropTarget=True)
+    db[pessoa_video].rename(PESSOAS_VIDEO_DIA, dropTarget=True)
+    incrementar_versao(db, "presencas")
+
+
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Manutenção dos agregados dos dashboards")
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula os agregados a partir dos dados brutos")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI"))[os.getenv("MONGO_DB_NAME")]
+    if args.reconstruir:
+        reconstruir(db)
+        print("✅ Agregados reconstruídos.")
+    else:
+        garantir_indices_agregados(db)
+        print("✅ Índices dos agregados garantidos.")
+
+
+if __name__ == "__main__":
+    main()
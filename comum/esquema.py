@@ -0,0 +1,150 @@
+"""
+Esquema de índices do MongoDB compartilhado pelo backend e pelos workers.
+
+Cada índice corresponde a um padrão de consulta real (backend/server.py e workers);
+`garantir_indices(db)` é idempotente e é chamado na inicialização de cada processo.
+
+Para conferir que nenhuma consulta conhecida faz COLLSCAN:
+    python -m comum.esquema --verificar
+"""
+import argparse
+import os
+import sys
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from comum.agregados import ESTATISTICAS_VIDEO, PESSOAS_VIDEO_DIA, PRESENCAS_PESSOA_DIA, garantir_indices_agregados
+
+ORDEM_PRESENCAS = [("inicio_processamento", DESCENDING), ("_id", DESCENDING)]
+
+# coleção -> [(chaves, opções)]
+INDICES = {
+    "presencas": [
+        # /presencas: filtros opcionais por tag_video e data, ordenado (e paginado por keyset)
+        # por (inicio_processamento, _id)
+        ([("tag_video", ASCENDING), ("data_captura_frame", ASCENDING),
+          ("inicio_processamento", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("data_captura_frame", ASCENDING), ("inicio_processamento", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("inicio_processamento", DESCENDING), ("_id", DESCENDING)], {}),
+        # presenças de uma pessoa (por dia)
+        ([("pessoa", ASCENDING), ("data_captura_frame", ASCENDING)], {}),
+    ],
+    "frames": [
+        ([("uuid", ASCENDING)], {"unique": True}),  # upserts de comum.frames
+        ([("tag_video", ASCENDING), ("numero_frame", ASCENDING)], {}),  # série de frames por tag
+        ([("tag_video", ASCENDING), ("total_faces_detectadas", ASCENDING)], {}),  # frames de exemplo (mín/máx)
+        ([("lista_presencas", ASCENDING)], {}),  # frames de presenças excluídas (multikey)
+    ],
+    "pessoas": [
+        ([("uuid", ASCENDING)], {}),  # busca por uuid e paginação por keyset
+        ([("last_appearance", DESCENDING)], {}),  # candidatos do reconhecimento, mais recentes primeiro
+    ],
+    "users": [
+        ([("username", ASCENDING)], {}),
+    ],
+}
+
+
+def garantir_indices(db):
+    """Cria (se ainda não existirem) todos os índices do esquema, inclusive os dos agregados."""
+    for colecao, indices in INDICES.items():
+        for chaves, opcoes in indices:
+            db[colecao].create_index(chaves, **opcoes)
+    garantir_indices_agregados(db)
+
+
+# ----------------------------------------
+# Verificação (explain)
+# ----------------------------------------
+def consultas_conhecidas(db):
+    """(nome, função que retorna o explain) de cada consulta usada pelo sistema."""
+    presencas, frames, pessoas = db["presencas"], db["frames"], db["pessoas"]
+    return [
+        ("presencas: página sem filtro",
+         lambda: presencas.find({}).sort(ORDEM_PRESENCAS).limit(10).explain()),
+        ("presencas: página por tag_video",
+         lambda: presencas.find({"tag_video": "x"}).sort(ORDEM_PRESENCAS).limit(10).explain()),
+        ("presencas: página por data",
+         lambda: presencas.find({"data_captura_frame": "01-01-2025"}).sort(ORDEM_PRESENCAS).limit(10).explain()),
+        ("presencas: página por tag_video e data",
+         lambda: presencas.find({"tag_video": "x", "data_captura_frame": "01-01-2025"})
+         .sort(ORDEM_PRESENCAS).limit(10).explain()),
+        ("presencas: página por cursor",
+         lambda: presencas.find({"$or": [
+             {"inicio_processamento": {"$lt": 1.0}}, {"inicio_processamento": 1.0, "_id": {"$lt": ObjectId()}},
+         ]}).sort(ORDEM_PRESENCAS).limit(10).explain()),
+        ("presencas: por pessoa",
+         lambda: presencas.find({"pessoa": "x"}).explain()),
+        ("frames: por uuid",
+         lambda: frames.find({"uuid": "x"}).limit(1).explain()),
+        ("frames: série por tag_video",
+         lambda: frames.find({"tag_video": "x"}).sort("numero_frame", 1).explain()),
+        ("frames: exemplo com N faces",
+         lambda: frames.find({"tag_video": "x", "total_faces_detectadas": 1}).limit(1).explain()),
+        ("frames: que contêm presenças",
+         lambda: frames.find({"lista_presencas": {"$in": [ObjectId()]}}).explain()),
+        ("pessoas: por uuid",
+         lambda: pessoas.find({"uuid": "x"}).limit(1).explain()),
+        ("pessoas: lote de uuids",
+         lambda: pessoas.find({"uuid": {"$in": ["x", "y"]}}).explain()),
+        ("pessoas: página por cursor",
+         lambda: pessoas.find({"uuid": {"$gt": "x"}}).sort("uuid", 1).limit(10).explain()),
+        ("pessoas: candidatos do reconhecimento",
+         lambda: pessoas.find({"embeddings": {"$exists": True, "$ne": []}}).sort("last_appearance", -1).explain()),
+        ("users: por username",
+         lambda: db["users"].find({"username": "x"}).limit(1).explain()),
+        ("estatisticas_video: por tag_video",
+         lambda: db[ESTATISTICAS_VIDEO].find({"tag_video": "x"}).explain()),
+        ("presencas_pessoa_dia: presentes do dia",
+         lambda: db[PRESENCAS_PESSOA_DIA].find({"data": "01-01-2025", "total": {"$gte": 1}}).sort("total", -1).explain()),
+        ("pessoas_video_dia: pessoas distintas por tag_video",
+         lambda: db[PESSOAS_VIDEO_DIA].find({"tag_video": "x", "total": {"$gt": 0}}).explain()),
+    ]
+
+
+def _estagios(plano: dict):
+    """Percorre recursivamente os estágios de um plano de execução."""
+    if not isinstance(plano, dict):
+        return
+    if "stage" in plano:
+        yield plano["stage"]
+    for chave in ("inputStage", "queryPlan"):
+        if chave in plano:
+            yield from _estagios(plano[chave])
+    for filho in plano.get("inputStages", []):
+        yield from _estagios(filho)
+
+
+def verificar(db) -> list:
+    """Executa explain() em cada consulta conhecida e retorna os nomes das que fazem COLLSCAN."""
+    com_collscan = []
+    for nome, explicar in consultas_conhecidas(db):
+        plano = explicar()["queryPlanner"]["winningPlan"]
+        estagios = list(_estagios(plano))
+        if "COLLSCAN" in estagios:
+            com_collscan.append(nome)
+            print(f"❌ {nome}: {' <- '.join(estagios)}")
+        else:
+            print(f"✅ {nome}: {' <- '.join(estagios)}")
+    return com_collscan
+
+
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Índices do MongoDB")
+    parser.add_argument("--verificar", action="store_true", help="Falha se alguma consulta conhecida fizer COLLSCAN")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI"))[os.getenv("MONGO_DB_NAME")]
+    garantir_indices(db)
+    print("✅ Índices garantidos.")
+    if args.verificar and verificar(db):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
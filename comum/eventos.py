@@ -0,0 +1,33 @@
+"""
+Eventos de presença em tempo real.
+
+O worker banco_de_dados publica, após gravar cada lote, uma mensagem no exchange
+fanout EXCHANGE_PRESENCAS com os eventos compactos das presenças gravadas
+({"presencas": [...]}). O backend consome esse exchange com uma fila exclusiva e
+repassa os eventos aos dashboards conectados (WebSocket /ws/presencas).
+
+Os eventos têm os mesmos campos das linhas de /presencas, exceto `foto_captura`,
+que é o caminho no MinIO (o backend o troca pela URL assinada da miniatura).
+"""
+import os
+
+EXCHANGE_PRESENCAS = os.getenv("RABBITMQ_EXCHANGE_PRESENCAS", "presencas_eventos")
+
+
+def evento_presenca(doc: dict) -> dict:
+    """Evento compacto de uma presença já gravada (com _id)."""
+    return {
+        "id": str(doc["_id"]),
+        "uuid": doc.get("pessoa"),
+        "tempo_processamento_total": doc.get("tempo_processamento_total"),
+        "tempo_captura_frame": doc.get("tempo_captura_frame"),
+        "tempo_deteccao": doc.get("tempo_deteccao"),
+        "tempo_reconhecimento": doc.get("tempo_reconhecimento"),
+        "foto_captura": doc.get("foto_captura"),
+        "tag_video": doc.get("tag_video"),
+        "tags": doc.get("tags", []),
+        "data_captura_frame": doc.get("data_captura_frame"),
+        "timestamp_inicial": doc.get("timestamp_inicial"),
+        "timestamp_final": doc.get("timestamp_final"),
+        "tempo_fila": doc.get("tempo_fila_real"),
+    }
@@ -0,0 +1,249 @@
+"""
+Exportação em streaming de `presencas` e `frames` (CSV ou Parquet), usada pelas rotas
+/export/presencas e /export/frames do backend e pela linha de comando:
+    python -m comum.exportacao presencas --formato parquet --inicio 2025-01-01 --fim 2025-01-31
+    python -m comum.exportacao frames --tag-video camera1 --compressao zstd
+
+Só os campos de CAMPOS são lidos (projeção), o cursor é consumido em lotes e a saída
+é produzida em blocos (um row group do Parquet ou um lote de linhas do CSV por vez),
+com memória constante independentemente do número de documentos.
+
+Dependências opcionais: pyarrow (Parquet) e zstandard (CSV com zstd).
+"""
+import argparse
+import csv
+import io
+import os
+import zlib
+from datetime import datetime, timedelta
+
+EXPORT_LOTE = int(os.getenv("EXPORT_LOTE", 50000))  # linhas por row group / bloco de CSV
+EXPORT_MAX_DIAS = int(os.getenv("EXPORT_MAX_DIAS", 3660))
+
+# coleção -> [(campo, tipo)]; "id" é o _id em texto
+CAMPOS = {
+    "presencas": [
+        ("id", "texto"), ("pessoa", "texto"), ("tag_video", "texto"), ("data_captura_frame", "texto"),
+        ("timestamp", "texto"), ("inicio_processamento", "real"), ("fim_processamento", "real"),
+        ("tempo_processamento_total", "real"), ("tempo_captura_frame", "real"), ("tempo_deteccao", "real"),
+        ("tempo_reconhecimento", "real"), ("tempo_fila_real", "real"), ("foto_captura", "texto"),
+        ("tags", "lista"),
+    ],
+    "frames": [
+        ("uuid", "texto"), ("tag_video", "texto"), ("data_captura_frame", "texto"), ("numero_frame", "inteiro"),
+        ("total_faces_detectadas", "inteiro"), ("fps", "real"), ("duracao", "real"),
+    ],
+}
+FORMATOS = ("csv", "parquet")
+COMPRESSOES = ("gzip", "zstd", "nenhuma")
+_EXTENSOES_CSV = {"gzip": ".csv.gz", "zstd": ".csv.zst", "nenhuma": ".csv"}
+_TIPOS_CSV = {"gzip": "application/gzip", "zstd": "application/zstd", "nenhuma": "text/csv"}
+
+
+class ExportacaoInvalida(ValueError):
+    pass
+
+
+# ----------------------------------------
+# Filtro e leitura
+# ----------------------------------------
+def datas_no_intervalo(inicio: str, fim: str = None) -> list:
+    """Datas "dd-mm-aaaa" (formato de data_captura_frame) entre inicio e fim ("aaaa-mm-dd"), inclusive."""
+    try:
+        dia = datetime.strptime(inicio, "%Y-%m-%d")
+        ultimo = datetime.strptime(fim, "%Y-%m-%d") if fim else datetime.now()
+    except ValueError as e:
+        raise ExportacaoInvalida(f"data inválida (use aaaa-mm-dd): {e}")
+    dias = (ultimo - dia).days + 1
+    if dias < 1:
+        raise ExportacaoInvalida("data_inicio posterior a data_fim")
+    if dias > EXPORT_MAX_DIAS:
+        raise ExportacaoInvalida(f"intervalo maior que {EXPORT_MAX_DIAS} dias")
+    return [(dia + timedelta(days=i)).strftime("%d-%m-%Y") for i in range(dias)]
+
+
+def montar_filtro(tag_video: str = None, data_inicio: str = None, data_fim: str = None) -> dict:
+    """
+    Filtro por tag_video e intervalo de datas. Como data_captura_frame é texto "dd-mm-aaaa",
+    o intervalo vira um $in com cada dia (atendido pelos índices que começam por data/tag).
+    """
+    filtro = {}
+    if tag_video:
+        filtro["tag_video"] = tag_video
+    if data_fim and not data_inicio:
+        raise ExportacaoInvalida("informe data_inicio junto com data_fim")
+    if data_inicio:
+        filtro["data_captura_frame"] = {"$in": datas_no_intervalo(data_inicio, data_fim)}
+    return filtro
+
+
+def _converter(valor, tipo: str):
+    if valor is None:
+        return None
+    if tipo == "real":
+        return float(valor)
+    if tipo == "inteiro":
+        return int(valor)
+    if tipo == "lista":
+        return [str(v) for v in valor]
+    return str(valor)
+
+
+def lotes(db, colecao: str, filtro: dict, tamanho: int = EXPORT_LOTE):
+    """Lê a coleção com projeção em lotes de `tamanho` linhas já convertidas (listas na ordem de CAMPOS)."""
+    campos = CAMPOS[colecao]
+    projecao = {nome: 1 for nome, _ in campos if nome != "id"}
+    if not any(nome == "id" for nome, _ in campos):
+        projecao["_id"] = 0
+    cursor = db[colecao].find(filtro, projecao, batch_size=min(tamanho, 10000))
+    lote = []
+    for doc in cursor:
+        if "_id" in doc:
+            doc["id"] = doc.pop("_id")
+        lote.append([_converter(doc.get(nome), tipo) for nome, tipo in campos])
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+# ----------------------------------------
+# Formatos
+# ----------------------------------------
+def _compressor(compressao: str):
+    if compressao == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: cabeçalho gzip
+    if compressao == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ExportacaoInvalida("compressão zstd requer o pacote opcional 'zstandard'")
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    return None
+
+
+def gerar_csv(linhas, colecao: str, compressao: str = "gzip"):
+    """Blocos de bytes do CSV (tags separadas por "|"), comprimidos em fluxo."""
+    compressor = _compressor(compressao)
+    cabecalho = True
+    for lote in linhas:
+        texto = io.StringIO()
+        escritor = csv.writer(texto)
+        if cabecalho:
+            escritor.writerow([nome for nome, _ in CAMPOS[colecao]])
+            cabecalho = False
+        escritor.writerows(["|".join(v) if isinstance(v, list) else v for v in linha] for linha in lote)
+        dados = texto.getvalue().encode("utf-8")
+        yield compressor.compress(dados) if compressor else dados
+    if cabecalho:
+        dados = (",".join(nome for nome, _ in CAMPOS[colecao]) + "\r\n").encode("utf-8")
+        yield compressor.compress(dados) if compressor else dados
+    if compressor:
+        yield compressor.flush()
+
+
+class _Saida:
+    """Destino de escrita do ParquetWriter que só acumula os bytes até serem drenados."""
+
+    def __init__(self):
+        self.partes = []
+        self.posicao = 0
+        self.closed = False
+
+    def write(self, dados) -> int:
+        self.partes.append(bytes(dados))
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self.posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drenar(self) -> bytes:
+        dados, self.partes = b"".join(self.partes), []
+        return dados
+
+
+def gerar_parquet(linhas, colecao: str, compressao: str = "zstd"):
+    """Blocos de bytes do Parquet: um row group por lote, liberado assim que escrito."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipos = {"texto": pa.string(), "real": pa.float64(), "inteiro": pa.int64(), "lista": pa.list_(pa.string())}
+    esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo in CAMPOS[colecao]])
+    saida = _Saida()
+    escritor = pq.ParquetWriter(saida, esquema, compression="none" if compressao == "nenhuma" else compressao)
+    try:
+        for lote in linhas:
+            colunas = list(zip(*lote))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(coluna, type=campo.type) for coluna, campo in zip(colunas, esquema)], schema=esquema))
+            yield saida.drenar()
+    finally:
+        escritor.close()
+    yield saida.drenar()
+
+
+def preparar(db, colecao: str, formato: str = "csv", compressao: str = "gzip",
+             tag_video: str = None, data_inicio: str = None, data_fim: str = None, tamanho_lote: int = EXPORT_LOTE):
+    """
+    Valida os parâmetros (antes de começar a enviar dados) e retorna
+    (gerador de bytes, content-type, nome do arquivo).
+    """
+    if colecao not in CAMPOS:
+        raise ExportacaoInvalida(f"coleção não exportável: {colecao}")
+    if formato not in FORMATOS:
+        raise ExportacaoInvalida(f"formato deve ser um de {FORMATOS}")
+    if compressao not in COMPRESSOES:
+        raise ExportacaoInvalida(f"compressão deve ser uma de {COMPRESSOES}")
+    filtro = montar_filtro(tag_video, data_inicio, data_fim)
+    linhas = lotes(db, colecao, filtro, tamanho_lote)
+
+    if formato == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ExportacaoInvalida("formato parquet requer o pacote opcional 'pyarrow'")
+        return gerar_parquet(linhas, colecao, compressao), "application/vnd.apache.parquet", f"{colecao}.parquet"
+    _compressor(compressao)  # falha já aqui se zstandard não estiver instalado
+    return gerar_csv(linhas, colecao, compressao), _TIPOS_CSV[compressao], f"{colecao}{_EXTENSOES_CSV[compressao]}"
+
+
+def main():
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description="Exporta presencas ou frames em CSV/Parquet")
+    parser.add_argument("colecao", choices=sorted(CAMPOS))
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--compressao", choices=COMPRESSOES, default=None,
+                        help="Padrão: gzip para CSV, zstd para Parquet")
+    parser.add_argument("--tag-video")
+    parser.add_argument("--inicio", help="Data inicial (aaaa-mm-dd)")
+    parser.add_argument("--fim", help="Data final (aaaa-mm-dd), inclusive")
+    parser.add_argument("--lote", type=int, default=EXPORT_LOTE, help="Linhas por row group / bloco")
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: nome da coleção com a extensão do formato)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = MongoClient(os.getenv("MONGO_URI"))[os.getenv("MONGO_DB_NAME")]
+    compressao = args.compressao or ("zstd" if args.formato == "parquet" else "gzip")
+    blocos, _, nome = preparar(db, args.colecao, args.formato, compressao,
+                               args.tag_video, args.inicio, args.fim, args.lote)
+    destino = args.saida or nome
+    total = 0
+    with open(destino, "wb") as arquivo:
+        for bloco in blocos:
+            arquivo.write(bloco)
+            total += len(bloco)
+    print(f"✅ {args.colecao} exportado em '{destino}' ({total:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Manutenção dos documentos da coleção `frames`, compartilhada pelos workers de
+detecção (frames sem faces) e de banco de dados (frames com presenças).
+
+Cada frame é mantido por um único `update_one(..., upsert=True)` (via bulk_write)
+com um pipeline de atualização, apoiado pelo índice único em `frames.uuid` (comum.esquema);
+assim não há find-then-insert nem documentos duplicados por frame.
+
+As escritas são idempotentes, para que uma reentrega depois de uma falha parcial complete
+o que faltou: as presenças entram por união de conjuntos ($setUnion) e
+total_faces_reconhecidas é recalculado pelo tamanho da lista. Frames novos nascem com
+`contabilizado: false` e só são marcados depois de numerados e somados aos agregados
+(comum.agregados); frames antigos, sem o campo, já contam como contabilizados.
+"""
+from collections import defaultdict
+
+from pymongo import ReturnDocument, UpdateOne
+
+from comum.agregados import atualizar_frames
+
+
+def reservar_sequencia(db, tag_video: str, quantidade: int = 1) -> int:
+    """Reserva `quantidade` números sequenciais de frame para a tag_video e retorna o primeiro."""
+    counter = db["counters"].find_one_and_update(
+        {"_id": tag_video},
+        {"$inc": {"sequence_value": quantidade}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["sequence_value"] - quantidade + 1
+
+
+def operacao_frame(frame: dict) -> UpdateOne:
+    """
+    Monta a upsert de um frame. `frame` contém uuid, tag_video, data_captura_frame,
+    total_faces_detectadas, fps, duracao, numero_frame (opcional) e presenca_ids (presenças a anexar).
+    Reaplicar a mesma operação não altera o documento.
+    """
+    novo = {"$eq": [{"$type": "$total_faces_detectadas"}, "missing"]}
+    na_insercao = {
+        "total_faces_detectadas": frame["total_faces_detectadas"],
+        "tag_video": frame["tag_video"],
+        "data_captura_frame": frame.get("data_captura_frame"),
+        "fps": frame.get("fps"),
+        "duracao": frame.get("duracao"),
+    }
+    if frame.get("numero_frame") is not None:
+        na_insercao["numero_frame"] = frame["numero_frame"]
+
+    campos = {campo: {"$cond": [novo, {"$literal": valor}, f"${campo}"]} for campo, valor in na_insercao.items()}
+    campos["contabilizado"] = {"$cond": [novo, False, {"$ifNull": ["$contabilizado", True]}]}
+    campos["lista_presencas"] = {"$setUnion": [
+        {"$ifNull": ["$lista_presencas", []]}, {"$literal": list(frame.get("presenca_ids") or [])},
+    ]}
+    return UpdateOne({"uuid": frame["uuid"]}, [
+        {"$set": campos},
+        {"$set": {"total_faces_reconhecidas": {"$size": "$lista_presencas"}}},
+    ], upsert=True)
+
+
+def gravar_frames(db, frames: list) -> list:
+    """
+    Aplica as upserts de todos os frames em um único bulk_write; depois numera, em bloco
+    por tag_video, os frames ainda não contabilizados que não trouxeram numero_frame,
+    soma-os aos agregados e os marca como contabilizados.
+    Retorna os frames contabilizados nesta chamada.
+    """
+    if not frames:
+        return []
+    colecao = db["frames"]
+    colecao.bulk_write([operacao_frame(frame) for frame in frames], ordered=False)
+    pendentes = list(colecao.find(
+        {"uuid": {"$in": [frame["uuid"] for frame in frames]}, "contabilizado": False},
+        {"lista_presencas": 0},
+    ))
+
+    sem_numero = defaultdict(list)
+    for frame in pendentes:
+        if frame.get("numero_frame") is None:
+            sem_numero[frame["tag_video"]].append(frame)
+
+    numeracoes = []
+    for tag_video, doc_frames in sem_numero.items():
+        primeiro = reservar_sequencia(db, tag_video, len(doc_frames))
+        for deslocamento, frame in enumerate(doc_frames):
+            frame["numero_frame"] = primeiro + deslocamento
+            numeracoes.append(UpdateOne(
+                {"_id": frame["_id"], "numero_frame": None}, {"$set": {"numero_frame": frame["numero_frame"]}}))
+    if numeracoes:
+        colecao.bulk_write(numeracoes, ordered=False)
+
+    # Sem transação entre as coleções, só uma falha entre a soma e a marcação ainda conta
+    # o frame duas vezes na reentrega
+    atualizar_frames(db, pendentes)
+    if pendentes:
+        colecao.update_many({"_id": {"$in": [frame["_id"] for frame in pendentes]}}, {"$set": {"contabilizado": True}})
+    return pendentes
+
+
+def remover_presencas_dos_frames(db, presenca_ids: list):
+    """
+    Tira presenças excluídas de `lista_presencas` dos frames que as contêm e recalcula
+    total_faces_reconhecidas (índice multikey em frames.lista_presencas). Idempotente.
+    """
+    if not presenca_ids:
+        return
+    db["frames"].update_many({"lista_presencas": {"$in": presenca_ids}}, [
+        {"$set": {"lista_presencas": {"$setDifference": ["$lista_presencas", {"$literal": presenca_ids}]}}},
+        {"$set": {"total_faces_reconhecidas": {"$size": "$lista_presencas"}}},
+    ])
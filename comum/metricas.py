@@ -0,0 +1,170 @@
+"""
+Métricas simples em memória (contadores, medidores e histogramas) expostas
+no formato texto do Prometheus, sem dependências externas.
+Cada métrica pode ter rótulos fixos (ex.: {"fonte": "Camera 0"}).
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites padrão (em segundos) dos histogramas de tempo
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registro = {}
+_lock = threading.Lock()
+
+
+def _formatar_rotulos(rotulos: dict, extra: str = "") -> str:
+    partes = []
+    for chave, valor in sorted(rotulos.items()):
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{chave}="{valor}"')
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class Contador:
+    """Valor que apenas cresce (ex.: frames descartados)."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str = "", rotulos: dict = None):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos or {}
+        self.valor = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, quantidade: float = 1.0):
+        with self._lock:
+            self.valor += quantidade
+
+    def amostras(self):
+        return [(self.nome + _formatar_rotulos(self.rotulos), self.valor)]
+
+
+class Medidor:
+    """Valor que pode subir ou descer (ex.: taxa de amostragem atual)."""
+
+    tipo = "gauge"
+
+    def __init__(self, nome: str, descricao: str = "", rotulos: dict = None):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos or {}
+        self.valor = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, valor: float):
+        with self._lock:
+            self.valor = float(valor)
+
+    def inc(self, quantidade: float = 1.0):
+        with self._lock:
+            self.valor += quantidade
+
+    def dec(self, quantidade: float = 1.0):
+        with self._lock:
+            self.valor -= quantidade
+
+    def amostras(self):
+        return [(self.nome + _formatar_rotulos(self.rotulos), self.valor)]
+
+
+class Histograma:
+    """Distribuição de observações em buckets cumulativos."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str = "", rotulos: dict = None, buckets=BUCKETS_PADRAO):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos or {}
+        self.buckets = tuple(sorted(buckets))
+        self.contagens = [0] * (len(self.buckets) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observe(self, valor: float):
+        with self._lock:
+            self.contagens[bisect.bisect_left(self.buckets, valor)] += 1
+            self.soma += valor
+            self.total += 1
+
+    def amostras(self):
+        with self._lock:
+            contagens, soma, total = list(self.contagens), self.soma, self.total
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.buckets, contagens):
+            acumulado += contagem
+            linhas.append((f"{self.nome}_bucket" + _formatar_rotulos(self.rotulos, f'le="{limite}"'), acumulado))
+        linhas.append((f"{self.nome}_bucket" + _formatar_rotulos(self.rotulos, 'le="+Inf"'), total))
+        linhas.append((f"{self.nome}_sum" + _formatar_rotulos(self.rotulos), soma))
+        linhas.append((f"{self.nome}_count" + _formatar_rotulos(self.rotulos), total))
+        return linhas
+
+
+def _registrar(classe, nome: str, descricao: str, rotulos: dict = None, **kwargs):
+    chave = (nome, tuple(sorted((rotulos or {}).items())))
+    with _lock:
+        metrica = _registro.get(chave)
+        if metrica is None:
+            metrica = classe(nome, descricao, rotulos, **kwargs)
+            _registro[chave] = metrica
+        return metrica
+
+
+def contador(nome: str, descricao: str = "", rotulos: dict = None) -> Contador:
+    return _registrar(Contador, nome, descricao, rotulos)
+
+
+def medidor(nome: str, descricao: str = "", rotulos: dict = None) -> Medidor:
+    return _registrar(Medidor, nome, descricao, rotulos)
+
+
+def histograma(nome: str, descricao: str = "", rotulos: dict = None, buckets=BUCKETS_PADRAO) -> Histograma:
+    return _registrar(Histograma, nome, descricao, rotulos, buckets=buckets)
+
+
+def texto_prometheus() -> str:
+    """Serializa todas as métricas registradas no formato texto do Prometheus."""
+    with _lock:
+        metricas = sorted(_registro.items())
+    linhas = []
+    anunciadas = set()
+    for (nome_base, _), metrica in metricas:
+        # HELP/TYPE uma única vez por nome, mesmo com vários conjuntos de rótulos
+        if nome_base not in anunciadas:
+            anunciadas.add(nome_base)
+            if metrica.descricao:
+                linhas.append(f"# HELP {metrica.nome} {metrica.descricao}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        for nome, valor in metrica.amostras():
+            linhas.append(f"{nome} {valor}")
+    return "\n".join(linhas) + "\n"
+
+
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        corpo = texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_servidor_metricas(porta: int):
+    """Expõe /metrics em uma thread daemon. Porta 0 ou None desativa o servidor."""
+    if not porta:
+        return None
+    servidor = ThreadingHTTPServer(("0.0.0.0", int(porta)), _HandlerMetricas)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    print(f"📈 Métricas disponíveis em http://0.0.0.0:{porta}/metrics")
+    return servidor
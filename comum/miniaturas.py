@@ -0,0 +1,100 @@
+"""
+Miniaturas das faces armazenadas no MinIO, usadas pelas listagens do frontend.
+
+Cada imagem `uuid/face_x.png` tem a miniatura em `uuid/face_x_mini.<ext>` (caminho
+derivado, sem campo extra no MongoDB). O worker de reconhecimento grava a miniatura
+junto com a imagem original; imagens antigas são cobertas pelo backfill:
+    python -m comum.miniaturas --bucket <bucket>
+"""
+import argparse
+import os
+from io import BytesIO
+
+from PIL import Image, features
+
+MINIATURA_TAMANHO = int(os.getenv("MINIATURA_TAMANHO", 128))
+MINIATURA_QUALIDADE = int(os.getenv("MINIATURA_QUALIDADE", 75))
+# "webp" (padrão, quando o Pillow tem suporte) ou "jpeg"
+MINIATURA_FORMATO = os.getenv("MINIATURA_FORMATO", "webp" if features.check("webp") else "jpeg")
+
+_EXTENSOES = {"webp": ("webp", "image/webp", "WEBP"), "jpeg": ("jpg", "image/jpeg", "JPEG")}
+SUFIXO = "_mini"
+
+
+def caminho_miniatura(caminho: str) -> str:
+    """Caminho da miniatura correspondente a uma imagem original."""
+    extensao = _EXTENSOES[MINIATURA_FORMATO][0]
+    return f"{os.path.splitext(caminho)[0]}{SUFIXO}.{extensao}"
+
+
+def eh_miniatura(caminho: str) -> bool:
+    return os.path.splitext(caminho)[0].endswith(SUFIXO)
+
+
+def gerar_miniatura(imagem: Image.Image) -> bytes:
+    """Reduz a imagem (mantendo a proporção) e a codifica no formato configurado."""
+    miniatura = imagem.convert("RGB")
+    miniatura.thumbnail((MINIATURA_TAMANHO, MINIATURA_TAMANHO))
+    saida = BytesIO()
+    miniatura.save(saida, format=_EXTENSOES[MINIATURA_FORMATO][2], quality=MINIATURA_QUALIDADE)
+    return saida.getvalue()
+
+
+def salvar_miniatura(minio_client, bucket: str, caminho: str, imagem: Image.Image) -> str:
+    """Gera e envia a miniatura de `caminho`; retorna o caminho da miniatura."""
+    dados = gerar_miniatura(imagem)
+    destino = caminho_miniatura(caminho)
+    minio_client.put_object(
+        bucket, destino, BytesIO(dados), len(dados), content_type=_EXTENSOES[MINIATURA_FORMATO][1]
+    )
+    return destino
+
+
+def backfill(minio_client, bucket: str) -> int:
+    """Gera as miniaturas que faltam para todas as imagens do bucket; retorna quantas foram criadas."""
+    existentes = set()
+    originais = []
+    for objeto in minio_client.list_objects(bucket, recursive=True):
+        if eh_miniatura(objeto.object_name):
+            existentes.add(objeto.object_name)
+        else:
+            originais.append(objeto.object_name)
+
+    criadas = 0
+    for caminho in originais:
+        if caminho_miniatura(caminho) in existentes:
+            continue
+        resposta = minio_client.get_object(bucket, caminho)
+        try:
+            imagem = Image.open(BytesIO(resposta.read()))
+            salvar_miniatura(minio_client, bucket, caminho, imagem)
+            criadas += 1
+        except Exception as e:
+            print(f"❌ Erro ao gerar miniatura de {caminho}: {e}")
+        finally:
+            resposta.close()
+            resposta.release_conn()
+    return criadas
+
+
+def main():
+    from dotenv import load_dotenv
+    from minio import Minio
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Gera as miniaturas que faltam no MinIO")
+    parser.add_argument("--bucket", default=os.getenv("MINIO_BUCKET") or os.getenv("BUCKET_RECONHECIMENTO"))
+    args = parser.parse_args()
+
+    minio_client = Minio(
+        os.getenv("MINIO_ENDPOINT"),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=False
+    )
+    criadas = backfill(minio_client, args.bucket)
+    print(f"✅ {criadas} miniaturas criadas em '{args.bucket}'.")
+
+
+if __name__ == "__main__":
+    main()
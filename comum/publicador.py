@@ -0,0 +1,194 @@
+"""
+Publicador RabbitMQ compartilhado pelos workers.
+
+Roda um loop asyncio próprio em uma thread daemon (pode ser usado tanto por
+consumidores pika bloqueantes quanto por código asyncio) e oferece:
+  - publisher confirms assíncronos, limitados por uma janela de confirmações pendentes;
+  - coalescência das publicações: as mensagens que chegam em até `espera_rajada_ms`
+    (no máximo `tamanho_rajada`) são despachadas juntas pelo mesmo canal. Não é um lote
+    do protocolo: cada mensagem continua sendo um basic.publish próprio, apenas sem
+    esperar o confirm da anterior;
+  - pool de canais usados em rodízio;
+  - modo de persistência configurável ("persistente" ou "transitorio").
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, wait
+
+import aio_pika
+from pamqp.commands import Basic
+
+from comum import metricas
+
+PERSISTENCIA_PADRAO = os.getenv("RABBITMQ_PERSISTENCIA", "persistente")  # "persistente" ou "transitorio"
+JANELA_CONFIRMACOES = int(os.getenv("RABBITMQ_JANELA_CONFIRMACOES", 256))
+TAMANHO_RAJADA = int(os.getenv("RABBITMQ_TAMANHO_RAJADA", 50))
+ESPERA_RAJADA_MS = float(os.getenv("RABBITMQ_ESPERA_RAJADA_MS", 5))
+# Espera máxima pelos confirms em aguardar(). Os consumidores pika bloqueantes só respondem
+# ao heartbeat entre callbacks, então este limite fica bem abaixo do heartbeat (60 s por padrão)
+CONFIRM_TIMEOUT = float(os.getenv("RABBITMQ_CONFIRM_TIMEOUT", 10))
+CANAIS = int(os.getenv("RABBITMQ_CANAIS", 2))
+
+
+def _resolver(futuro: Future, resultado=None, erro: Exception = None):
+    if futuro.done():
+        return
+    if erro is not None:
+        futuro.set_exception(erro)
+    else:
+        futuro.set_result(resultado)
+
+
+class Publicador:
+    """Publica mensagens com confirms em janela; os métodos públicos são thread-safe."""
+
+    def __init__(self, url: str, filas=(), nome: str = "publicador", persistencia: str = PERSISTENCIA_PADRAO,
+                 canais: int = CANAIS, janela: int = JANELA_CONFIRMACOES,
+                 tamanho_rajada: int = TAMANHO_RAJADA, espera_rajada_ms: float = ESPERA_RAJADA_MS):
+        self.url = url
+        self.filas = list(filas)
+        self.nome = nome
+        self.delivery_mode = (
+            aio_pika.DeliveryMode.NOT_PERSISTENT if persistencia == "transitorio" else aio_pika.DeliveryMode.PERSISTENT
+        )
+        self.total_canais = max(1, canais)
+        self.janela = max(1, janela)
+        self.tamanho_rajada = max(1, tamanho_rajada)
+        self.espera_rajada = espera_rajada_ms / 1000
+
+        self.loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._conexao = None
+        self._canais = []
+        self._proximo = 0
+        self._pendentes = 0
+
+        rotulos = {"publicador": nome}
+        self.latencia = metricas.histograma(
+            "rabbitmq_publicacao_latencia_segundos", "Tempo entre enfileirar a publicação e receber o confirm", rotulos)
+        self.confirmacoes_pendentes = metricas.medidor(
+            "rabbitmq_confirmacoes_pendentes", "Publicações aguardando confirm do broker", rotulos)
+        self.publicacoes = metricas.contador("rabbitmq_publicacoes_total", "Publicações confirmadas", rotulos)
+        self.falhas = metricas.contador("rabbitmq_publicacoes_falhas_total", "Publicações rejeitadas ou com erro", rotulos)
+        self.tamanho_rajadas = metricas.histograma(
+            "rabbitmq_publicacao_rajada_mensagens", "Mensagens despachadas juntas pelo mesmo canal", rotulos,
+            buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+
+    # ------------------------------------------------------------------
+    # API thread-safe
+    # ------------------------------------------------------------------
+    def publicar(self, routing_key: str, corpo) -> Future:
+        """Enfileira uma mensagem (bytes ou dict) e retorna um Future resolvido no confirm."""
+        self._garantir_iniciado()
+        if isinstance(corpo, dict):
+            corpo = json.dumps(corpo).encode("utf-8")
+        futuro = Future()
+        self.loop.call_soon_threadsafe(self._fila.put_nowait, (routing_key, corpo, futuro, time.perf_counter()))
+        return futuro
+
+    def estado_fila(self, nome: str) -> Future:
+        """Retorna (Future) a tupla (mensagens prontas, consumidores) da fila informada."""
+        self._garantir_iniciado()
+        return asyncio.run_coroutine_threadsafe(self._estado_fila(nome), self.loop)
+
+    @staticmethod
+    def aguardar(futuros, timeout: float = CONFIRM_TIMEOUT):
+        """Bloqueia até todos os confirms chegarem (no máximo `timeout`); propaga o primeiro erro encontrado."""
+        concluidos, pendentes = wait(futuros, timeout=timeout)
+        if pendentes:
+            raise TimeoutError(f"{len(pendentes)} publicações sem confirm após {timeout}s")
+        for futuro in concluidos:
+            futuro.result()
+
+    # ------------------------------------------------------------------
+    # Loop interno
+    # ------------------------------------------------------------------
+    def _garantir_iniciado(self):
+        with self._lock:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            pronto = threading.Event()
+            self._thread = threading.Thread(
+                target=self._executar_loop, args=(pronto,), daemon=True, name=f"publicador-{self.nome}")
+            self._thread.start()
+            pronto.wait()
+
+    def _executar_loop(self, pronto: threading.Event):
+        asyncio.set_event_loop(self.loop)
+        self._fila = asyncio.Queue()
+        self._janela = asyncio.Semaphore(self.janela)
+        self._lock_conexao = asyncio.Lock()
+        self.loop.create_task(self._despachar())
+        pronto.set()
+        self.loop.run_forever()
+
+    async def _conectar(self):
+        async with self._lock_conexao:
+            if self._conexao is not None and not self._conexao.is_closed:
+                return
+            self._conexao = await aio_pika.connect_robust(self.url)
+            self._canais = [
+                await self._conexao.channel(publisher_confirms=True) for _ in range(self.total_canais)
+            ]
+            for fila in self.filas:
+                await self._canais[0].declare_queue(fila, durable=True)
+            print(f"✅ Publicador '{self.nome}' conectado ao RabbitMQ ({self.total_canais} canais)")
+
+    async def _estado_fila(self, nome: str):
+        await self._conectar()
+        fila = await self._canais[0].declare_queue(nome, durable=True, passive=True)
+        return fila.declaration_result.message_count, fila.declaration_result.consumer_count
+
+    async def _despachar(self):
+        while True:
+            rajada = [await self._fila.get()]
+            limite = self.loop.time() + self.espera_rajada
+            while len(rajada) < self.tamanho_rajada:
+                restante = limite - self.loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    rajada.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._conectar()
+            except Exception as e:
+                print(f"❌ Publicador '{self.nome}' sem conexão: {e}")
+                for _, _, futuro, _ in rajada:
+                    self.falhas.inc()
+                    _resolver(futuro, erro=e)
+                continue
+
+            # Cada rajada sai por um canal do pool, em rodízio
+            canal = self._canais[self._proximo % len(self._canais)]
+            self._proximo += 1
+            self.tamanho_rajadas.observe(len(rajada))
+            for routing_key, corpo, futuro, inicio in rajada:
+                await self._janela.acquire()
+                self._pendentes += 1
+                self.confirmacoes_pendentes.set(self._pendentes)
+                self.loop.create_task(self._publicar(canal, routing_key, corpo, futuro, inicio))
+
+    async def _publicar(self, canal, routing_key: str, corpo: bytes, futuro: Future, inicio: float):
+        try:
+            mensagem = aio_pika.Message(body=corpo, delivery_mode=self.delivery_mode)
+            confirmacao = await canal.default_exchange.publish(mensagem, routing_key=routing_key)
+            if isinstance(confirmacao, Basic.Nack):
+                raise RuntimeError(f"Broker rejeitou a mensagem para '{routing_key}'")
+            self.latencia.observe(time.perf_counter() - inicio)
+            self.publicacoes.inc()
+            _resolver(futuro, confirmacao)
+        except Exception as e:
+            self.falhas.inc()
+            _resolver(futuro, erro=e)
+        finally:
+            self._pendentes -= 1
+            self.confirmacoes_pendentes.set(self._pendentes)
+            self._janela.release()
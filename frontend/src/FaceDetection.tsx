@@ -1,5 +1,6 @@
 import React, { useEffect, useRef, useState } from 'react';
 import { Camera } from '@mediapipe/camera_utils';
+import { FaceDetection, Results } from '@mediapipe/face_detection';
 import { useAuth } from "./AuthContext";
 
 function FaceDetectionComponent() {
@@ -9,8 +10,24 @@ function FaceDetectionComponent() {
   const cameraRef = useRef<Camera | null>(null);
   const throttleInterval = 1000; // Envia 1 frame a cada 1000 ms (1 segundo)
   const lastSentTimeRef = useRef<number>(0);
+  // Com 429 do backend (fila cheia), não envia nada até este instante
+  const pausedUntilRef = useRef<number>(0);
+  const detectorRef = useRef<FaceDetection | null>(null);
   const { token } = useAuth();
 
+  // Detector MediaPipe no navegador: só os recortes das faces vão para o backend
+  useEffect(() => {
+    const detector = new FaceDetection({
+      locateFile: (file) => `https://cdn.jsdelivr.net/npm/@mediapipe/face_detection/${file}`,
+    });
+    detector.setOptions({ model: 'short', minDetectionConfidence: 0.7 });
+    detector.onResults(sendFaces);
+    detectorRef.current = detector;
+    return () => {
+      detector.close();
+    };
+  }, [token]);
+
   // Configura a câmera para capturar os frames
   useEffect(() => {
     if (videoRef.current) {
@@ -27,43 +44,55 @@ function FaceDetectionComponent() {
     }
   }, [isDetecting]);
 
-  // Função que captura o frame atual e envia para o backend
-  const sendFrame = () => {
-    if (!videoRef.current || !canvasRef.current) return;
-    
+  // Função que captura o frame atual e o passa ao detector
+  const sendFrame = async () => {
+    if (!videoRef.current || !detectorRef.current) return;
+
     const now = Date.now();
-    if (now - lastSentTimeRef.current < throttleInterval) {
-      return; // Se não passou 1 segundo, sai sem enviar
+    if (now - lastSentTimeRef.current < throttleInterval || now < pausedUntilRef.current) {
+      return; // Se não passou 1 segundo (ou o backend pediu para esperar), sai sem enviar
     }
     lastSentTimeRef.current = now;
-    
-    const video = videoRef.current;
+    await detectorRef.current.send({ image: videoRef.current });
+  };
+
+  // Recorta as faces detectadas e as envia em um único multipart
+  const sendFaces = async (results: Results) => {
     const canvas = canvasRef.current;
+    if (!canvas || !results.detections.length) return;
+    const image = results.image as CanvasImageSource & { width: number; height: number };
     const ctx = canvas.getContext('2d');
     if (!ctx) return;
 
-    // Atualiza o canvas com o frame atual
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
-    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-    
-    // Converte o canvas para Base64
-    const base64Image = canvas.toDataURL('image/png');
-
-    // Prepara o payload com o frame e o timestamp
-    const payload = {
-      image: base64Image,
-      timestamp: now
-    };
+    const form = new FormData();
+    form.append('timestamp', String(lastSentTimeRef.current));
+    form.append('tag_video', 'navegador');
+    for (const detection of results.detections) {
+      const box = detection.boundingBox;
+      const w = Math.round(box.width * image.width);
+      const h = Math.round(box.height * image.height);
+      const x = Math.max(0, Math.round(box.xCenter * image.width - w / 2));
+      const y = Math.max(0, Math.round(box.yCenter * image.height - h / 2));
+      canvas.width = w;
+      canvas.height = h;
+      ctx.drawImage(image, x, y, w, h, 0, 0, w, h);
+      const blob = await new Promise<Blob | null>((resolve) => canvas.toBlob(resolve, 'image/png'));
+      if (blob) form.append('faces', blob, 'face.png');
+    }
 
-    // Envia o payload para o backend; o retorno é ignorado
-    fetch('http://localhost:8000/frame', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' , Authorization: `Bearer ${token}`},
-      body: JSON.stringify(payload),
-    }).catch(err => {
-      console.error('Erro ao enviar frame:', err);
-    });
+    try {
+      const res = await fetch('http://localhost:8000/frame', {
+        method: 'POST',
+        headers: { Authorization: `Bearer ${token}` },
+        body: form,
+      });
+      if (res.status === 429) {
+        const retryAfter = Number(res.headers.get('Retry-After') || 1);
+        pausedUntilRef.current = Date.now() + retryAfter * 1000;
+      }
+    } catch (err) {
+      console.error('Erro ao enviar faces:', err);
+    }
   };
 
   // Função para alternar entre iniciar e parar a detecção
@@ -13,8 +13,8 @@ interface Agrupamento {
   total_pessoas: number;
   fps: number;
   duracao: number;
-  grafico_detectados: string;      
-  grafico_reconhecidos: string;
+  grafico_detectados: string | null;      
+  grafico_reconhecidos: string | null;
 
 }
 
@@ -86,12 +86,20 @@ const FrameAgrupamentos: React.FC = () => {
                 <td style={tdStyle}>{a.frames_sem_pessoas}</td>
                 <td style={tdStyle}>
                  
-                  <img src={`${process.env.REACT_APP_API_URL}${a.grafico_detectados}`} alt="Gráfico Detec." style={{ width: "140px" }} className="zoomable-img"/>
+                  {a.grafico_detectados ? (
+                    <img src={`${process.env.REACT_APP_API_URL}${a.grafico_detectados}`} alt="Gráfico Detec." style={{ width: "140px" }} className="zoomable-img"/>
+                  ) : (
+                    <span>Gerando...</span>
+                  )}
 
                 </td>
                 <td style={tdStyle}>
                   
-                  <img src={`${process.env.REACT_APP_API_URL}${a.grafico_reconhecidos}`} alt="Gráfico Detec." style={{ width: "140px" }} className="zoomable-img"/>
+                  {a.grafico_reconhecidos ? (
+                    <img src={`${process.env.REACT_APP_API_URL}${a.grafico_reconhecidos}`} alt="Gráfico Detec." style={{ width: "140px" }} className="zoomable-img"/>
+                  ) : (
+                    <span>Gerando...</span>
+                  )}
 
                 </td>
 
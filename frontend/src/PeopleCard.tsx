@@ -4,58 +4,22 @@ import { useAuth } from "./AuthContext";
 interface PeopleCardProps {
   uuid: string;
   tags: string[];
+  primaryPhoto: string | null;
+  photoCount: number;
   onOpenModal: (uuid: string) => void;
   onDelete: (uuid: string) => void;
 }
 
-interface PessoaDetails {
-  uuid: string;
-  tags: string[];
-  primary_photo: string;
-}
-
-const PeopleCard: React.FC<PeopleCardProps> = ({ uuid, tags, onOpenModal, onDelete }) => {
-  const [primaryPhoto, setPrimaryPhoto] = useState<string>("");
+const PeopleCard: React.FC<PeopleCardProps> = ({ uuid, tags, primaryPhoto, photoCount, onOpenModal, onDelete }) => {
   const [tagInput, setTagInput] = useState<string>("");
   const [localTags, setLocalTags] = useState<string[]>(tags);
-  const [photoCount, setPhotoCount] = useState<number>(0);
   const { token } = useAuth();
 
 
-  // Busca os detalhes da pessoa (incluindo a foto primária e tags)
-  useEffect(() => {
-    async function fetchDetails() {
-      try {
-        const res = await fetch(`http://localhost:8000/pessoas/${uuid}`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
-        const data: PessoaDetails = await res.json();
-        setPrimaryPhoto(data.primary_photo);
-        setLocalTags(data.tags);
-      } catch (error) {
-        console.error("Erro ao buscar detalhes da pessoa", uuid, error);
-      }
-    }
-    fetchDetails();
-  }, [uuid]);
-
-  // Busca a quantidade de fotos da pessoa
+  // Detalhes (foto principal, tags e contagem) vêm do PeopleList, via /pessoas/batch
   useEffect(() => {
-    async function fetchPhotoCount() {
-      try {
-        const res = await fetch(`http://localhost:8000/pessoas/${uuid}/photos/count`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
-        const data = await res.json();
-        if (data.photo_count !== undefined) {
-          setPhotoCount(data.photo_count);
-        }
-      } catch (error) {
-        console.error("Erro ao buscar quantidade de fotos para pessoa", uuid, error);
-      }
-    }
-    fetchPhotoCount();
-  }, [uuid]);
+    setLocalTags(tags);
+  }, [tags]);
 
   const addTag = async () => {
     if (!tagInput.trim()) return;
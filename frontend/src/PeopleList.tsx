@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import Modal from "react-modal";
 import PeopleCard from "./PeopleCard";
 import { useAuth } from "./AuthContext";
@@ -7,6 +7,8 @@ import { useAuth } from "./AuthContext";
 interface Pessoa {
   uuid: string;
   tags: string[];
+  primary_photo?: string | null;
+  photo_count?: number;
 }
 
 interface PessoaPhotos {
@@ -22,6 +24,8 @@ export const PeopleList: React.FC = () => {
   const [page, setPage] = useState<number>(1);
   const limit = 10;
   const [total, setTotal] = useState<number>(0);
+  // Cursor (keyset) de cada página já alcançada; a página 1 não precisa de cursor
+  const cursores = useRef<Record<number, string | null>>({});
   
   // Estado para o modal de fotos
   const [modalIsOpen, setModalIsOpen] = useState<boolean>(false);
@@ -34,12 +38,27 @@ export const PeopleList: React.FC = () => {
   const fetchPessoas = async () => {
     setLoading(true);
     try {
-      const res = await fetch(`http://localhost:8000/pessoas?page=${page}&limit=${limit}`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
+      const cursor = cursores.current[page];
+      const res = await fetch(
+        `http://localhost:8000/pessoas?page=${page}&limit=${limit}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
       const data = await res.json();
-      setPessoas(data.pessoas);
+      cursores.current[page + 1] = data.proximo_cursor;
       setTotal(data.total);
+      // Tags, foto principal e contagem de fotos da página inteira em uma só chamada
+      const uuids = data.pessoas.map((p: Pessoa) => p.uuid);
+      if (uuids.length === 0) {
+        setPessoas([]);
+      } else {
+        const resBatch = await fetch("http://localhost:8000/pessoas/batch", {
+          method: "POST",
+          headers: { "Content-Type": "application/json", Authorization: `Bearer ${token}` },
+          body: JSON.stringify({ uuids, miniaturas: true }),
+        });
+        const dataBatch = await resBatch.json();
+        setPessoas(dataBatch.pessoas);
+      }
     } catch (error) {
       console.error("Erro ao buscar pessoas:", error);
     }
@@ -49,7 +68,7 @@ export const PeopleList: React.FC = () => {
   const fetchPhotos = async (uuid: string) => {
     setPhotosLoading(true);
     try {
-      const res = await fetch(`http://localhost:8000/pessoas/${uuid}/photos`, {
+      const res = await fetch(`http://localhost:8000/pessoas/${uuid}/photos?miniaturas=true&limit=50`, {
         headers: { Authorization: `Bearer ${token}` },
       });
       const data: PessoaPhotos = await res.json();
@@ -126,6 +145,8 @@ export const PeopleList: React.FC = () => {
                 key={pessoa.uuid}
                 uuid={pessoa.uuid}
                 tags={pessoa.tags}
+                primaryPhoto={pessoa.primary_photo ?? null}
+                photoCount={pessoa.photo_count ?? 0}
                 onOpenModal={openModal}
                 onDelete={deletePessoa}
               />
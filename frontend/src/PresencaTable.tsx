@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useCallback } from "react";
+import React, { useEffect, useState, useCallback, useRef } from "react";
 import { useAuth } from "./AuthContext";
 
 interface Presenca {
@@ -28,6 +28,8 @@ const PresencaTable: React.FC = () => {
   const [filterDate, setFilterDate] = useState<string>(""); // Estado para filtro por data
   const [filterTag, setFilterTag] = useState<string>("");   // Estado para filtro por tag_video
   const limit = 10; // Número de registros por página
+  // Cursor (keyset) de cada página já alcançada; a página 1 não precisa de cursor
+  const cursores = useRef<Record<number, string | null>>({});
 
   const { token } = useAuth();
 
@@ -35,7 +37,11 @@ const PresencaTable: React.FC = () => {
     setLoading(true);
     try {
       // Monta a URL com os parâmetros de paginação e filtros (caso preenchidos)
-      let url = `http://localhost:8000/presencas?page=${currentPage}&limit=${limit}`;
+      let url = `http://localhost:8000/presencas?page=${currentPage}&limit=${limit}&miniaturas=true`;
+      const cursor = cursores.current[currentPage];
+      if (cursor) {
+        url += `&cursor=${encodeURIComponent(cursor)}`;
+      }
       if (filterDate) {
         url += `&data_captura_frame=${filterDate}`;
       }
@@ -46,6 +52,7 @@ const PresencaTable: React.FC = () => {
       const res = await fetch(url, { headers: { Authorization: `Bearer ${token}` } });
       const data = await res.json();
       setPresencas(data.presencas);
+      cursores.current[currentPage + 1] = data.proximo_cursor;
       setTotal(data.total);
       setTempoProcessamento(data.tempo_processamento); // Atualiza o somatório
       setTempoFila(data.tempo_fila); // Atualiza o tempo de fila
@@ -56,11 +63,40 @@ const PresencaTable: React.FC = () => {
     setLoading(false);
   }, [token, limit, filterDate, filterTag]);
 
+  // Cursores só valem para o filtro em que foram gerados
+  useEffect(() => {
+    cursores.current = {};
+  }, [filterDate, filterTag]);
+
   // Atualiza a listagem sempre que a página ou os filtros mudarem
   useEffect(() => {
     fetchPresencas(page);
   }, [fetchPresencas, page]);
 
+  // Novas presenças chegam por WebSocket e entram no topo da página 1, sem nova consulta
+  useEffect(() => {
+    if (page !== 1) return;
+    let url = `ws://localhost:8000/ws/presencas?token=${encodeURIComponent(token ?? "")}`;
+    if (filterTag) {
+      url += `&tag_video=${encodeURIComponent(filterTag)}`;
+    }
+    // O filtro de data chega como yyyy-mm-dd; as presenças usam dd-mm-yyyy
+    const dataFiltro = filterDate ? filterDate.split("-").reverse().join("-") : null;
+    const ws = new WebSocket(url);
+    ws.onmessage = (mensagem) => {
+      const data = JSON.parse(mensagem.data);
+      const novas: Presenca[] = data.presencas.filter(
+        (p: Presenca) => !dataFiltro || p.data_captura_frame === dataFiltro
+      );
+      if (novas.length === 0) return;
+      setPresencas((atuais) => [...novas.reverse(), ...atuais].slice(0, limit));
+      setTotal((atual) => atual + novas.length);
+      // A página 2 em diante passa a começar em outro ponto; os cursores são refeitos
+      cursores.current = {};
+    };
+    return () => ws.close();
+  }, [token, page, filterDate, filterTag]);
+
   const deletePresenca = async (id: string) => {
     try {
       const res = await fetch(`http://localhost:8000/presencas/${id}`, {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import Modal from 'react-modal';
 import { useAuth } from "./AuthContext";
 
@@ -43,7 +43,7 @@ const Presentes: React.FC = () => {
   const formattedDate = `${day}-${month}-${year}`;
   
     try {
-      const response = await fetch(`http://localhost:8000/presentes?date=${formattedDate}&min_presencas=${minPresencas}`, {
+      const response = await fetch(`http://localhost:8000/presentes?date=${formattedDate}&min_presencas=${minPresencas}&miniaturas=true`, {
         headers: { Authorization: `Bearer ${token}` },
       });
       if (!response.ok) {
@@ -64,10 +64,47 @@ const Presentes: React.FC = () => {
     }
   }, [date, minPresencas, fetchPresentes]);
 
+  // Contagens atualizadas pelas presenças que chegam por WebSocket; só quem ainda
+  // não está na lista exige nova consulta (para a foto e as tags), no máximo a cada 5 s
+  const pessoasRef = useRef<Pessoa[]>([]);
+  const ultimaConsultaRef = useRef<number>(0);
+  useEffect(() => {
+    pessoasRef.current = pessoas;
+  }, [pessoas]);
+
+  useEffect(() => {
+    if (!date) return;
+    const [year, month, day] = date.split('-');
+    const formattedDate = `${day}-${month}-${year}`;
+    const ws = new WebSocket(`ws://localhost:8000/ws/presencas?token=${encodeURIComponent(token ?? '')}`);
+    ws.onmessage = (mensagem) => {
+      const data = JSON.parse(mensagem.data);
+      const porPessoa: Record<string, number> = {};
+      for (const p of data.presencas) {
+        if (p.data_captura_frame === formattedDate && p.uuid) {
+          porPessoa[p.uuid] = (porPessoa[p.uuid] || 0) + 1;
+        }
+      }
+      if (Object.keys(porPessoa).length === 0) return;
+      const conhecidas = new Set(pessoasRef.current.map((p) => p.uuid));
+      setPessoas((atuais) =>
+        atuais
+          .map((p) => (porPessoa[p.uuid] ? { ...p, presencas_count: p.presencas_count + porPessoa[p.uuid] } : p))
+          .sort((a, b) => b.presencas_count - a.presencas_count)
+      );
+      const novaPessoa = Object.keys(porPessoa).some((uuid) => !conhecidas.has(uuid));
+      if (novaPessoa && Date.now() - ultimaConsultaRef.current > 5000) {
+        ultimaConsultaRef.current = Date.now();
+        fetchPresentes();
+      }
+    };
+    return () => ws.close();
+  }, [date, token, fetchPresentes]);
+
   const fetchPhotosAndTags = async (uuid: string) => {
     setPhotosLoading(true);
     try {
-      const res = await fetch(`http://localhost:8000/pessoas/${uuid}/photos`, {
+      const res = await fetch(`http://localhost:8000/pessoas/${uuid}/photos?miniaturas=true&limit=50`, {
         headers: { Authorization: `Bearer ${token}` },
       });
       const data: PessoaPhotos = await res.json();
@@ -0,0 +1,18 @@
+"""
+Configuração dos testes: deixa importáveis o pacote `comum`, os módulos do backend
+e o worker de banco de dados, sem serviços no ar (nenhum teste conecta ao MongoDB,
+ao MinIO ou ao RabbitMQ). Dependências opcionais ausentes pulam os testes que as usam.
+
+Uso (na raiz do repositório):
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for caminho in (RAIZ, os.path.join(RAIZ, "backend"), os.path.join(RAIZ, "workers", "banco_de_dados")):
+    if caminho not in sys.path:
+        sys.path.insert(0, caminho)
+
+# O worker de banco de dados cria o MongoClient (preguiçoso) na importação
+os.environ.setdefault("MONGO_DB_NAME", "testes")
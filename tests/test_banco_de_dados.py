@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("aio_pika")
+pytest.importorskip("dotenv")
+
+from banco_de_dados import id_presenca  # noqa: E402
+
+
+def mensagem(**campos) -> dict:
+    msg = {
+        "inicio_processamento": 1735689600.75,
+        "frame_uuid": "2b1f6a0e-frame",
+        "deteccao_path": "01-01-2025/2b1f6a0e-frame_face_0.png",
+        "reconhecimento_path": "pessoa/face_20250101_000000000001.png",
+    }
+    msg.update(campos)
+    return msg
+
+
+def test_mesma_face_gera_o_mesmo_id():
+    assert id_presenca(mensagem()) == id_presenca(mensagem())
+
+
+def test_reprocessamento_com_outro_reconhecimento_mantem_o_id():
+    # Reentregue, a face é reconhecida de novo e salva com outro nome; a presença é a mesma
+    assert id_presenca(mensagem()) == id_presenca(mensagem(reconhecimento_path="pessoa/face_outro.png"))
+
+
+def test_faces_diferentes_do_frame_geram_ids_diferentes():
+    outra = mensagem(deteccao_path="01-01-2025/2b1f6a0e-frame_face_1.png")
+    assert id_presenca(mensagem()) != id_presenca(outra)
+
+
+def test_mensagem_antiga_usa_o_caminho_do_reconhecimento():
+    antiga = mensagem()
+    del antiga["deteccao_path"]
+    assert id_presenca(antiga) == id_presenca(mensagem(deteccao_path=None))
+    assert id_presenca(antiga) != id_presenca(mensagem())
+
+
+def test_id_comeca_pelos_segundos_do_inicio_do_processamento():
+    presenca_id = id_presenca(mensagem(inicio_processamento="1735689600.75"))
+    assert int(presenca_id.generation_time.timestamp()) == 1735689600
+    assert id_presenca(mensagem(inicio_processamento=1735689601)) > presenca_id
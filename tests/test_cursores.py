@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("bson")
+
+from bson import ObjectId  # noqa: E402
+
+from cursores import CursorInvalido, codificar, decodificar  # noqa: E402
+
+
+def test_ida_e_volta_preserva_objectid_e_numeros():
+    chave = {"inicio_processamento": 1735689600.25, "_id": ObjectId()}
+    token = codificar(chave)
+    assert decodificar(token, ("inicio_processamento", "_id")) == chave
+
+
+def test_token_e_url_safe_sem_padding():
+    token = codificar({"uuid": "ção/+?"})
+    assert "=" not in token and "+" not in token and "/" not in token
+    assert decodificar(token, ("uuid",)) == {"uuid": "ção/+?"}
+
+
+def test_campos_diferentes_dos_esperados():
+    token = codificar({"uuid": "x"})
+    with pytest.raises(CursorInvalido):
+        decodificar(token, ("inicio_processamento", "_id"))
+
+
+@pytest.mark.parametrize("token", ["", "!!!", "bm90LWpzb24", codificar({"uuid": "x"})[:-3]])
+def test_token_invalido(token):
+    with pytest.raises(CursorInvalido):
+        decodificar(token, ("uuid",))
+
+
+def test_cursor_invalido_e_value_error():
+    # As rotas tratam ValueError como 400
+    assert issubclass(CursorInvalido, ValueError)
@@ -0,0 +1,74 @@
+import csv
+import io
+import zlib
+
+import pytest
+
+from comum.exportacao import CAMPOS, ExportacaoInvalida, gerar_csv, montar_filtro
+
+
+def test_filtro_vazio():
+    assert montar_filtro() == {}
+
+
+def test_filtro_por_tag_e_intervalo():
+    filtro = montar_filtro("camera1", "2024-12-30", "2025-01-02")
+    assert filtro == {
+        "tag_video": "camera1",
+        "data_captura_frame": {"$in": ["30-12-2024", "31-12-2024", "01-01-2025", "02-01-2025"]},
+    }
+
+
+def test_filtro_de_um_dia():
+    assert montar_filtro(data_inicio="2025-02-28", data_fim="2025-02-28") == {
+        "data_captura_frame": {"$in": ["28-02-2025"]}}
+
+
+@pytest.mark.parametrize("argumentos", [
+    {"data_fim": "2025-01-02"},
+    {"data_inicio": "2025-01-02", "data_fim": "2025-01-01"},
+    {"data_inicio": "02/01/2025"},
+    {"data_inicio": "1900-01-01", "data_fim": "2025-01-01"},
+])
+def test_filtro_invalido(argumentos):
+    with pytest.raises(ExportacaoInvalida):
+        montar_filtro(**argumentos)
+
+
+def linhas_de(blocos, compressao: str) -> list:
+    dados = b"".join(blocos)
+    if compressao == "gzip":
+        dados = zlib.decompress(dados, 31)
+    elif compressao == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        dados = zstandard.ZstdDecompressor().decompressobj().decompress(dados)
+    return list(csv.reader(io.StringIO(dados.decode("utf-8"))))
+
+
+@pytest.mark.parametrize("compressao", ["nenhuma", "gzip", "zstd"])
+def test_csv_em_lotes(compressao):
+    if compressao == "zstd":
+        pytest.importorskip("zstandard")
+    campos = [nome for nome, _ in CAMPOS["frames"]]
+    lotes = [
+        [["f1", "camera1", "01-01-2025", 1, 2, 30.0, 10.0]],
+        [["f2", "camera1", "01-01-2025", 2, 0, 30.0, None]],
+    ]
+    linhas = linhas_de(gerar_csv(iter(lotes), "frames", compressao), compressao)
+    assert linhas == [
+        campos,
+        ["f1", "camera1", "01-01-2025", "1", "2", "30.0", "10.0"],
+        ["f2", "camera1", "01-01-2025", "2", "0", "30.0", ""],
+    ]
+
+
+def test_csv_junta_tags_com_barra():
+    linha = [None] * len(CAMPOS["presencas"])
+    linha[0], linha[-1] = "abc", ["visitante", "funcionário"]
+    linhas = linhas_de(gerar_csv(iter([[linha]]), "presencas", "nenhuma"), "nenhuma")
+    assert linhas[1][0] == "abc" and linhas[1][-1] == "visitante|funcionário"
+
+
+def test_csv_sem_linhas_tem_so_cabecalho():
+    linhas = linhas_de(gerar_csv(iter([]), "frames", "gzip"), "gzip")
+    assert linhas == [[nome for nome, _ in CAMPOS["frames"]]]
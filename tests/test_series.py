@@ -0,0 +1,57 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from series import lttb, minmax, reduzir  # noqa: E402
+
+
+def serie(total: int):
+    x = np.arange(1, total + 1, dtype=np.float64)
+    y = np.abs(np.sin(x / 7) * 10).round()
+    y[total // 3] = 50  # pico isolado
+    return x, y
+
+
+@pytest.mark.parametrize("metodo", ["lttb", "minmax"])
+def test_reduz_a_no_maximo_pontos(metodo):
+    x, y = serie(10_000)
+    reduzida = reduzir(x, y, 200, metodo)
+    assert len(reduzida["x"]) == len(reduzida["y"]) <= 200
+    assert reduzida["x"] == sorted(reduzida["x"])
+
+
+@pytest.mark.parametrize("metodo", ["lttb", "minmax"])
+def test_serie_menor_que_pontos_fica_inteira(metodo):
+    x, y = serie(50)
+    reduzida = reduzir(x, y, 200, metodo)
+    assert reduzida["x"] == x.astype(int).tolist()
+    assert reduzida["y"] == y.astype(int).tolist()
+
+
+def test_lttb_mantem_extremidades():
+    x, y = serie(1000)
+    indices = lttb(x, y, 20)
+    assert len(indices) == 20
+    assert indices[0] == 0 and indices[-1] == 999
+
+
+def test_lttb_com_dois_pontos():
+    x, y = serie(1000)
+    assert lttb(x, y, 2).tolist() == [0, 999]
+
+
+@pytest.mark.parametrize("metodo", ["lttb", "minmax"])
+def test_preserva_pico(metodo):
+    x, y = serie(10_000)
+    assert 50 in reduzir(x, y, 100, metodo)["y"]
+
+
+def test_minmax_inclui_minimo_e_maximo_de_cada_bucket():
+    y = np.array([3, 1, 2, 9, 5, 4, 0, 8], dtype=np.float64)
+    assert minmax(y, 4).tolist() == [1, 3, 6, 7]
+
+
+def test_serie_vazia():
+    vazio = np.array([], dtype=np.float64)
+    assert reduzir(vazio, vazio, 10, "lttb") == {"x": [], "y": []}
+    assert reduzir(vazio, vazio, 10, "minmax") == {"x": [], "y": []}
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+minio = pytest.importorskip("minio")
+
+from urls_assinadas import AssinadorURLs  # noqa: E402
+
+ENDPOINT = "localhost:9000"
+ACCESS_KEY = "minioadmin"
+SECRET_KEY = "minioadmin"
+BUCKET = "reconhecimento"
+
+
+def assinador(**opcoes) -> AssinadorURLs:
+    return AssinadorURLs(ENDPOINT, ACCESS_KEY, SECRET_KEY, BUCKET, expiracao=600, **opcoes)
+
+
+@pytest.mark.parametrize("caminho", [
+    "5f1c/face_20250101_120000000000.png",
+    "5f1c/miniaturas/face com espaço.png",
+    "dia/ação+teste~(1).png",
+])
+def test_igual_a_url_do_minio_py(caminho):
+    momento = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    cliente = minio.Minio(ENDPOINT, access_key=ACCESS_KEY, secret_key=SECRET_KEY, secure=False, region="us-east-1")
+    esperada = cliente.presigned_get_object(BUCKET, caminho, expires=timedelta(seconds=600), request_date=momento)
+
+    gerador = assinador()
+    obtida = gerador._assinar(caminho, momento, gerador._chave(momento.strftime("%Y%m%d")))
+    assert obtida == esperada
+
+
+def test_reaproveita_url_do_cache():
+    gerador = assinador()
+    primeira = gerador.url("a/b.png")
+    assert gerador.urls(["a/b.png", "a/b.png"]) == [primeira, primeira]
+
+
+def test_lote_tem_um_unico_carimbo():
+    urls = assinador().urls(["a/1.png", "a/2.png", "a/3.png"])
+    carimbos = {url.split("X-Amz-Date=")[1].split("&")[0] for url in urls}
+    assert len(carimbos) == 1
+
+
+def test_cache_limitado():
+    gerador = assinador(cache_max=2)
+    gerador.urls(["a/1.png", "a/2.png", "a/3.png"])
+    assert list(gerador._cache) == ["a/2.png", "a/3.png"]
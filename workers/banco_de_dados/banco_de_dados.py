@@ -1,12 +1,23 @@
 import asyncio
+import hashlib
 import json
 import logging
-from pymongo import MongoClient, ReturnDocument
+import sys
+import time
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
 import os
 from datetime import datetime
 import aio_pika
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from comum import metricas
+from comum.agregados import atualizar_presencas
+from comum.esquema import garantir_indices
+from comum.eventos import EXCHANGE_PRESENCAS, evento_presenca
+from comum.frames import gravar_frames
+
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -15,6 +26,9 @@ MONGO_URI = os.getenv('MONGO_URI')
 MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
 RABBITMQ_HOST = os.getenv('RABBITMQ_HOST')
 QUEUE_NAME_BD = os.getenv('QUEUE_NAME_BD')
+LOTE_MAX = int(os.getenv('BD_LOTE_MAX', 200))  # Mensagens por gravação
+LOTE_ESPERA_MS = float(os.getenv('BD_LOTE_ESPERA_MS', 200))  # Espera máxima para completar um lote
+METRICS_PORT = int(os.getenv('BD_METRICS_PORT', 9104))
 
 # Configuração de logs
 logging.basicConfig(level=logging.INFO)
@@ -26,104 +40,193 @@ db = client[MONGO_DB_NAME]
 presencas = db["presencas"]
 frames = db["frames"]
 
-counters = db["counters"]
+tempo_gravacao_lote = metricas.histograma("bd_lote_gravacao_segundos", "Tempo de gravação de um lote no MongoDB")
+tamanho_lote = metricas.histograma("bd_lote_mensagens", "Mensagens por lote gravado", buckets=(1, 5, 10, 25, 50, 100, 200, 500))
+presencas_gravadas = metricas.contador("bd_presencas_gravadas_total", "Presenças gravadas")
+
+
+def montar_presenca(msg: dict, fim_processamento: float) -> dict:
+    espera_captura_deteccao = float(msg.get("tempo_espera_captura_deteccao", 0))
+    espera_deteccao_reconhecimento = float(msg.get("tempo_espera_deteccao_reconhecimento", 0))
+    tempo_fila_real = espera_captura_deteccao + espera_deteccao_reconhecimento
+
+    return {
+        "timestamp_inicial": msg["inicio_processamento"],
+        "timestamp_final": fim_processamento,
+        "data_captura_frame": msg["data_captura_frame"],
+        "inicio_processamento": msg["inicio_processamento"],
+        "fim_processamento": fim_processamento,
+        "tempo_processamento_total": fim_processamento - msg["inicio_processamento"],
+        "tempo_captura_frame": msg["tempo_captura_frame"],
+        "tempo_deteccao": msg["tempo_deteccao"],
+        "tempo_reconhecimento": msg["tempo_reconhecimento"],
+        "pessoa": msg.get("uuid"),
+        "foto_captura": msg["reconhecimento_path"],
+        "tags": msg.get("tags", []),
+        "tag_video": msg.get("tag_video"),
+        "timestamp": msg.get("timestamp"),
+        "tempo_espera_captura_deteccao": msg.get("tempo_espera_captura_deteccao"),
+        "tempo_espera_deteccao_reconhecimento": msg.get("tempo_espera_deteccao_reconhecimento"),
+        "tempo_fila_real": tempo_fila_real,
+    }
+
+
+def id_presenca(msg: dict) -> ObjectId:
+    """
+    _id determinístico da presença: segundos de inicio_processamento (mantém a ordem
+    aproximada dos ObjectIds) + 8 bytes do hash de frame_uuid e do caminho da face detectada
+    (nome determinístico por frame e índice; mensagens antigas usam o do reconhecimento).
+    A mesma face, reentregue ou reprocessada, gera sempre o mesmo _id.
+    """
+    segundos = int(float(msg["inicio_processamento"])) & 0xFFFFFFFF
+    face = msg.get("deteccao_path") or msg["reconhecimento_path"]
+    resumo = hashlib.sha1(f'{msg["frame_uuid"]}|{face}'.encode("utf-8")).digest()
+    return ObjectId(segundos.to_bytes(4, "big") + resumo[:8])
+
+
+def gravar_lote(msgs: list) -> list:
+    """
+    Grava um lote de reconhecimentos: as presenças por upsert no _id determinístico,
+    um único bulk_write com as upserts dos frames envolvidos e a atualização dos agregados.
+
+    As escritas não são transacionais e um erro devolve o lote inteiro à fila; por isso
+    cada passo é idempotente por presença. As presenças nascem com `aplicada: false`, os
+    frames recebem os _ids por união de conjuntos e só as presenças ainda não aplicadas
+    (inseridas agora ou numa tentativa que falhou no meio) são somadas aos agregados e
+    então marcadas. Presenças antigas, sem o campo, contam como aplicadas.
+    Retorna os documentos de presença aplicados nesta chamada (com _id).
+    """
+    fim_processamento = datetime.now().timestamp()
+    docs = []
+    for msg in msgs:
+        doc = montar_presenca(msg, fim_processamento)
+        doc["_id"] = id_presenca(msg)
+        doc["aplicada"] = False
+        docs.append(doc)
+    resultado = presencas.bulk_write([
+        UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": {k: v for k, v in doc.items() if k != "_id"}}, upsert=True)
+        for doc in docs
+    ], ordered=False)
+    if resultado.upserted_count < len(docs):
+        logger.warning(f"⚠️ {len(docs) - resultado.upserted_count} presenças do lote já estavam gravadas (reentrega)")
+
+    # Agrupa as presenças por frame: uma upsert atômica (e idempotente) por frame
+    por_frame = {}
+    for msg, doc in zip(msgs, docs):
+        frame = por_frame.setdefault(msg["frame_uuid"], {
+            "uuid": msg["frame_uuid"],
+            "tag_video": msg.get("tag_video"),
+            "data_captura_frame": msg["data_captura_frame"],
+            "total_faces_detectadas": msg["frame_total_faces"],
+            "fps": msg.get("fps"),
+            "duracao": msg.get("duracao"),
+            "numero_frame": msg.get("numero_frame"),
+            "presenca_ids": [],
+        })
+        if doc["_id"] not in frame["presenca_ids"]:
+            frame["presenca_ids"].append(doc["_id"])
+    gravar_frames(db, list(por_frame.values()))
+
+    pendentes = list(presencas.find({"_id": {"$in": [doc["_id"] for doc in docs]}, "aplicada": False}))
+    atualizar_presencas(db, pendentes)
+    if pendentes:
+        presencas.update_many({"_id": {"$in": [doc["_id"] for doc in pendentes]}}, {"$set": {"aplicada": True}})
+    return pendentes
+
+
+class GravadorEmLote:
+    """
+    Write-behind: acumula mensagens até `max_lote` ou `espera_ms` e grava tudo com
+    `gravar_lote` fora do event loop. As mensagens só recebem ack após a gravação.
+    """
+
+    def __init__(self, max_lote: int, espera_ms: float, exchange_eventos=None):
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self.fila = asyncio.Queue()
+        self.exchange_eventos = exchange_eventos
+
+    async def adicionar(self, message: aio_pika.IncomingMessage):
+        await self.fila.put(message)
+
+    async def executar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self.fila.get()]
+            limite = loop.time() + self.espera
+            while len(lote) < self.max_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self.fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            msgs, validas = [], []
+            for message in lote:
+                try:
+                    msgs.append(json.loads(message.body.decode()))
+                    validas.append(message)
+                except Exception as e:
+                    logger.error(f"❌ Mensagem inválida descartada: {e}")
+                    await message.reject(requeue=False)
+            if not msgs:
+                continue
+
+            inicio = time.perf_counter()
+            try:
+                docs = await loop.run_in_executor(None, gravar_lote, msgs)
+            except Exception as e:
+                logger.error(f"❌ Erro ao gravar lote de {len(msgs)} presenças: {e}")
+                for message in validas:
+                    await message.nack(requeue=True)
+                continue
+            duracao = time.perf_counter() - inicio
+
+            # Um único ack "multiple" confirma todo o lote (o consumo é sequencial neste canal)
+            await validas[-1].ack(multiple=True)
+            tempo_gravacao_lote.observe(duracao)
+            tamanho_lote.observe(len(msgs))
+            presencas_gravadas.inc(len(docs))
+            logger.info(f"✅ Lote gravado: {len(docs)} presenças aplicadas de {len(msgs)} mensagens em {duracao:.3f}s")
+            await self.publicar_eventos(docs)
+
+    async def publicar_eventos(self, docs: list):
+        """Avisa os dashboards (fanout, sem persistência): falhas aqui não afetam a gravação."""
+        if self.exchange_eventos is None:
+            return
+        try:
+            corpo = json.dumps({"presencas": [evento_presenca(doc) for doc in docs]}).encode("utf-8")
+            await self.exchange_eventos.publish(aio_pika.Message(body=corpo), routing_key="")
+        except Exception as e:
+            logger.error(f"❌ Erro ao publicar eventos de presença: {e}")
 
 
-# 🔢 Função para obter número sequencial por tag_video
-def get_next_sequence_value(tag_video: str) -> int:
-    counter = counters.find_one_and_update(
-        {"_id": tag_video},
-        {"$inc": {"sequence_value": 1}},
-        upsert=True,
-        return_document=ReturnDocument.AFTER
-    )
-    return counter["sequence_value"]
+gravador = None  # Criado em main(), dentro do event loop
 
 
 async def registrar_presenca(message: aio_pika.IncomingMessage):
-
-    
-    async with message.process():
-        try:
-            msg = json.loads(message.body.decode())
-
-            logger.info(f"📦 Mensagem recebida: {msg}")
-
-            fim_processamento = datetime.now().timestamp()
-            frame_total_faces = msg["frame_total_faces"]
-            frame_uuid = msg["frame_uuid"]
-            fps = msg.get("fps")
-            duracao = msg["duracao"]
-            tag_video = msg.get("tag_video")
-            espera_captura_deteccao = float(msg.get("tempo_espera_captura_deteccao", 0))
-            espera_deteccao_reconhecimento = float(msg.get("tempo_espera_deteccao_reconhecimento", 0))
-            tempo_fila_real = espera_captura_deteccao + espera_deteccao_reconhecimento
-
-            presence_doc = {
-                "timestamp_inicial": msg["inicio_processamento"],
-                "timestamp_final": fim_processamento,
-                "data_captura_frame": msg["data_captura_frame"],
-                "inicio_processamento": msg["inicio_processamento"],
-                "fim_processamento": fim_processamento,
-                "tempo_processamento_total": fim_processamento - msg["inicio_processamento"],
-                "tempo_captura_frame": msg["tempo_captura_frame"],
-                "tempo_deteccao": msg["tempo_deteccao"], 
-                "tempo_reconhecimento": msg["tempo_reconhecimento"],
-                "pessoa": msg.get("uuid"),
-                "foto_captura": msg["reconhecimento_path"],
-                "tags": msg.get("tags", []),
-                "tag_video": msg.get("tag_video"),
-                "timestamp": msg.get("timestamp"),
-                "tempo_espera_captura_deteccao": msg.get("tempo_espera_captura_deteccao"),
-                "tempo_espera_deteccao_reconhecimento": msg.get("tempo_espera_deteccao_reconhecimento"),
-                "tempo_fila_real": tempo_fila_real,
-            }
-
-            result = presencas.insert_one(presence_doc)
-
-            presenca_id = result.inserted_id
-
-            # Verificar se já existe o frame
-            frame_doc = frames.find_one({"uuid": frame_uuid})
-
-            if frame_doc:
-                # Atualizar frame existente
-                frames.update_one(
-                    {"uuid": frame_uuid},
-                    {
-                        "$inc": {"total_faces_reconhecidas": 1},
-                        "$push": {"lista_presencas": presenca_id},
-
-                    }
-                )
-            else:
-                # Criar novo frame
-                # Obter número sequencial por tag_video
-                numero_frame = get_next_sequence_value(tag_video)
-                novo_frame = {
-                    "uuid": frame_uuid,
-                    "total_faces_detectadas": frame_total_faces,
-                    "total_faces_reconhecidas": 1,
-                    "tag_video": msg.get("tag_video"),
-                    "lista_presencas": [presenca_id],
-                    "fps": fps,
-                    "duracao": duracao,
-                    "numero_frame": numero_frame
-                }
-                frames.insert_one(novo_frame)
-
-
-            logger.info(f"✅ Registro salvo: {presence_doc['pessoa']}, total: {presence_doc['tempo_processamento_total']:.2f}s")
-        except Exception as e:
-            logger.error(f"❌ Erro ao registrar presença: {e}")
+    """Entrega a mensagem ao gravador em lote; o ack ocorre após a gravação do lote."""
+    await gravador.adicionar(message)
 
 async def main():
+    global gravador
+    garantir_indices(db)
+
     connection = await aio_pika.connect_robust(f"amqp://{RABBITMQ_HOST}/")
     channel = await connection.channel()
-    await channel.set_qos(prefetch_count=10)
+    canal_eventos = await connection.channel()
+    exchange_eventos = await canal_eventos.declare_exchange(EXCHANGE_PRESENCAS, aio_pika.ExchangeType.FANOUT, durable=True)
+    gravador = GravadorEmLote(LOTE_MAX, LOTE_ESPERA_MS, exchange_eventos)
+    # O prefetch precisa comportar um lote inteiro (e o próximo) sem ack
+    await channel.set_qos(prefetch_count=LOTE_MAX * 2)
 
     queue = await channel.declare_queue(QUEUE_NAME_BD, durable=True)
 
+    metricas.iniciar_servidor_metricas(METRICS_PORT)
+    gravador.tarefa = asyncio.create_task(gravador.executar())
+
     logger.info("🎯 Aguardando mensagens de reconhecimento para registrar presença...")
     await queue.consume(registrar_presenca)
 
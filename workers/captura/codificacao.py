@@ -0,0 +1,142 @@
+"""
+Codificação PNG, upload para o MinIO e leitura de segmentos de vídeo da captura.
+
+Este módulo é o único importado pelos processos do modo offline e do pool de
+codificação (CAPTURE_POOL_TIPO=process), que usam "spawn": por isso não tem efeitos
+colaterais na importação (sem load_dotenv, rede, métricas ou RabbitMQ). As variáveis de
+ambiente chegam herdadas do processo da captura e o cliente do MinIO é criado no
+primeiro upload de cada processo.
+"""
+import io
+import os
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import cv2
+from minio import Minio
+
+BUCKET_FRAMES = "frame"
+OFFLINE_SEEK_MIN_SKIP = 30  # A partir deste salto, usa seek em vez de grab()
+
+
+@lru_cache(maxsize=1)
+def cliente_minio() -> Minio:
+    return Minio(
+        os.getenv("MINIO_ENDPOINT"),
+        access_key=os.getenv("MINIO_ACCESS_KEY"),
+        secret_key=os.getenv("MINIO_SECRET_KEY"),
+        secure=False
+    )
+
+
+class LeitorMemoryview(io.RawIOBase):
+    """Stream somente leitura sobre um buffer (memoryview), sem copiá-lo por inteiro."""
+
+    def __init__(self, dados):
+        self.dados = memoryview(dados).cast("B")
+        self.posicao = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        restante = self.dados[self.posicao:]
+        n = min(len(destino), len(restante))
+        destino[:n] = restante[:n]
+        self.posicao += n
+        return n
+
+    def read(self, size=-1):
+        fim = len(self.dados) if size is None or size < 0 else min(self.posicao + size, len(self.dados))
+        trecho = self.dados[self.posicao:fim]
+        self.posicao = fim
+        return trecho.tobytes()
+
+
+def save_image_to_minio(image_data, object_name: str) -> bool:
+    """Salva uma imagem (buffer PNG) no MinIO dentro da subpasta do dia corrente (DD-MM-AAAA)."""
+    leitor = LeitorMemoryview(image_data)
+
+    try:
+        cliente_minio().put_object(
+            BUCKET_FRAMES,
+            object_name,
+            data=leitor,
+            length=len(leitor.dados),
+            content_type="image/png"
+        )
+        print(f"✅ Imagem salva no MinIO: {object_name}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Erro ao salvar no MinIO: {e}")
+        return False
+
+
+def codificar_e_salvar(frame, object_name: str) -> dict:
+    """
+    Codifica o frame em PNG e o envia ao MinIO. Executa no pool de codificação
+    (thread ou processo) e devolve a duração de cada etapa.
+    """
+    inicio = time.perf_counter()
+    ret, buffer = cv2.imencode(".png", frame)
+    fim_codificacao = time.perf_counter()
+    if not ret:
+        print("❌ Erro ao codificar frame.")
+        return {"ok": False, "codificacao": fim_codificacao - inicio, "minio": 0.0}
+
+    # O ndarray do imencode é entregue como memoryview, sem tobytes()/BytesIO
+    ok = save_image_to_minio(memoryview(buffer), object_name)
+    return {"ok": ok, "codificacao": fim_codificacao - inicio, "minio": time.perf_counter() - fim_codificacao}
+
+
+def ler_segmento_video(video_path: str, amostras: list) -> list:
+    """
+    Lê um segmento do vídeo em um processo separado, salva no MinIO os frames amostrados
+    e retorna os metadados de cada um, na ordem de `numero_frame`.
+
+    `amostras` é uma lista de tuplas (numero_frame, indice_no_video) em ordem crescente.
+    """
+    resultados = []
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"❌ Não foi possível abrir o vídeo no leitor: {video_path}")
+        return resultados
+
+    posicao = amostras[0][1]
+    cap.set(cv2.CAP_PROP_POS_FRAMES, posicao)
+
+    for numero_frame, indice in amostras:
+        inicio_processamento = datetime.now().timestamp()
+
+        # Saltos grandes usam seek direto; saltos pequenos apenas grab() (sem decodificar)
+        salto = indice - posicao
+        if salto >= OFFLINE_SEEK_MIN_SKIP:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, indice)
+        else:
+            for _ in range(salto):
+                cap.grab()
+
+        ret, frame = cap.read()
+        posicao = indice + 1
+        if not ret:
+            break
+
+        current_date = datetime.now().strftime("%d-%m-%Y")
+        timestamp = str(int(datetime.now().timestamp() * 1000))
+        object_name = f"{current_date}/{timestamp}_{numero_frame}.png"
+        if not codificar_e_salvar(frame, object_name)["ok"]:
+            continue
+
+        fim_processamento = datetime.now().timestamp()
+        resultados.append({
+            "numero_frame": numero_frame,
+            "minio_path": object_name,
+            "inicio_processamento": inicio_processamento,
+            "tempo_captura_frame": fim_processamento - inicio_processamento,
+            "fim_captura": fim_processamento,
+        })
+
+    cap.release()
+    return resultados
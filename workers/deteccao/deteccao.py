@@ -5,6 +5,7 @@ import logging
 logging.getLogger('absl').setLevel(logging.ERROR)
 
 # imports principais
+import sys
 import time
 import json
 from datetime import datetime
@@ -17,8 +18,13 @@ import mediapipe as mp
 from dotenv import load_dotenv
 from minio import Minio
 from minio.error import S3Error
-from pymongo import MongoClient, ReturnDocument
+from pymongo import MongoClient
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from comum import metricas
+from comum.publicador import Publicador
+from comum.esquema import garantir_indices
+from comum.frames import gravar_frames
 # resto do seu script…
 
 
@@ -37,6 +43,7 @@ DETECCOES_BUCKET         = os.getenv('DETECCOES_BUCKET')
 OUTPUT_FOLDER_DETECTIONS = os.getenv('OUTPUT_FOLDER_DETECTIONS')
 MONGO_URI                = os.getenv('MONGO_URI')
 MONGO_DB_NAME            = os.getenv('MONGO_DB_NAME')
+METRICS_PORT             = int(os.getenv('DETECCAO_METRICS_PORT', 9102))
 
 MIN_DETECTION_CONFIDENCE = 0.70   # confiança mínima MediaPipe
 MIN_FACE_WIDTH           = 60    # px
@@ -62,7 +69,9 @@ minio_client = Minio(
 mongo_client = MongoClient(MONGO_URI)
 db           = mongo_client[MONGO_DB_NAME]
 frames       = db["frames"]
-counters     = db["counters"]
+
+# Publicador com confirms em janela e lotes para a fila de detecções
+publicador = Publicador(f"amqp://{RABBITMQ_HOST}/", filas=["deteccoes"], nome="deteccao")
 
 # Garante que o bucket de detecções exista
 if not minio_client.bucket_exists(DETECCOES_BUCKET):
@@ -71,28 +80,19 @@ if not minio_client.bucket_exists(DETECCOES_BUCKET):
 # ----------------------------------------
 # Helpers MongoDB
 # ----------------------------------------
-def get_next_sequence_value(tag_video: str) -> int:
-    counter = counters.find_one_and_update(
-        {"_id": tag_video},
-        {"$inc": {"sequence_value": 1}},
-        upsert=True,
-        return_document=ReturnDocument.AFTER
-    )
-    return counter["sequence_value"]
-
-def salvar_frame_sem_faces(frame_uuid: str, tag_video: str, duracao: float = None, fps: float = None):
-    numero_frame = get_next_sequence_value(tag_video)
+def salvar_frame_sem_faces(frame_uuid: str, tag_video: str, duracao: float = None, fps: float = None, numero_frame: int = None, data_captura_frame: str = None):
+    # Mesma upsert atômica do worker de banco de dados (um documento por frame_uuid);
+    # sem numero_frame da captura (modo offline), o número sequencial é atribuído na inserção
     novo_frame = {
         "uuid": frame_uuid,
         "total_faces_detectadas": 0,
-        "total_faces_reconhecidas": 0,
         "tag_video": tag_video,
-        "lista_presencas": [],
+        "data_captura_frame": data_captura_frame,
         "duracao": duracao,
         "fps": fps,
-        "numero_frame": numero_frame
+        "numero_frame": numero_frame,
     }
-    frames.insert_one(novo_frame)
+    gravar_frames(db, [novo_frame])
     print(f"🗃️ Frame sem faces salvo no MongoDB: {novo_frame}")
 
 # ----------------------------------------
@@ -111,7 +111,7 @@ def filtros(index: int, facial_area: dict) -> bool:
 # ----------------------------------------
 # Processa e envia cada face para o MinIO
 # ----------------------------------------
-def process_face(i: int, detection: dict, img, today: str, save_folder: str, image_name: str):
+def process_face(i: int, detection: dict, img, prefixo: str, save_folder: str, image_name: str):
     facial_area = detection["facial_area"]
     if filtros(i, facial_area):
         return None
@@ -124,9 +124,9 @@ def process_face(i: int, detection: dict, img, today: str, save_folder: str, ima
 
     _, encoded = cv2.imencode('.png', face_img)
     face_bytes = encoded.tobytes()
-    timestamp  = datetime.now().strftime("%H%M%S%f")
-    filename   = f"face_{timestamp}.png"
-    object_path = f"{today}/{filename}".replace("\\", "/")
+    # Nome determinístico (frame + índice da face): a reentrega do frame sobrescreve os
+    # mesmos objetos, e o banco_de_dados reconhece as presenças já gravadas
+    object_path = f"{prefixo}_face_{i}.png".replace("\\", "/")
 
     try:
         minio_client.put_object(
@@ -145,7 +145,7 @@ def process_face(i: int, detection: dict, img, today: str, save_folder: str, ima
 # ----------------------------------------
 # Executa detecção MediaPipe + paraleliza cortes
 # ----------------------------------------
-def process_image(image_bytes: bytes, image_name: str):
+def process_image(image_bytes: bytes, image_name: str, prefixo: str):
     faces_paths = []
     arr = np.frombuffer(image_bytes, np.uint8)
     img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
@@ -197,7 +197,7 @@ def process_image(image_bytes: bytes, image_name: str):
     import concurrent.futures
     with concurrent.futures.ThreadPoolExecutor() as exe:
         futures = [
-            exe.submit(process_face, i, det, img, today, save_folder, image_name)
+            exe.submit(process_face, i, det, img, prefixo, save_folder, image_name)
             for i, det in enumerate(detections)
         ]
         for fut in concurrent.futures.as_completed(futures):
@@ -208,21 +208,25 @@ def process_image(image_bytes: bytes, image_name: str):
     return faces_paths
 
 # ----------------------------------------
-# Callback RabbitMQ — sempre ack no finally
+# Callback RabbitMQ — ack após os confirms; nack (requeue) se a publicação falhar
 # ----------------------------------------
 def callback(ch, method, properties, body):
+    deteccoes = []
     try:
         msg = json.loads(body.decode())
         resp = minio_client.get_object(FRAME_BUCKET, msg["minio_path"])
         img_bytes = resp.read()
 
-        detected = process_image(img_bytes, os.path.basename(msg["minio_path"]))
+        data = msg.get("data_captura_frame") or datetime.now().strftime("%d-%m-%Y")
+        detected = process_image(img_bytes, os.path.basename(msg["minio_path"]), f"{data}/{msg['frame_uuid']}")
         if not detected:
             salvar_frame_sem_faces(
                 msg["frame_uuid"],
                 msg["tag_video"],
                 msg.get("duracao"),
-                msg.get("fps")
+                msg.get("fps"),
+                msg.get("numero_frame"),
+                msg.get("data_captura_frame")
             )
         else:
             tempo_deteccao = datetime.now().timestamp() - float(msg["inicio_processamento"])
@@ -239,30 +243,38 @@ def callback(ch, method, properties, body):
                     "frame_total_faces":       len(detected),
                     "fps":                     msg.get("fps"),
                     "duracao":                 msg.get("duracao"),
+                    "numero_frame":            msg.get("numero_frame"),
                     "tempo_espera_captura_deteccao":
                         datetime.now().timestamp() - float(msg.get("fim_captura", msg["inicio_processamento"])),
                     "inicio_deteccao": datetime.now().timestamp(),
                     "fim_deteccao":    datetime.now().timestamp(),
                 }
-                channel.basic_publish(
-                    exchange='',
-                    routing_key='deteccoes',
-                    body=json.dumps(out_msg),
-                    properties=pika.BasicProperties(delivery_mode=2)
-                )
-                print(f"✅ Enviada detecção: {out_msg}")
+                deteccoes.append(json.dumps(out_msg).encode("utf-8"))
 
     except Exception as e:
+        # Mensagem que não pode ser processada: ack para não voltar à fila indefinidamente
         print(f"❌ Erro no callback: {e}")
-    finally:
-        # ack único e garantido
         ch.basic_ack(delivery_tag=method.delivery_tag)
+        return
+
+    # As faces do frame saem em lote; o ack só ocorre após os confirms
+    try:
+        publicador.aguardar([publicador.publicar('deteccoes', corpo) for corpo in deteccoes])
+    except Exception as e:
+        print(f"❌ Faces do frame {msg['frame_uuid']} não confirmadas pelo broker, frame devolvido à fila: {e}")
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        return
+    if deteccoes:
+        print(f"✅ {len(deteccoes)} detecções enviadas do frame {msg['frame_uuid']}")
+    ch.basic_ack(delivery_tag=method.delivery_tag)
 
 # ----------------------------------------
 # Inicialização do consumer
 # ----------------------------------------
 def main():
     global channel
+    metricas.iniciar_servidor_metricas(METRICS_PORT)
+    garantir_indices(db)
     conn = pika.BlockingConnection(pika.ConnectionParameters(host=RABBITMQ_HOST))
     channel = conn.channel()
     channel.queue_declare(queue=RABBITMQ_QUEUE, durable=True)
@@ -1,5 +1,6 @@
 from io import BytesIO
 import os
+import sys
 import json
 import uuid
 import pika
@@ -18,6 +19,11 @@ from concurrent.futures import ProcessPoolExecutor
 from multiprocessing import freeze_support
 from deepface.modules.verification import find_threshold
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from comum import metricas
+from comum.esquema import garantir_indices
+from comum.miniaturas import salvar_miniatura
+from comum.publicador import Publicador
 
 # -------------------------------
 # Configurações
@@ -40,6 +46,7 @@ QUEUE_NAME = os.getenv("QUEUE_NAME")
 MONGO_URI = os.getenv('MONGO_URI')
 MONGO_DB_NAME = os.getenv('MONGO_DB_NAME')
 MODEL_NAME = os.getenv('MODEL_NAME')
+METRICS_PORT = int(os.getenv('RECONHECIMENTO_METRICS_PORT', 9103))
 #SIMILARITY_THRESHOLD = 0.30
 SIMILARITY_THRESHOLD = find_threshold(MODEL_NAME,  "cosine")
 
@@ -69,6 +76,9 @@ channel = connection.channel()
 channel.queue_declare(queue=QUEUE_NAME, durable=True)
 channel.queue_declare(queue="reconhecimentos", durable=True)  # Fila de saída
 
+# Publicador com confirms para a fila de saída (a conexão é aberta no primeiro envio)
+publicador = Publicador(f"amqp://{RABBITMQ_HOST}/", filas=["reconhecimentos"], nome="reconhecimento")
+
 # Executor global (será inicializado na função main)
 executor = None
 
@@ -97,7 +107,7 @@ def get_image_hash(image_bytes):
     return hashlib.md5(image_bytes).hexdigest()
 
 def upload_image_to_minio(image: Image.Image, uuid_str: str) -> str:
-    """Salva a imagem no MinIO e retorna seu caminho."""
+    """Salva a imagem (e sua miniatura) no MinIO e retorna o caminho da imagem."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S%f")
     image_filename = f"face_{timestamp}.png"
     minio_path = f"{uuid_str}/{image_filename}"
@@ -115,11 +125,17 @@ def upload_image_to_minio(image: Image.Image, uuid_str: str) -> str:
             content_type="image/png"
         )
         logger.info(f"✅ Imagem salva no MinIO: {minio_path}")
-        return minio_path
     except S3Error as e:
         logger.error(f"❌ Erro ao salvar no MinIO: {e}")
         return None
 
+    # Miniatura para as listagens; se falhar, o backfill (python -m comum.miniaturas) a recria
+    try:
+        salvar_miniatura(minio_client, BUCKET_RECONHECIMENTO, minio_path, image)
+    except Exception as e:
+        logger.error(f"❌ Erro ao salvar miniatura no MinIO: {e}")
+    return minio_path
+
 # -------------------------------
 # Processamento da Face com Embeddings
 # -------------------------------
@@ -259,7 +275,7 @@ def callback(ch, method, properties, body):
         frame_total_faces = msg.get("frame_total_faces")
         fps = msg.get("fps")
         duracao = msg.get("duracao")
-
+        numero_frame = msg.get("numero_frame")
 
         # Envia o processamento da face para o pool de processos
         future = executor.submit(process_face, image)
@@ -269,6 +285,7 @@ def callback(ch, method, properties, body):
         output_msg = json.dumps({
             "data_captura_frame": data_captura_frame,
             "reconhecimento_path": result["reconhecimento_path"],
+            "deteccao_path": minio_path,
             "uuid": result["uuid"],
             "tags": result["tags"],
             "inicio_processamento": inicio_processamento,
@@ -281,6 +298,7 @@ def callback(ch, method, properties, body):
             "frame_total_faces": frame_total_faces,
             "fps": fps,
             "duracao": duracao,
+            "numero_frame": numero_frame,
             "tempo_espera_captura_deteccao": tempo_espera_captura_deteccao,
             "tempo_espera_deteccao_reconhecimento": tempo_espera_deteccao_reconhecimento,
             "inicio_reconhecimento": inicio_reconhecimento,
@@ -288,20 +306,21 @@ def callback(ch, method, properties, body):
 
         })
 
-        # Envia para a fila "reconhecimentos"
-        channel.basic_publish(
-            exchange="",
-            routing_key="reconhecimentos",
-            body=output_msg,
-            properties=pika.BasicProperties(delivery_mode=2),
-        )
-        logger.info(f"✅ Reconhecimento enviado para fila 'reconhecimentos': {output_msg}")
-
-        ch.basic_ack(delivery_tag=method.delivery_tag)
-
     except Exception as e:
         logger.error(f"❌ Erro no processamento: {e}")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        return
+
+    # Envia para a fila "reconhecimentos" e aguarda o confirm antes do ack; sem confirm a
+    # face volta à fila (a presença tem _id derivado de frame_uuid + deteccao_path)
+    try:
+        publicador.aguardar([publicador.publicar("reconhecimentos", output_msg.encode("utf-8"))])
+    except Exception as e:
+        logger.error(f"❌ Reconhecimento de {minio_path} não confirmado pelo broker, face devolvida à fila: {e}")
+        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
+        return
+    logger.info(f"✅ Reconhecimento enviado para fila 'reconhecimentos': {output_msg}")
+    ch.basic_ack(delivery_tag=method.delivery_tag)
 
 # -------------------------------
 # Função Principal
@@ -309,6 +328,8 @@ def callback(ch, method, properties, body):
 def main():
     global executor
     executor = ProcessPoolExecutor(max_workers=4)
+    garantir_indices(db)
+    metricas.iniciar_servidor_metricas(METRICS_PORT)
     channel.basic_consume(queue=QUEUE_NAME, on_message_callback=callback)
     print("🎯 Aguardando mensagens...")
     channel.start_consuming()